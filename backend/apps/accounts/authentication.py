@@ -0,0 +1,135 @@
+"""
+Authentification JWT de l'API OAIB.
+
+- ``OAIBJWTAuthentication`` (défaut) : charge l'utilisateur comme SimpleJWT
+  et refuse les jetons dont la version est périmée.
+- ``StatelessJWTAuthentication`` (endpoints chauds des examens) : aucun accès
+  BDD, l'utilisateur est reconstruit depuis les claims du jeton. Seule la
+  version courante des jetons de l'utilisateur est lue dans le cache.
+
+La version (claim ``ver``) est incrémentée à chaque désactivation ou
+changement de rôle, quel que soit le chemin (signals de ``User``) : tous les
+jetons émis auparavant deviennent invalides ; une suppression publie -1.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+TOKEN_VERSION_CLAIM = 'ver'
+TOKEN_VERSION_TTL = 24 * 60 * 60
+SNAPSHOT_TTL = 60
+
+# Champs du snapshot chargé à la demande (absents des claims)
+SNAPSHOT_FIELDS = (
+    'email', 'role', 'first_name', 'last_name', 'phone', 'birth_date',
+    'is_active', 'is_email_verified', 'is_staff', 'is_superuser', 'date_joined',
+)
+
+
+def _version_key(user_id):
+    return f'auth:token_version:{user_id}'
+
+
+def publish_token_version(user_id, version):
+    """Publie la version courante des jetons d'un utilisateur (lue par tous les workers)."""
+    cache.set(_version_key(user_id), version, TOKEN_VERSION_TTL)
+
+
+def get_token_version(user_id):
+    """Version courante des jetons : cache, puis BDD en cas d'absence (-1 si l'utilisateur n'existe plus)."""
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        row = (
+            get_user_model().objects
+            .filter(pk=user_id, is_active=True)
+            .values_list('token_version', flat=True)
+            .first()
+        )
+        version = -1 if row is None else row
+        publish_token_version(user_id, version)
+    return version
+
+
+class OAIBTokenUser(TokenUser):
+    """
+    Utilisateur léger construit depuis les claims du jeton.
+
+    ``role`` et ``email`` viennent du jeton ; les autres champs sont lus dans
+    un snapshot mis en cache quelques secondes (clé incluant la version des
+    jetons, donc invalidé par un changement de rôle ou une désactivation).
+    """
+
+    @property
+    def role(self):
+        return self.token.get('role') or self._snapshot().get('role')
+
+    @property
+    def email(self):
+        return self.token.get('email') or self._snapshot().get('email')
+
+    @property
+    def is_admin(self):
+        return self.role in ('admin', 'moderator')
+
+    @property
+    def is_student(self):
+        return self.role == 'student'
+
+    def get_full_name(self):
+        return f"{self.first_name} {self.last_name}".strip()
+
+    def _snapshot(self):
+        snapshot = self.__dict__.get('_snapshot_cache')
+        if snapshot is None:
+            key = f'auth:user_snapshot:{self.id}:{self.token.get(TOKEN_VERSION_CLAIM, 0)}'
+            snapshot = cache.get(key)
+            if snapshot is None:
+                snapshot = (
+                    get_user_model().objects
+                    .filter(pk=self.id)
+                    .values(*SNAPSHOT_FIELDS)
+                    .first()
+                ) or {}
+                cache.set(key, snapshot, SNAPSHOT_TTL)
+            self.__dict__['_snapshot_cache'] = snapshot
+        return snapshot
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if attr in SNAPSHOT_FIELDS:
+            return self._snapshot().get(attr)
+        return super().__getattr__(attr)
+
+
+def _check_token_version(validated_token, current_version):
+    if validated_token.get(TOKEN_VERSION_CLAIM, 0) != current_version:
+        raise AuthenticationFailed('Jeton révoqué. Veuillez vous reconnecter.', code='token_revoked')
+
+
+class OAIBJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication + contrôle de la version des jetons (sans requête supplémentaire)."""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        _check_token_version(validated_token, user.token_version)
+        return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Authentification sans requête utilisateur : un seul accès cache (version des jetons)."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        current_version = get_token_version(user_id)
+        if current_version < 0:
+            raise AuthenticationFailed('Utilisateur inactif ou introuvable.', code='user_inactive')
+        _check_token_version(validated_token, current_version)
+        return OAIBTokenUser(validated_token)
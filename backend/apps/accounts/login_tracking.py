@@ -0,0 +1,83 @@
+"""
+Écriture groupée de ``User.last_login``.
+
+Au lieu d'un ``UPDATE`` par connexion (``UPDATE_LAST_LOGIN`` de SimpleJWT),
+chaque connexion dépose ``(user_id, timestamp)`` dans le cache, dans un
+créneau de ``FLUSH_INTERVAL`` secondes. La tâche ``flush_last_logins``
+vide les créneaux terminés et applique un ``bulk_update`` dédoublonné.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from apps.metrics import Counter
+
+FLUSH_INTERVAL = 60
+BUFFER_TTL = FLUSH_INTERVAL * 30
+_FLUSHED_KEY = 'auth:last_login:flushed_slot'
+
+login_events = Counter('auth.last_login.events', 'Connexions bufferisées')
+login_rows_written = Counter('auth.last_login.rows_written', 'Lignes User mises à jour')
+login_writes_saved = Counter('auth.last_login.writes_saved', 'UPDATE évités par le regroupement')
+
+
+def _slot_prefix(slot):
+    return f'auth:last_login:{slot}'
+
+
+def record_last_login(user_id):
+    """Bufferise la date de connexion (deux accès cache, aucune écriture BDD)."""
+    now = time.time()
+    prefix = _slot_prefix(int(now // FLUSH_INTERVAL))
+    counter_key = f'{prefix}:n'
+    cache.add(counter_key, 0, BUFFER_TTL)
+    try:
+        n = cache.incr(counter_key)
+    except ValueError:
+        cache.set(counter_key, 1, BUFFER_TTL)
+        n = 1
+    cache.set(f'{prefix}:{n}', (user_id, now), BUFFER_TTL)
+
+
+def flush_pending(batch_size=1000):
+    """Applique les créneaux terminés. Retourne (événements lus, lignes écrites)."""
+    current_slot = int(time.time() // FLUSH_INTERVAL)
+    first_slot = cache.get(_FLUSHED_KEY)
+    if first_slot is None:
+        first_slot = current_slot - BUFFER_TTL // FLUSH_INTERVAL
+    else:
+        first_slot += 1
+
+    User = get_user_model()
+    events = rows = 0
+    for slot in range(first_slot, current_slot):
+        prefix = _slot_prefix(slot)
+        count = cache.get(f'{prefix}:n') or 0
+        latest = {}
+        for start in range(1, count + 1, batch_size):
+            keys = [f'{prefix}:{i}' for i in range(start, min(start + batch_size, count + 1))]
+            for user_id, ts in cache.get_many(keys).values():
+                events += 1
+                if ts > latest.get(user_id, 0):
+                    latest[user_id] = ts
+            cache.delete_many(keys)
+        cache.delete(f'{prefix}:n')
+
+        if latest:
+            User.objects.bulk_update(
+                [
+                    User(pk=user_id, last_login=datetime.fromtimestamp(ts, tz=dt_timezone.utc))
+                    for user_id, ts in latest.items()
+                ],
+                ['last_login'],
+                batch_size=500,
+            )
+            rows += len(latest)
+        cache.set(_FLUSHED_KEY, slot, None)
+
+    login_events.inc(events)
+    login_rows_written.inc(rows)
+    login_writes_saved.inc(events - rows)
+    return events, rows
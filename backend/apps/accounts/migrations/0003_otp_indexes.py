@@ -0,0 +1,25 @@
+# Generated by Django 5.2.11 on 2026-10-19 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_pendingregistration'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otpcode',
+            index=models.Index(fields=['user', 'purpose', 'code', 'is_used', '-created_at'], name='otp_verify_lookup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otpcode',
+            index=models.Index(fields=['expires_at'], name='otp_expires_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pendingregistration',
+            index=models.Index(fields=['otp_expires_at'], name='pending_otp_expires_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_otp_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, help_text='Incrementee a chaque desactivation ou changement de role (revoque les JWT existants).', verbose_name='version des jetons'),
+        ),
+    ]
@@ -42,7 +42,12 @@ class User(AbstractUser):
         choices=Role.choices, default=Role.STUDENT,
     )
     avatar = models.ImageField('avatar', upload_to='avatars/', blank=True)
+    avatar_variants = models.JSONField("variantes de l'avatar", null=True, blank=True, editable=False)
     is_email_verified = models.BooleanField('email verifie', default=False)
+    token_version = models.PositiveIntegerField(
+        'version des jetons', default=0,
+        help_text='Incrementee a chaque desactivation ou changement de role (revoque les JWT existants).',
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
@@ -65,6 +70,14 @@ class User(AbstractUser):
     def is_student(self):
         return self.role == self.Role.STUDENT
 
+    def bump_token_version(self):
+        """Revoque tous les JWT emis pour cet utilisateur."""
+        from .authentication import publish_token_version
+
+        User.objects.filter(pk=self.pk).update(token_version=models.F('token_version') + 1)
+        self.refresh_from_db(fields=['token_version'])
+        publish_token_version(self.pk, self.token_version if self.is_active else -1)
+
 
 class OTPCode(models.Model):
     """One-Time Password for email verification and password reset."""
@@ -89,6 +102,15 @@ class OTPCode(models.Model):
         verbose_name = 'code OTP'
         verbose_name_plural = 'codes OTP'
         ordering = ['-created_at']
+        indexes = [
+            # VerifyOTPView / ResetPasswordView : filter(user, purpose, code, is_used).latest('created_at')
+            models.Index(
+                fields=['user', 'purpose', 'code', 'is_used', '-created_at'],
+                name='otp_verify_lookup_idx',
+            ),
+            # Purge périodique des codes expirés
+            models.Index(fields=['expires_at'], name='otp_expires_at_idx'),
+        ]
 
     def __str__(self):
         return f"OTP {self.code} pour {self.user.email} ({self.purpose})"
@@ -144,6 +166,9 @@ class PendingRegistration(models.Model):
         verbose_name = 'inscription en attente'
         verbose_name_plural = 'inscriptions en attente'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['otp_expires_at'], name='pending_otp_expires_idx'),
+        ]
 
     def __str__(self):
         return f"{self.email} - En attente de vérification"
@@ -0,0 +1,102 @@
+"""
+Logique d'inscription partagée entre la vue (mode normal) et la tâche
+Celery (mode affluence).
+
+En mode affluence, la vue ne fait que valider les champs, passer le
+seau à jetons et déposer la demande chiffrée dans la file : le hash
+PBKDF2 et l'écriture de ``PendingRegistration`` sont faits par un worker.
+Le client suit l'avancement via un ticket stocké dans le cache.
+"""
+import base64
+import hashlib
+import json
+import random
+import string
+from datetime import timedelta
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import OTPCode, PendingRegistration
+
+User = get_user_model()
+
+TICKET_TTL = 60 * 60
+
+
+class TicketStatus:
+    QUEUED = 'queued'
+    SENT = 'sent'
+    EXISTS = 'exists'
+    INVALID = 'invalid'
+    ERROR = 'error'
+
+
+def generate_otp(length=6):
+    return ''.join(random.choices(string.digits, k=length))
+
+
+def create_pending_registration(validated_data):
+    """
+    Crée (ou remplace) l'inscription en attente et envoie l'OTP.
+    Retourne ``TicketStatus.SENT`` ou ``TicketStatus.EXISTS``.
+    """
+    from .tasks import send_otp_email
+
+    email = validated_data['email']
+
+    # Vérifier si l'email existe déjà
+    if User.objects.filter(email=email).exists():
+        return TicketStatus.EXISTS
+
+    # Supprimer les anciennes inscriptions en attente pour cet email
+    PendingRegistration.objects.filter(email=email).delete()
+
+    code = generate_otp()
+    PendingRegistration.objects.create(
+        email=email,
+        password_hash=make_password(validated_data['password']),
+        first_name=validated_data.get('first_name', ''),
+        last_name=validated_data.get('last_name', ''),
+        phone=validated_data.get('phone', ''),
+        birth_date=validated_data.get('birth_date'),
+        otp_code=code,
+        otp_expires_at=timezone.now() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES),
+    )
+
+    send_otp_email.delay(email, code, OTPCode.Purpose.EMAIL_VERIFY)
+    return TicketStatus.SENT
+
+
+# ── Transport chiffré (le mot de passe transite par le broker) ──
+def _fernet():
+    digest = hashlib.sha256(f'registration:{settings.SECRET_KEY}'.encode()).digest()
+    return Fernet(base64.urlsafe_b64encode(digest))
+
+
+def seal_payload(data):
+    return _fernet().encrypt(json.dumps(data).encode()).decode()
+
+
+def unseal_payload(token):
+    try:
+        return json.loads(_fernet().decrypt(token.encode(), ttl=TICKET_TTL))
+    except InvalidToken:
+        return None
+
+
+# ── Tickets de suivi ──────────────────────────────────────────
+def _ticket_key(ticket):
+    return f'registration:ticket:{ticket}'
+
+
+def set_ticket_status(ticket, status):
+    cache.set(_ticket_key(ticket), status, TICKET_TTL)
+
+
+def get_ticket_status(ticket):
+    return cache.get(_ticket_key(ticket))
@@ -2,8 +2,13 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
 
+from apps.images import SrcsetField
+from .authentication import TOKEN_VERSION_CLAIM, get_token_version
+from .login_tracking import record_last_login
 from .models import OTPCode, AuditLog
 
 User = get_user_model()
@@ -43,8 +48,26 @@ class OAIBTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['email'] = user.email
         token['role'] = user.role
         token['full_name'] = f"{user.first_name} {user.last_name}"
+        token[TOKEN_VERSION_CLAIM] = user.token_version
         return token
 
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # last_login écrit en différé et en bloc (UPDATE_LAST_LOGIN désactivé)
+        record_last_login(self.user.pk)
+        return data
+
+
+class OAIBTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refus du rafraîchissement si le refresh token a été révoqué (version périmée)."""
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        user_id = refresh.payload.get('user_id')
+        if user_id is not None and refresh.payload.get(TOKEN_VERSION_CLAIM, 0) != get_token_version(user_id):
+            raise AuthenticationFailed('Jeton révoqué. Veuillez vous reconnecter.', code='token_revoked')
+        return super().validate(attrs)
+
 
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
@@ -79,12 +102,13 @@ class ResetPasswordSerializer(serializers.Serializer):
 # ──────────────────────────────────────────────
 class UserSerializer(serializers.ModelSerializer):
     profile_status = serializers.SerializerMethodField()
+    avatar_srcset = SrcsetField(source='avatar')
 
     class Meta:
         model = User
         fields = [
             'id', 'email', 'first_name', 'last_name',
-            'phone', 'birth_date', 'role', 'avatar',
+            'phone', 'birth_date', 'role', 'avatar', 'avatar_srcset',
             'is_email_verified', 'is_active', 'date_joined',
             'profile_status',
         ]
@@ -1,8 +1,21 @@
-"""Signals pour l'app accounts — création auto du profil candidat."""
+"""
+Signals pour l'app accounts — création auto du profil candidat, révocation des
+jetons, invalidation de /auth/me/, variantes d'avatar.
+"""
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
+from apps.images import register_image_fields
+from apps.response_cache import invalidate_tags
+
+
+def user_tag(user_id):
+    """Tag des réponses propres à un utilisateur (``/auth/me/``)."""
+    return f'accounts.user:{user_id}'
+
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_candidate_profile(sender, instance, created, **kwargs):
@@ -10,3 +23,53 @@ def create_candidate_profile(sender, instance, created, **kwargs):
     if created and instance.role == 'student':
         from apps.candidates.models import CandidateProfile
         CandidateProfile.objects.get_or_create(user=instance)
+
+
+# ── Révocation des jetons ─────────────────────
+# Tout changement de rôle ou désactivation (API, admin Django, shell…) et toute
+# suppression invalident les JWT déjà émis : StatelessJWTAuthentication ne lit
+# que la version publiée dans le cache.
+REVOKING_FIELDS = ('role', 'is_active')
+
+
+def _auth_state(instance):
+    # __dict__ : ne pas déclencher le chargement d'un champ différé
+    return tuple(instance.__dict__.get(field) for field in REVOKING_FIELDS)
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def remember_auth_state(sender, instance, **kwargs):
+    instance._auth_state = _auth_state(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def revoke_tokens_on_change(sender, instance, created, update_fields=None, **kwargs):
+    previous, current = instance._auth_state, _auth_state(instance)
+    instance._auth_state = current
+    if created or (update_fields is not None and not set(REVOKING_FIELDS) & set(update_fields)):
+        return
+    if any(old is not None and old != new for old, new in zip(previous, current)):
+        # Après le commit : une transaction annulée ne doit pas publier de version
+        transaction.on_commit(instance.bump_token_version)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    from .authentication import publish_token_version
+
+    user_id = instance.pk
+    transaction.on_commit(lambda: publish_token_version(user_id, -1))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_responses(sender, instance, **kwargs):
+    invalidate_tags(user_tag(instance.pk))
+
+
+@receiver(post_save, sender='candidates.CandidateProfile')
+def invalidate_profile_status(sender, instance, **kwargs):
+    """``profile_status`` de /auth/me/ vient du profil candidat."""
+    invalidate_tags(user_tag(instance.user_id))
+
+
+register_image_fields(get_user_model(), 'avatar', response_tags=lambda user: [user_tag(user.pk)])
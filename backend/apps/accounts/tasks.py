@@ -1,12 +1,19 @@
 """Tâches Celery pour l'app accounts (envoi d'emails OTP)."""
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from celery import shared_task
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.utils.html import strip_tags
 
+from apps.metrics import Counter
+
+
+jwt_outstanding_purged = Counter('auth.jwt.outstanding_purged', 'OutstandingToken expirés supprimés')
+jwt_blacklisted_purged = Counter('auth.jwt.blacklisted_purged', 'BlacklistedToken expirés supprimés')
+
 
 PURPOSE_CONFIG = {
     'email_verify': {
@@ -28,7 +35,11 @@ PURPOSE_CONFIG = {
 }
 
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+@shared_task(
+    bind=True, max_retries=3, default_retry_delay=30,
+    soft_time_limit=20, time_limit=30,
+    rate_limit='600/m',
+)
 def send_otp_email(self, user_email: str, code: str, purpose: str):
     """
     Envoie un email contenant le code OTP.
@@ -62,6 +73,94 @@ def send_otp_email(self, user_email: str, code: str, purpose: str):
 
     try:
         email.send(fail_silently=False)
-    except Exception as exc:
-        # Retry automatique (3 tentatives max)
-        raise self.retry(exc=exc)
+    except Exception as exc:  # inclut SoftTimeLimitExceeded
+        # Retry automatique (3 tentatives max, délai court : l'utilisateur attend)
+        raise self.retry(exc=exc, countdown=5 * (self.request.retries + 1))
+
+
+@shared_task(soft_time_limit=30, time_limit=45)
+def process_registration(ticket: str, sealed_payload: str):
+    """
+    Mode affluence : hash du mot de passe et création de la PendingRegistration
+    hors du worker web. Le statut est publié dans le ticket de suivi.
+    """
+    from .registration import (
+        TicketStatus, create_pending_registration, set_ticket_status, unseal_payload,
+    )
+    from .serializers import RegisterSerializer
+
+    data = unseal_payload(sealed_payload)
+    if data is None:
+        set_ticket_status(ticket, TicketStatus.ERROR)
+        return
+
+    serializer = RegisterSerializer(data=data)
+    if not serializer.is_valid():
+        set_ticket_status(ticket, TicketStatus.INVALID)
+        return
+
+    try:
+        status = create_pending_registration(serializer.validated_data)
+    except Exception:
+        set_ticket_status(ticket, TicketStatus.ERROR)
+        raise
+    set_ticket_status(ticket, status)
+
+
+def delete_in_chunks(queryset, chunk_size=5000):
+    """
+    Supprime les lignes d'un queryset par lots de ``chunk_size`` clés primaires,
+    pour ne jamais verrouiller la table ni gonfler la mémoire.
+    Retourne le nombre de lignes supprimées.
+    """
+    model = queryset.model
+    total = 0
+    while True:
+        # Sans tri : l'ordering par défaut du modèle imposerait un tri à chaque lot
+        pks = list(queryset.order_by().values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return total
+        model.objects.filter(pk__in=pks).delete()
+        total += len(pks)
+
+
+@shared_task(soft_time_limit=600, time_limit=660)
+def purge_expired_otps(chunk_size=5000):
+    """
+    Purge les OTP et inscriptions en attente expirés (planifiée par Celery beat).
+    Les codes utilisés expirent de toute façon 10 minutes après leur création.
+    """
+    from .models import OTPCode, PendingRegistration
+
+    cutoff = timezone.now() - timedelta(hours=getattr(settings, 'OTP_RETENTION_HOURS', 24))
+    otp_deleted = delete_in_chunks(OTPCode.objects.filter(expires_at__lt=cutoff), chunk_size)
+    pending_deleted = delete_in_chunks(
+        PendingRegistration.objects.filter(otp_expires_at__lt=cutoff), chunk_size,
+    )
+    return {'otp_codes': otp_deleted, 'pending_registrations': pending_deleted}
+
+
+@shared_task(soft_time_limit=600, time_limit=660)
+def purge_expired_tokens(chunk_size=5000):
+    """
+    Purge les refresh tokens expirés (OutstandingToken / BlacklistedToken),
+    accumulés à chaque rotation. Les blacklistés sont supprimés d'abord
+    pour que la suppression des OutstandingToken ne déclenche pas de cascade.
+    """
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+    now = timezone.now()
+    blacklisted = delete_in_chunks(BlacklistedToken.objects.filter(token__expires_at__lt=now), chunk_size)
+    outstanding = delete_in_chunks(OutstandingToken.objects.filter(expires_at__lt=now), chunk_size)
+    jwt_blacklisted_purged.inc(blacklisted)
+    jwt_outstanding_purged.inc(outstanding)
+    return {'blacklisted': blacklisted, 'outstanding': outstanding}
+
+
+@shared_task(soft_time_limit=50, time_limit=60)
+def flush_last_logins():
+    """Écrit en bloc les dates de dernière connexion bufferisées dans le cache."""
+    from .login_tracking import flush_pending
+
+    events, rows = flush_pending()
+    return {'events': events, 'rows': rows}
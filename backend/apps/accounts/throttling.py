@@ -0,0 +1,211 @@
+"""
+Protection anti brute-force des endpoints d'authentification.
+
+Compteurs à fenêtre glissante stockés dans le cache, par email et par IP.
+La vérification coûte un seul aller-retour cache (``get_many`` regroupant
+version des paramètres plateforme, compteurs et verrous) et aucune requête
+BDD : les paramètres eux-mêmes sont gardés en mémoire du processus.
+
+Contient aussi le seau à jetons qui régule l'admission des inscriptions
+en mode affluence.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from apps.platform_settings.models import PlatformSettings
+
+
+class AttemptLimiter:
+    """
+    Limiteur de tentatives pour un scope donné (login, otp, ...).
+
+    - Fenêtre glissante approximée par deux fenêtres fixes consécutives
+      (compteur courant + compteur précédent pondéré).
+    - Une IP a droit à ``ip_multiplier`` fois la limite d'un email
+      (plusieurs élèves derrière le même NAT d'un lycée).
+    - Au-delà de la limite : verrouillage, dont la durée double à chaque
+      récidive (backoff exponentiel plafonné à ``max_lockout``).
+    """
+
+    def __init__(self, scope, setting_name, default_limit, window,
+                 ip_multiplier=5, base_lockout=60, max_lockout=3600):
+        self.scope = scope
+        self.setting_name = setting_name
+        self.default_limit = default_limit
+        self.window = window
+        self.ip_multiplier = ip_multiplier
+        self.base_lockout = base_lockout
+        self.max_lockout = max_lockout
+
+    # ── Helpers ───────────────────────────────────────────────
+    def _identities(self, request, email):
+        idents = []
+        email = (email or '').strip().lower() if isinstance(email, str) else ''
+        if email:
+            idents.append(('email', email))
+        ip = BaseThrottle().get_ident(request)
+        if ip:
+            idents.append(('ip', ip))
+        return idents
+
+    def _keys(self, kind, ident, now):
+        base = f'throttle:{self.scope}:{kind}:{ident}'
+        slot = int(now // self.window)
+        return {
+            'cur': f'{base}:{slot}',
+            'prev': f'{base}:{slot - 1}',
+            'lock': f'{base}:lock',
+            'strikes': f'{base}:strikes',
+        }
+
+    def _limit(self, kind, platform_settings):
+        try:
+            limit = int(platform_settings.get_security_setting(self.setting_name, self.default_limit))
+        except (TypeError, ValueError):
+            limit = self.default_limit
+        limit = max(limit, 1)
+        return limit * self.ip_multiplier if kind == 'ip' else limit
+
+    # ── API ───────────────────────────────────────────────────
+    def check(self, request, email):
+        """Lève ``Throttled`` (429 + Retry-After) si l'email ou l'IP est bloqué."""
+        now = time.time()
+        idents = self._identities(request, email)
+        keys = [self._keys(kind, ident, now) for kind, ident in idents]
+
+        wanted = [PlatformSettings.VERSION_KEY]
+        for k in keys:
+            wanted.extend(k.values())
+        values = cache.get_many(wanted)
+
+        platform_settings = PlatformSettings.get_cached(version=values.get(PlatformSettings.VERSION_KEY))
+        elapsed = (now % self.window) / self.window
+
+        for (kind, _), k in zip(idents, keys):
+            locked_until = values.get(k['lock'])
+            if locked_until and locked_until > now:
+                raise Throttled(wait=locked_until - now)
+            count = values.get(k['cur'], 0) + values.get(k['prev'], 0) * (1 - elapsed)
+            if count >= self._limit(kind, platform_settings):
+                raise Throttled(wait=self.window * (1 - elapsed))
+
+    def hit(self, request, email):
+        """Enregistre une tentative (échec ou demande) et verrouille si la limite est atteinte."""
+        now = time.time()
+        platform_settings = PlatformSettings.get_cached()
+        for kind, ident in self._identities(request, email):
+            k = self._keys(kind, ident, now)
+            cache.add(k['cur'], 0, self.window * 2)
+            try:
+                count = cache.incr(k['cur'])
+            except ValueError:  # clé expirée entre add et incr
+                cache.set(k['cur'], 1, self.window * 2)
+                count = 1
+            if count >= self._limit(kind, platform_settings):
+                self._lock(k, now)
+
+    def _lock(self, k, now):
+        cache.add(k['strikes'], 0, self.max_lockout * 2)
+        try:
+            strikes = cache.incr(k['strikes'])
+        except ValueError:
+            strikes = 1
+        duration = min(self.base_lockout * 2 ** (strikes - 1), self.max_lockout)
+        cache.set(k['lock'], now + duration, duration)
+
+    def reset(self, email):
+        """Remet à zéro les compteurs d'un email après une authentification réussie."""
+        if not isinstance(email, str) or not email.strip():
+            return
+        now = time.time()
+        k = self._keys('email', email.strip().lower(), now)
+        cache.delete_many([k['cur'], k['prev'], k['lock']])
+
+
+# Limites lues dans PlatformSettings.security_settings (valeurs par défaut sinon)
+login_limiter = AttemptLimiter(
+    'login', 'max_login_attempts', default_limit=5, window=15 * 60,
+)
+# Partagé entre vérification OTP et reset : 5 essais au total sur un code à 6 chiffres
+otp_guess_limiter = AttemptLimiter(
+    'otp', 'max_otp_attempts', default_limit=5, window=15 * 60,
+)
+otp_request_limiter = AttemptLimiter(
+    'otp_request', 'max_otp_requests', default_limit=3, window=60 * 60,
+    base_lockout=15 * 60,
+)
+
+
+# ──────────────────────────────────────────────
+# SEAU À JETONS (admission des inscriptions)
+# ──────────────────────────────────────────────
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= requested then
+  tokens = tokens - requested
+else
+  wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """
+    Seau à jetons partagé entre tous les workers.
+
+    Sur Redis, la recharge et la consommation sont faites atomiquement par un
+    script Lua (un aller-retour). Avec un autre backend de cache (LocMem en
+    développement), un verrou local protège la lecture-écriture.
+    """
+
+    _local_lock = threading.Lock()
+
+    def __init__(self, name, rate, capacity):
+        self.key = f'token_bucket:{name}'
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+
+    def consume(self, tokens=1):
+        """Retourne 0 si la requête est admise, sinon le délai d'attente (secondes)."""
+        backend = caches['default']
+        now = time.time()
+        if isinstance(backend, RedisCache):
+            key = backend.make_and_validate_key(self.key)
+            client = backend._cache.get_client(key, write=True)
+            wait = client.eval(_TOKEN_BUCKET_LUA, 1, key, self.rate, self.capacity, now, tokens)
+            return float(wait)
+
+        with self._local_lock:
+            state_tokens, ts = cache.get(self.key, (self.capacity, now))
+            state_tokens = min(self.capacity, state_tokens + max(0.0, now - ts) * self.rate)
+            wait = 0.0
+            if state_tokens >= tokens:
+                state_tokens -= tokens
+            else:
+                wait = (tokens - state_tokens) / self.rate
+            cache.set(self.key, (state_tokens, now), int(self.capacity / self.rate) + 1)
+        return wait
+
+
+registration_gate = TokenBucket(
+    'registration',
+    rate=getattr(settings, 'REGISTRATION_GATE_RATE', 20),
+    capacity=getattr(settings, 'REGISTRATION_GATE_BURST', 100),
+)
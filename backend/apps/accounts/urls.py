@@ -12,6 +12,7 @@ router.register(r'audit-logs', views.AuditLogViewSet, basename='audit-logs')
 urlpatterns = [
     # Auth
     path('register/', views.RegisterView.as_view(), name='register'),
+    path('register/status/<str:ticket>/', views.RegisterStatusView.as_view(), name='register-status'),
     path('login/', views.LoginView.as_view(), name='login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('change-password/', views.ChangePasswordView.as_view(), name='change-password'),
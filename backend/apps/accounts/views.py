@@ -1,19 +1,31 @@
 """Views pour l'app accounts (auth, users, OTP)."""
-import random
-import string
+import uuid
 
 from django.contrib.auth import get_user_model
+from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed, Throttled
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from apps.conditional import ConditionalGetMixin
 from apps.permissions import IsAdmin, IsOwner, IsOwnerOrAdmin
+from apps.platform_settings.models import PlatformSettings
+from .login_tracking import record_last_login
 from .models import OTPCode, AuditLog, PendingRegistration
-from .tasks import send_otp_email
+from .signals import user_tag
+from .registration import (
+    TicketStatus, create_pending_registration, generate_otp,
+    get_ticket_status, seal_payload, set_ticket_status,
+)
+from .tasks import process_registration, send_otp_email
+from .throttling import (
+    login_limiter, otp_guess_limiter, otp_request_limiter, registration_gate,
+)
 from .serializers import (
     RegisterSerializer,
     OAIBTokenObtainPairSerializer,
@@ -29,10 +41,6 @@ from .serializers import (
 User = get_user_model()
 
 
-def _generate_otp(length=6):
-    return ''.join(random.choices(string.digits, k=length))
-
-
 # ──────────────────────────────────────────────
 # AUTH
 # ──────────────────────────────────────────────
@@ -40,58 +48,78 @@ class RegisterView(generics.CreateAPIView):
     """
     Inscription d'un nouvel utilisateur.
     Les données sont stockées temporairement jusqu'à vérification OTP.
+    En mode affluence, la demande est admise par seau à jetons puis traitée
+    par un worker Celery : le client reçoit un 202 et un ticket de suivi.
     """
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
 
     def create(self, request, *args, **kwargs):
-        from django.contrib.auth.hashers import make_password
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        email = serializer.validated_data['email']
+        if PlatformSettings.get_cached().registration_surge_mode:
+            return self._enqueue(request)
 
-        # Vérifier si l'email existe déjà (utilisateur ou inscription en attente)
-        if User.objects.filter(email=email).exists():
+        if create_pending_registration(serializer.validated_data) == TicketStatus.EXISTS:
             return Response(
                 {'detail': 'Un compte existe déjà avec cet email.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Supprimer les anciennes inscriptions en attente pour cet email
-        PendingRegistration.objects.filter(email=email).delete()
-
-        # Générer le code OTP
-        code = _generate_otp()
-        expires_at = timezone.now() + timedelta(minutes=10)
-
-        # Stocker temporairement les données d'inscription
-        pending = PendingRegistration.objects.create(
-            email=email,
-            password_hash=make_password(serializer.validated_data['password']),
-            first_name=serializer.validated_data.get('first_name', ''),
-            last_name=serializer.validated_data.get('last_name', ''),
-            phone=serializer.validated_data.get('phone', ''),
-            birth_date=serializer.validated_data.get('birth_date'),
-            otp_code=code,
-            otp_expires_at=expires_at,
+        return Response(
+            {'detail': 'Code de vérification envoyé. Vérifiez votre email.'},
+            status=status.HTTP_201_CREATED,
         )
 
-        # Envoyer le code OTP par email
-        send_otp_email.delay(email, code, OTPCode.Purpose.EMAIL_VERIFY)
+    def _enqueue(self, request):
+        wait = registration_gate.consume()
+        if wait:
+            raise Throttled(wait=wait)
+
+        ticket = uuid.uuid4().hex
+        set_ticket_status(ticket, TicketStatus.QUEUED)
+        payload = {field: request.data.get(field) for field in RegisterSerializer.Meta.fields if field in request.data}
+        process_registration.delay(ticket, seal_payload(payload))
 
         return Response(
-            {'detail': 'Code de vérification envoyé. Vérifiez votre email.'},
-            status=status.HTTP_201_CREATED,
+            {
+                'detail': 'Inscription en cours de traitement. Le code de vérification arrive par email.',
+                'ticket': ticket,
+                'status_url': reverse('register-status', kwargs={'ticket': ticket}),
+            },
+            status=status.HTTP_202_ACCEPTED,
         )
 
 
+class RegisterStatusView(generics.GenericAPIView):
+    """Suivi d'une inscription en mode affluence (lecture du cache uniquement)."""
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = []
+
+    def get(self, request, ticket):
+        ticket_status = get_ticket_status(ticket)
+        if ticket_status is None:
+            return Response({'detail': 'Ticket inconnu ou expiré.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'ticket': ticket, 'status': ticket_status})
+
+
 class LoginView(TokenObtainPairView):
     """Connexion JWT — retourne access + refresh tokens."""
     serializer_class = OAIBTokenObtainPairSerializer
     permission_classes = [permissions.AllowAny]
 
+    def post(self, request, *args, **kwargs):
+        email = request.data.get('email')
+        login_limiter.check(request, email)
+        try:
+            response = super().post(request, *args, **kwargs)
+        except AuthenticationFailed:
+            login_limiter.hit(request, email)
+            raise
+        login_limiter.reset(email)
+        return response
+
 
 class ChangePasswordView(generics.GenericAPIView):
     """Changement de mot de passe (utilisateur connecté)."""
@@ -117,6 +145,9 @@ class RequestOTPView(generics.GenericAPIView):
         email = serializer.validated_data['email']
         purpose = serializer.validated_data['purpose']
 
+        otp_request_limiter.check(request, email)
+        otp_request_limiter.hit(request, email)
+
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
@@ -126,7 +157,7 @@ class RequestOTPView(generics.GenericAPIView):
         # Invalider les anciens codes
         OTPCode.objects.filter(user=user, purpose=purpose, is_used=False).update(is_used=True)
 
-        code = _generate_otp()
+        code = generate_otp()
         OTPCode.objects.create(
             user=user,
             code=code,
@@ -149,8 +180,6 @@ class VerifyOTPView(generics.GenericAPIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
-        from rest_framework_simplejwt.tokens import RefreshToken
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -158,11 +187,14 @@ class VerifyOTPView(generics.GenericAPIView):
         code = serializer.validated_data['code']
         purpose = serializer.validated_data['purpose']
 
+        otp_guess_limiter.check(request, email)
+
         # Cas 1 : Vérification email pour inscription (PendingRegistration)
         if purpose == OTPCode.Purpose.EMAIL_VERIFY:
             try:
                 pending = PendingRegistration.objects.get(email=email, otp_code=code)
             except PendingRegistration.DoesNotExist:
+                otp_guess_limiter.hit(request, email)
                 return Response(
                     {'detail': 'Code OTP invalide.'},
                     status=status.HTTP_400_BAD_REQUEST,
@@ -188,9 +220,11 @@ class VerifyOTPView(generics.GenericAPIView):
 
             # Supprimer l'inscription en attente
             pending.delete()
+            otp_guess_limiter.reset(email)
 
             # Générer les tokens JWT
-            refresh = RefreshToken.for_user(user)
+            refresh = OAIBTokenObtainPairSerializer.get_token(user)
+            record_last_login(user.pk)
 
             return Response({
                 'detail': 'Inscription validée avec succès !',
@@ -215,6 +249,7 @@ class VerifyOTPView(generics.GenericAPIView):
                 is_used=False,
             ).latest('created_at')
         except (User.DoesNotExist, OTPCode.DoesNotExist):
+            otp_guess_limiter.hit(request, email)
             return Response(
                 {'detail': 'Code OTP invalide.'},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -228,6 +263,7 @@ class VerifyOTPView(generics.GenericAPIView):
 
         otp.is_used = True
         otp.save()
+        otp_guess_limiter.reset(email)
 
         return Response({'detail': 'Code OTP vérifié avec succès.'})
 
@@ -240,9 +276,12 @@ class ResetPasswordView(generics.GenericAPIView):
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        email = serializer.validated_data['email']
+
+        otp_guess_limiter.check(request, email)
 
         try:
-            user = User.objects.get(email=serializer.validated_data['email'])
+            user = User.objects.get(email=email)
             otp = OTPCode.objects.filter(
                 user=user,
                 code=serializer.validated_data['code'],
@@ -250,6 +289,7 @@ class ResetPasswordView(generics.GenericAPIView):
                 is_used=False,
             ).latest('created_at')
         except (User.DoesNotExist, OTPCode.DoesNotExist):
+            otp_guess_limiter.hit(request, email)
             return Response(
                 {'detail': 'Code OTP invalide.'},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -265,6 +305,7 @@ class ResetPasswordView(generics.GenericAPIView):
         otp.save()
         user.set_password(serializer.validated_data['new_password'])
         user.save()
+        otp_guess_limiter.reset(email)
 
         return Response({'detail': 'Mot de passe réinitialisé avec succès.'})
 
@@ -272,11 +313,14 @@ class ResetPasswordView(generics.GenericAPIView):
 # ──────────────────────────────────────────────
 # PROFIL UTILISATEUR
 # ──────────────────────────────────────────────
-class MeView(generics.RetrieveUpdateAPIView):
+class MeView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     """Profil de l'utilisateur connecté."""
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_conditional_tags(self):
+        return (user_tag(self.request.user.pk),)
+
     def get_object(self):
         return self.request.user
 
@@ -297,7 +341,7 @@ class UserViewSet(viewsets.ModelViewSet):
     def toggle_active(self, request, pk=None):
         user = self.get_object()
         user.is_active = not user.is_active
-        user.save(update_fields=['is_active'])
+        user.save(update_fields=['is_active'])  # révoque les jetons (signal)
         return Response({'is_active': user.is_active})
 
 
@@ -0,0 +1,78 @@
+"""
+Archives ZIP construites à la volée pour ``StreamingHttpResponse``.
+
+Les fichiers sont téléchargés depuis le stockage par un pool de threads
+borné, avec au plus ``window`` fichiers en mémoire (en cours ou en attente
+d'écriture) : la mémoire utilisée ne dépend pas de la taille de l'archive.
+Les entrées sont écrites dans l'ordre, sans compression (PDF et images le
+sont déjà), et chaque bloc produit est transmis aussitôt au client.
+"""
+import logging
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+FETCH_WORKERS = 4
+ERRORS_NAME = 'FICHIERS_MANQUANTS.txt'
+
+
+class _Sink:
+    """Flux non « seekable » : zipfile écrit des data descriptors, on vide après chaque entrée."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer.extend(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def stream_zip(entries, fetch, workers=FETCH_WORKERS, window=None):
+    """
+    Génère les octets d'une archive ZIP.
+
+    ``entries`` : itérable de ``(nom dans l'archive, clé)`` ; ``fetch(clé)``
+    retourne le contenu (appelé dans le pool). Un fichier illisible est
+    ignoré et listé dans ``FICHIERS_MANQUANTS.txt`` à la fin de l'archive.
+    """
+    window = window or workers + 1
+    sink = _Sink()
+    missing = []
+    entries = iter(entries)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='zip-fetch')
+    try:
+        pending = deque(
+            (arcname, pool.submit(fetch, key)) for arcname, key in islice(entries, window)
+        )
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+            while pending:
+                arcname, future = pending.popleft()
+                for next_arcname, next_key in islice(entries, 1):
+                    pending.append((next_arcname, pool.submit(fetch, next_key)))
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.warning('Archive : %s ignoré (%s)', arcname, e)
+                    missing.append(arcname)
+                    continue
+                archive.writestr(arcname, data)
+                del data
+                yield sink.drain()
+
+            if missing:
+                archive.writestr(ERRORS_NAME, '\n'.join(missing) + '\n')
+        yield sink.drain()  # répertoire central
+    finally:
+        # Client déconnecté : les téléchargements pas encore commencés sont abandonnés
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -10,7 +10,7 @@ class TutorInfoInline(admin.StackedInline):
 class DocumentInline(admin.TabularInline):
     model = Document
     extra = 0
-    readonly_fields = ('uploaded_at',)
+    readonly_fields = ('upload_state', 'uploaded_at')
 
 
 @admin.register(CandidateProfile)
@@ -24,6 +24,6 @@ class CandidateProfileAdmin(admin.ModelAdmin):
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
-    list_display = ('name', 'candidate', 'doc_type', 'status', 'uploaded_at')
-    list_filter = ('doc_type', 'status')
+    list_display = ('name', 'candidate', 'doc_type', 'status', 'upload_state', 'uploaded_at')
+    list_filter = ('doc_type', 'status', 'upload_state')
     search_fields = ('name', 'candidate__user__email')
@@ -0,0 +1,82 @@
+"""
+Export des candidatures (CSV / XLSX), avec les filtres de la liste admin.
+
+Le CSV est envoyé au fil de la lecture. Le XLSX n'est utilisable qu'une fois
+le classeur fermé : au-delà de ``ASYNC_THRESHOLD`` lignes, il est généré par
+Celery (``export_candidates``), qui rejoue les filtres de la requête, et
+déposé dans le bucket privé le temps de l'expiration du travail.
+"""
+import uuid
+from types import SimpleNamespace
+
+from django.http import QueryDict
+
+from apps.exports import (
+    Column, choice_label, create_export_job, export_file, export_filename, export_job_status, fail_export_job,
+    local_datetime, store_export,
+)
+from .models import CandidateProfile, TutorInfo
+
+# Au-delà, un export XLSX est généré en tâche de fond (délai du serveur web)
+ASYNC_THRESHOLD = 5000
+EXPORT_KIND = 'candidates'
+
+# Colonnes de l'export des candidatures (tuteur : jointure, pas de requête par ligne)
+CANDIDATE_EXPORT_COLUMNS = [
+    Column('ID', 'pk'),
+    Column('Email', 'user__email'),
+    Column('Nom', 'user__last_name'),
+    Column('Prénom', 'user__first_name'),
+    Column('Téléphone', 'user__phone'),
+    Column('Date de naissance', 'user__birth_date'),
+    Column('Genre', 'gender', choice_label(CandidateProfile.Gender.choices)),
+    Column('Établissement', 'school'),
+    Column('Niveau', 'level', choice_label(CandidateProfile.Level.choices)),
+    Column('Classe', 'class_name'),
+    Column('Moyenne générale', 'average_grade'),
+    Column('Note maths', 'math_grade'),
+    Column('Note sciences', 'science_grade'),
+    Column('Région', 'region'),
+    Column('Ville', 'city'),
+    Column('Statut', 'status', choice_label(CandidateProfile.Status.choices)),
+    Column('Complétion (%)', 'profile_completion'),
+    Column('Inscrit le', 'registered_at', local_datetime),
+    Column('Tuteur — nom', 'tutor_info__last_name'),
+    Column('Tuteur — prénom', 'tutor_info__first_name'),
+    Column('Tuteur — lien', 'tutor_info__relationship', choice_label(TutorInfo.Relationship.choices)),
+    Column('Tuteur — téléphone', 'tutor_info__phone'),
+    Column('Tuteur — email', 'tutor_info__email'),
+]
+
+
+def candidates_queryset(query):
+    """Candidatures filtrées comme par la liste admin pour la query string ``query``."""
+    from .views import CandidateViewSet
+
+    view = CandidateViewSet(action='export', format_kwarg=None,
+                            request=SimpleNamespace(query_params=QueryDict(query)))
+    return view.filter_queryset(view.get_queryset()).prefetch_related(None)
+
+
+# ── Export en tâche de fond ───────────────────
+def start_job(query, file_format):
+    from .tasks import export_candidates
+
+    job_id = uuid.uuid4().hex
+    create_export_job(EXPORT_KIND, job_id)
+    export_candidates.delay(job_id, query, file_format)
+    return job_id
+
+
+def run_job(job_id, query, file_format):
+    filename = export_filename('candidatures', file_format)
+    output = export_file(candidates_queryset(query), CANDIDATE_EXPORT_COLUMNS, file_format, 'Candidatures')
+    return store_export(EXPORT_KIND, job_id, output, filename)
+
+
+def fail_job(job_id, error):
+    fail_export_job(EXPORT_KIND, job_id, error)
+
+
+def job_status(job_id):
+    return export_job_status(EXPORT_KIND, job_id)
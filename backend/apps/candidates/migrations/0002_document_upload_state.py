@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='upload_state',
+            field=models.CharField(choices=[('pending_upload', "En attente d'envoi"), ('stored', 'Stocke'), ('failed', "Echec de l'envoi")], default='stored', help_text="pending_upload : fichier en file d'attente locale (DOCUMENT_UPLOAD_SPOOL)", max_length=20, verbose_name="etat de l'envoi"),
+        ),
+    ]
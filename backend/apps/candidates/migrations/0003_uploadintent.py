@@ -0,0 +1,32 @@
+# Generated by Django 5.2.11 on 2026-10-19 18:03
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0002_document_upload_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadIntent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('path', models.CharField(max_length=255, unique=True, verbose_name='chemin')),
+                ('name', models.CharField(max_length=200, verbose_name='nom du fichier')),
+                ('doc_type', models.CharField(choices=[('bulletin', 'Bulletin scolaire'), ('certificate', 'Certificat'), ('other', 'Autre')], max_length=20, verbose_name='type de document')),
+                ('size_bytes', models.PositiveIntegerField(verbose_name='taille annoncee (octets)')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='expire le')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='cree le')),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_intents', to='candidates.candidateprofile', verbose_name='candidat')),
+            ],
+            options={
+                'verbose_name': "intention d'upload",
+                'verbose_name_plural': "intentions d'upload",
+            },
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
@@ -177,6 +179,11 @@ class Document(models.Model):
         VERIFIED = 'verified', 'Verifie'
         REJECTED = 'rejected', 'Rejete'
 
+    class UploadState(models.TextChoices):
+        PENDING_UPLOAD = 'pending_upload', 'En attente d\'envoi'
+        STORED = 'stored', 'Stocke'
+        FAILED = 'failed', 'Echec de l\'envoi'
+
     candidate = models.ForeignKey(
         CandidateProfile, on_delete=models.CASCADE,
         related_name='documents', verbose_name='candidat',
@@ -194,6 +201,11 @@ class Document(models.Model):
     status = models.CharField(
         'statut', max_length=20, choices=Status.choices, default=Status.PENDING,
     )
+    upload_state = models.CharField(
+        'etat de l\'envoi', max_length=20, choices=UploadState.choices,
+        default=UploadState.STORED,
+        help_text='pending_upload : fichier en file d\'attente locale (DOCUMENT_UPLOAD_SPOOL)',
+    )
     uploaded_at = models.DateTimeField('uploade le', auto_now_add=True)
 
     class Meta:
@@ -203,3 +215,26 @@ class Document(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.get_doc_type_display()}"
+
+
+class UploadIntent(models.Model):
+    """Upload direct en cours : URL signée délivrée, fichier pas encore confirmé."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    candidate = models.ForeignKey(
+        CandidateProfile, on_delete=models.CASCADE,
+        related_name='upload_intents', verbose_name='candidat',
+    )
+    path = models.CharField('chemin', max_length=255, unique=True)
+    name = models.CharField('nom du fichier', max_length=200)
+    doc_type = models.CharField('type de document', max_length=20, choices=Document.DocType.choices)
+    size_bytes = models.PositiveIntegerField('taille annoncee (octets)')
+    expires_at = models.DateTimeField('expire le', db_index=True)
+    created_at = models.DateTimeField('cree le', auto_now_add=True)
+
+    class Meta:
+        verbose_name = "intention d'upload"
+        verbose_name_plural = "intentions d'upload"
+
+    def __str__(self):
+        return f"{self.path} ({self.candidate_id})"
@@ -1,7 +1,11 @@
 """Serializers pour l'app candidates."""
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
 
+from config.supabase_storage import candidate_document_path
 from .models import CandidateProfile, TutorInfo, Document
+from .uploads import spool_document
 
 
 class TutorInfoSerializer(serializers.ModelSerializer):
@@ -13,29 +17,47 @@ class TutorInfoSerializer(serializers.ModelSerializer):
         ]
 
 
+class DocumentFileField(serializers.FileField):
+    """Pas d'URL tant que le fichier est dans la file d'attente locale."""
+
+    def to_representation(self, value):
+        if value and value.instance.upload_state != Document.UploadState.STORED:
+            return None
+        return super().to_representation(value)
+
+
 class DocumentSerializer(serializers.ModelSerializer):
+    file = DocumentFileField()
     file_url = serializers.SerializerMethodField()
+    open_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Document
-        fields = ['id', 'name', 'doc_type', 'file', 'file_url', 'size_bytes', 'status', 'uploaded_at']
-        read_only_fields = ['id', 'size_bytes', 'status', 'uploaded_at', 'file_url']
+        fields = ['id', 'name', 'doc_type', 'file', 'file_url', 'open_url', 'size_bytes', 'status', 'upload_state', 'uploaded_at']
+        read_only_fields = ['id', 'size_bytes', 'status', 'upload_state', 'uploaded_at', 'file_url', 'open_url']
 
     def get_file_url(self, obj):
-        """Retourne l'URL signée du fichier"""
-        if obj.file:
+        """Retourne l'URL signée du fichier (en cache, voir SupabaseStorage.signed_url)"""
+        if obj.file and obj.upload_state == Document.UploadState.STORED:
             return obj.file.url
         return None
 
+    def get_open_url(self, obj) -> str:
+        """Endpoint qui signe le fichier seulement à l'ouverture"""
+        return reverse('document-open', kwargs={'pk': obj.pk})
+
     def create(self, validated_data):
         file = validated_data.get('file')
         candidate = validated_data.get('candidate')
 
+        if file and candidate and settings.DOCUMENT_UPLOAD_SPOOL:
+            # Écriture sur disque, l'envoi vers Supabase est fait par Celery
+            validated_data.pop('file')
+            return spool_document(file, **validated_data)
+
         if file and candidate:
             # Générer un nom de fichier unique pour le candidat
-            from config.supabase_storage import CandidateDocumentStorage
-            storage = CandidateDocumentStorage()
-            unique_path = storage.get_candidate_path(candidate.id, file.name)
+            unique_path = candidate_document_path(candidate.id, file.name)
 
             # Sauvegarder avec le chemin unique
             file.name = unique_path
@@ -44,6 +66,18 @@ class DocumentSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class DocumentUploadIntentSerializer(serializers.Serializer):
+    """Demande d'URL d'upload direct."""
+    name = serializers.CharField(max_length=200)
+    doc_type = serializers.ChoiceField(choices=Document.DocType.choices)
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+
+
+class DocumentUploadConfirmSerializer(serializers.Serializer):
+    upload_id = serializers.CharField(max_length=64)
+
+
 class CandidateProfileSerializer(serializers.ModelSerializer):
     tutor_info = TutorInfoSerializer(read_only=True)
     documents = DocumentSerializer(many=True, read_only=True)
@@ -0,0 +1,141 @@
+"""Tâches Celery pour l'app candidates (documents en file d'attente, uploads directs, exports)."""
+import logging
+import os
+from datetime import timedelta
+
+from celery import shared_task
+from django.core.cache import cache
+from django.core.files import File
+from django.utils import timezone
+
+from .candidates_export import fail_job as fail_export_job, run_job as run_export_job
+from .models import Document
+from .uploads import purge_expired_intents, spool_path
+
+logger = logging.getLogger(__name__)
+
+PUSH_MAX_RETRIES = 8
+PUSH_MAX_BACKOFF = 60 * 60
+# Un document encore en attente après ce délai a perdu son message : il est relancé
+REQUEUE_AFTER = timedelta(minutes=15)
+# Bail d'une chaîne d'envoi vivante (message en file + exécution) ; prolongé
+# du délai d'attente à chaque nouvel essai. Tant qu'il court, pas de relance.
+PUSH_LEASE = 15 * 60
+
+
+def push_lease_key(document_id):
+    return f'spool:{document_id}'
+
+
+def enqueue_push(document_id, path):
+    """Planifie l'envoi si aucune chaîne n'est déjà en cours ; retourne ``True`` si planifié."""
+    if not cache.add(push_lease_key(document_id), 1, PUSH_LEASE):
+        return False
+    push_spooled_document.delay(document_id, path)
+    return True
+
+
+def _saved_marker(path):
+    # Nom retenu par le stockage, consigné à côté du fichier en attente
+    return f'{spool_path(path)}.saved'
+
+
+def _read_saved(path):
+    try:
+        with open(_saved_marker(path)) as f:
+            return f.read() or None
+    except FileNotFoundError:
+        return None
+
+
+def _remove_spooled(path):
+    for target in (spool_path(path), _saved_marker(path)):
+        try:
+            os.remove(target)
+        except FileNotFoundError:
+            pass
+
+
+@shared_task(bind=True, max_retries=PUSH_MAX_RETRIES, soft_time_limit=600, time_limit=660)
+def push_spooled_document(self, document_id, path):
+    """Envoie un document du dossier d'attente vers le stockage puis le passe en ``stored``."""
+    lease = push_lease_key(document_id)
+    storage = Document._meta.get_field('file').storage
+    saved = _read_saved(path)
+    pending = Document.objects.filter(pk=document_id, upload_state=Document.UploadState.PENDING_UPLOAD)
+    if not pending.exists():
+        # Document supprimé entre-temps, ou déjà envoyé (message livré deux fois)
+        state = Document.objects.filter(pk=document_id).values_list('upload_state', flat=True).first()
+        if state is None and saved:
+            storage.delete(saved)  # référence prise par un essai interrompu
+        if state in (None, Document.UploadState.STORED):
+            _remove_spooled(path)
+        cache.delete(lease)
+        return None
+
+    if saved is not None:
+        # Essai précédent interrompu après l'envoi (acks_late) : pas de second save(),
+        # qui prendrait une seconde référence StoredBlob jamais rendue
+        name = saved
+    else:
+        source = spool_path(path)
+        if not os.path.exists(source):
+            logger.error('Document #%s : fichier en attente introuvable (%s)', document_id, source)
+            pending.update(upload_state=Document.UploadState.FAILED)
+            cache.delete(lease)
+            return None
+
+        try:
+            with open(source, 'rb') as f:
+                name = storage.save(path, File(f, name=path))
+        except Exception as exc:  # stockage lent ou indisponible (inclut SoftTimeLimitExceeded)
+            if self.request.retries >= self.max_retries:
+                logger.error('Document #%s : envoi abandonné (%s)', document_id, exc)
+                pending.update(upload_state=Document.UploadState.FAILED)
+                cache.delete(lease)
+                return None
+            countdown = min(30 * 2 ** self.request.retries, PUSH_MAX_BACKOFF)
+            logger.warning('Document #%s : envoi échoué, nouvel essai dans %ss (%s)', document_id, countdown, exc)
+            # La chaîne reste vivante pendant l'attente : requeue_spooled_documents ne la double pas
+            cache.set(lease, 1, countdown + PUSH_LEASE)
+            raise self.retry(exc=exc, countdown=countdown)
+        # Consigné avant la mise à jour de la ligne : c'est ce nom qu'un nouvel essai reprendra
+        with open(_saved_marker(path), 'w') as f:
+            f.write(name)
+
+    if not pending.update(file=name, upload_state=Document.UploadState.STORED):
+        storage.delete(name)  # document supprimé pendant l'envoi
+    _remove_spooled(path)
+    cache.delete(lease)
+    return name
+
+
+@shared_task(soft_time_limit=60, time_limit=90)
+def requeue_spooled_documents():
+    """
+    Relance les documents restés en attente (worker arrêté, message perdu).
+    Ceux dont la chaîne d'envoi est encore vivante (bail en cours) sont ignorés.
+    """
+    stale = Document.objects.filter(
+        upload_state=Document.UploadState.PENDING_UPLOAD,
+        uploaded_at__lt=timezone.now() - REQUEUE_AFTER,
+    ).values_list('pk', 'file')
+    return sum(enqueue_push(pk, path) for pk, path in stale.iterator())
+
+
+@shared_task(soft_time_limit=600, time_limit=660)
+def purge_upload_intents():
+    """Supprime les fichiers des uploads directs jamais confirmés (planifiée par Celery beat)."""
+    return purge_expired_intents()
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=60, soft_time_limit=1800, time_limit=1900)
+def export_candidates(self, job_id, query, file_format):
+    try:
+        return run_export_job(job_id, query, file_format)
+    except Exception as exc:  # inclut SoftTimeLimitExceeded
+        if self.request.retries >= self.max_retries:
+            logger.error('Export candidatures %s abandonné : %s', job_id, exc)
+            fail_export_job(job_id, exc)
+            raise
+        raise self.retry(exc=exc)
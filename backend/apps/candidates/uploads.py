@@ -0,0 +1,201 @@
+"""
+Upload direct des documents candidats (client -> Supabase).
+
+1. ``create_intent`` : choisit le chemin du fichier, demande une URL d'upload
+   signée et enregistre l'intention (``UploadIntent`` : candidat, chemin, type
+   déclaré, expiration).
+2. Le client envoie le fichier directement à Supabase.
+3. ``confirm_intent`` : vérifie taille et type réel (premiers octets) puis
+   crée la ligne ``Document``. Le worker web ne voit jamais le fichier.
+   L'intention n'est supprimée qu'une fois l'issue connue (document créé ou
+   fichier refusé) : une confirmation trop tôt peut être renouvelée.
+4. ``purge_expired_intents`` (tâche périodique) supprime les objets des
+   intentions jamais confirmées.
+
+Mode file d'attente (``DOCUMENT_UPLOAD_SPOOL``) : ``spool_document`` écrit le
+fichier reçu sur disque et crée le ``Document`` en ``pending_upload`` ; la
+tâche ``push_spooled_document`` l'envoie ensuite au stockage.
+"""
+import mimetypes
+import os
+import posixpath
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.platform_settings.models import PlatformSettings
+from config.supabase_storage import candidate_document_path
+from .models import Document, UploadIntent
+
+INTENT_TTL = 2 * 60 * 60  # durée de validité d'une URL d'upload signée Supabase
+# Un upload commencé juste avant l'expiration peut encore se terminer
+INTENT_PURGE_GRACE = timedelta(hours=1)
+CONFIRM_LOCK_TTL = 120  # au-delà des délais des appels de stockage de la confirmation
+
+# Signatures des formats acceptés (extension -> préfixes possibles)
+MAGIC_BYTES = {
+    'pdf': (b'%PDF',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'jpg': (b'\xff\xd8\xff',),
+    'jpeg': (b'\xff\xd8\xff',),
+}
+
+
+class UploadError(Exception):
+    pass
+
+
+def _lock_key(upload_id):
+    return f'document_upload:{upload_id}:lock'
+
+
+def _storage():
+    return Document._meta.get_field('file').storage
+
+
+def upload_limits():
+    """(taille max en octets, extensions autorisées) depuis les paramètres plateforme."""
+    platform_settings = PlatformSettings.get_cached()
+    max_size = platform_settings.max_file_size_mb * 1024 * 1024
+    allowed = {ext.strip().lower() for ext in platform_settings.allowed_file_types.split(',') if ext.strip()}
+    return max_size, allowed
+
+
+def extension_of(filename):
+    return posixpath.splitext(filename)[1].lstrip('.').lower()
+
+
+def create_intent(candidate, name, doc_type, filename, size):
+    max_size, allowed = upload_limits()
+    ext = extension_of(filename)
+    if ext not in allowed:
+        raise UploadError(f"Type de fichier non autorisé ({', '.join(sorted(allowed))}).")
+    if size > max_size:
+        raise UploadError(f'Fichier trop volumineux (max {max_size // (1024 * 1024)} Mo).')
+
+    field = Document._meta.get_field('file')
+    path = field.generate_filename(None, candidate_document_path(candidate.id, filename))
+    signed = _storage().create_upload_url(path)
+
+    intent = UploadIntent.objects.create(
+        candidate=candidate,
+        path=path,
+        name=name,
+        doc_type=doc_type,
+        size_bytes=size,
+        expires_at=timezone.now() + timedelta(seconds=INTENT_TTL),
+    )
+    return {
+        'upload_id': intent.pk.hex,
+        'upload_url': signed['signed_url'],
+        'token': signed['token'],
+        'path': path,
+        'content_type': mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        'expires_in': INTENT_TTL,
+    }
+
+
+def confirm_intent(candidate, upload_id):
+    """Vérifie le fichier envoyé et crée le ``Document``. Lève ``UploadError`` sinon."""
+    try:
+        upload_id = uuid.UUID(upload_id)
+    except ValueError:
+        raise UploadError('Upload inconnu ou expiré.')
+    # Une seule confirmation à la fois par intention (deux requêtes simultanées)
+    lock = _lock_key(upload_id.hex)
+    if not cache.add(lock, 1, CONFIRM_LOCK_TTL):
+        raise UploadError('Confirmation déjà en cours.')
+    try:
+        return _confirm(candidate, upload_id)
+    finally:
+        cache.delete(lock)
+
+
+def _confirm(candidate, upload_id):
+    intent = UploadIntent.objects.filter(
+        pk=upload_id, candidate=candidate, expires_at__gt=timezone.now(),
+    ).first()
+    if intent is None:
+        raise UploadError('Upload inconnu ou expiré.')
+
+    storage = _storage()
+    path = intent.path
+    meta = storage.refresh_metadata(path)
+    if meta is None:
+        # Intention conservée : le client confirmera une fois l'envoi terminé
+        raise UploadError("Fichier introuvable : l'envoi n'est pas terminé.")
+
+    max_size, _ = upload_limits()
+    ext = extension_of(path)
+    size = meta['size']
+    head = storage.read_head(path) if size else b''
+    if size != intent.size_bytes or size > max_size or not head.startswith(MAGIC_BYTES.get(ext, (b'',))):
+        intent.delete()
+        storage.delete(path)
+        raise UploadError('Fichier refusé : taille ou type différent de celui annoncé.')
+
+    with transaction.atomic():
+        # Suppression conditionnelle : garde-fou si le verrou a expiré entre-temps
+        deleted, _ = UploadIntent.objects.filter(pk=intent.pk).delete()
+        if not deleted:
+            raise UploadError('Upload déjà confirmé.')
+        document = Document(
+            candidate=candidate,
+            name=intent.name,
+            doc_type=intent.doc_type,
+            size_bytes=size,
+        )
+        document.file.name = path
+        document.save()
+    return document
+
+
+def purge_expired_intents(batch_size=500):
+    """Supprime les objets (et les lignes) des intentions expirées jamais confirmées."""
+    storage = _storage()
+    expired = UploadIntent.objects.filter(expires_at__lt=timezone.now() - INTENT_PURGE_GRACE)
+    total = 0
+    while True:
+        batch = list(expired.order_by().values_list('pk', 'path')[:batch_size])
+        if not batch:
+            return total
+        for _, path in batch:
+            storage.delete(path)  # objet absent (jamais envoyé) : sans effet
+        UploadIntent.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+        total += len(batch)
+
+
+# ── File d'attente locale ─────────────────────
+def spool_path(name):
+    return os.path.join(settings.DOCUMENT_SPOOL_DIR, name)
+
+
+def spool_document(file, candidate, **fields):
+    """Écrit ``file`` dans le dossier d'attente et planifie son envoi vers le stockage."""
+    from .tasks import enqueue_push
+
+    field = Document._meta.get_field('file')
+    path = field.generate_filename(None, candidate_document_path(candidate.id, file.name))
+    target = spool_path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Écriture atomique : la tâche ne voit jamais un fichier partiel
+    partial = f'{target}.part'
+    with open(partial, 'wb') as out:
+        for chunk in file.chunks():
+            out.write(chunk)
+    os.replace(partial, target)
+
+    document = Document(
+        candidate=candidate,
+        size_bytes=file.size,
+        upload_state=Document.UploadState.PENDING_UPLOAD,
+        **fields,
+    )
+    document.file.name = path
+    document.save()
+    transaction.on_commit(lambda: enqueue_push(document.pk, path))
+    return document
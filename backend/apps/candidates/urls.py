@@ -15,8 +15,13 @@ urlpatterns = [
     path('profile/', views.MyProfileView.as_view(), name='my-profile'),
     path('profile/tutor/', views.MyTutorInfoView.as_view(), name='my-tutor'),
     path('profile/documents/', views.MyDocumentsView.as_view(), name='my-documents'),
+    path('profile/documents/upload-url/', views.MyDocumentUploadURLView.as_view(), name='my-document-upload-url'),
+    path('profile/documents/confirm/', views.MyDocumentUploadConfirmView.as_view(), name='my-document-confirm'),
     path('profile/documents/<int:pk>/', views.MyDocumentDeleteView.as_view(), name='my-document-delete'),
 
+    # Candidat / admin — ouverture d'un document (URL signée à la demande)
+    path('documents/<int:pk>/open/', views.DocumentOpenView.as_view(), name='document-open'),
+
     # Admin routes (router)
     path('', include(router.urls)),
 ]
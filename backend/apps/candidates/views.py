@@ -1,9 +1,17 @@
 """Views pour l'app candidates."""
+import posixpath
+
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import get_valid_filename
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes as perm_dec
 from rest_framework.response import Response
 
+from apps.archives import stream_zip
+from apps.exports import export_response, requested_format
 from apps.permissions import IsAdmin, IsOwner, IsOwnerOrAdmin, IsStudent
+from . import candidates_export
 from .models import CandidateProfile, TutorInfo, Document
 from .serializers import (
     CandidateProfileSerializer,
@@ -11,7 +19,10 @@ from .serializers import (
     AdminCandidateSerializer,
     TutorInfoSerializer,
     DocumentSerializer,
+    DocumentUploadIntentSerializer,
+    DocumentUploadConfirmSerializer,
 )
+from .uploads import UploadError, confirm_intent, create_intent
 
 
 # ──────────────────────────────────────────────
@@ -26,6 +37,16 @@ def public_candidate_count(request):
     return Response({'total': total, 'approved': approved})
 
 
+def prime_document_urls(documents):
+    """Signe en un seul appel Supabase les fichiers d'une page de documents."""
+    names = [
+        doc.file.name for doc in documents
+        if doc.file and doc.upload_state == Document.UploadState.STORED
+    ]
+    if names:
+        Document._meta.get_field('file').storage.prime_signed_urls(names)
+
+
 # ──────────────────────────────────────────────
 # CANDIDAT — SON PROPRE PROFIL
 # ──────────────────────────────────────────────
@@ -68,11 +89,48 @@ class MyDocumentsView(generics.ListCreateAPIView):
         profile = CandidateProfile.objects.get(user=self.request.user)
         return Document.objects.filter(candidate=profile)
 
+    def list(self, request, *args, **kwargs):
+        documents = list(self.get_queryset())
+        prime_document_urls(documents)
+        return Response(self.get_serializer(documents, many=True).data)
+
     def perform_create(self, serializer):
         profile = CandidateProfile.objects.get(user=self.request.user)
         serializer.save(candidate=profile)
 
 
+class MyDocumentUploadURLView(generics.GenericAPIView):
+    """Étape 1 de l'upload direct : URL signée pour envoyer le fichier à Supabase."""
+    serializer_class = DocumentUploadIntentSerializer
+    permission_classes = [permissions.IsAuthenticated, IsStudent]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        profile, _ = CandidateProfile.objects.get_or_create(user=request.user)
+        try:
+            intent = create_intent(profile, **serializer.validated_data)
+        except UploadError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(intent, status=status.HTTP_201_CREATED)
+
+
+class MyDocumentUploadConfirmView(generics.GenericAPIView):
+    """Étape 2 : le fichier est sur Supabase, on le vérifie et on crée le document."""
+    serializer_class = DocumentUploadConfirmSerializer
+    permission_classes = [permissions.IsAuthenticated, IsStudent]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        profile, _ = CandidateProfile.objects.get_or_create(user=request.user)
+        try:
+            document = confirm_intent(profile, serializer.validated_data['upload_id'])
+        except UploadError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(DocumentSerializer(document).data, status=status.HTTP_201_CREATED)
+
+
 class MyDocumentDeleteView(generics.DestroyAPIView):
     """Le candidat supprime un de ses documents."""
     serializer_class = DocumentSerializer
@@ -83,6 +141,29 @@ class MyDocumentDeleteView(generics.DestroyAPIView):
         return Document.objects.filter(candidate=profile)
 
 
+class DocumentOpenView(generics.RetrieveAPIView):
+    """
+    Ouvre un document : redirection vers une URL signée, générée seulement
+    à ce moment-là. Le candidat n'accède qu'à ses documents.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.role in ('admin', 'moderator'):
+            return Document.objects.all()
+        return Document.objects.filter(candidate__user=user)
+
+    def retrieve(self, request, *args, **kwargs):
+        document = self.get_object()
+        if document.upload_state != Document.UploadState.STORED:
+            return Response({'detail': "Fichier en cours d'envoi."}, status=status.HTTP_409_CONFLICT)
+        url = document.file.storage.signed_url(document.file.name) if document.file else ''
+        if not url:
+            return Response({'detail': 'Fichier indisponible.'}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponseRedirect(url)
+
+
 # ──────────────────────────────────────────────
 # ADMIN — GESTION DES CANDIDATURES
 # ──────────────────────────────────────────────
@@ -95,6 +176,12 @@ class CandidateViewSet(viewsets.ModelViewSet):
     search_fields = ['user__email', 'user__first_name', 'user__last_name', 'school']
     ordering_fields = ['registered_at', 'profile_completion', 'status']
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            prime_document_urls([doc for candidate in page for doc in candidate.documents.all()])
+        return page
+
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Valider une candidature."""
@@ -113,6 +200,64 @@ class CandidateViewSet(viewsets.ModelViewSet):
         candidate.save(update_fields=['status', 'admin_comment'])
         return Response(AdminCandidateSerializer(candidate).data)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Export CSV (par défaut, envoyé au fil de la lecture) ou XLSX des
+        candidatures filtrées : ``?file_format=xlsx``. Un XLSX de plus de
+        ``ASYNC_THRESHOLD`` lignes est généré par Celery : 202 + ``job_id``.
+        """
+        file_format = requested_format(request)
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        if file_format == 'xlsx' and queryset.count() > candidates_export.ASYNC_THRESHOLD:
+            job_id = candidates_export.start_job(request.query_params.urlencode(), file_format)
+            return Response({'job_id': job_id, 'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+        return export_response(
+            queryset, candidates_export.CANDIDATE_EXPORT_COLUMNS, file_format, 'candidatures', 'Candidatures',
+        )
+
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<job_id>[0-9a-f]{32})')
+    def export_status(self, request, job_id=None):
+        """État d'un export en tâche de fond (URL signée une fois prêt)."""
+        state = candidates_export.job_status(job_id)
+        if state is None:
+            return Response({'detail': 'Export inconnu ou expiré.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(state)
+
+    @action(detail=False, methods=['get'], url_path='documents-archive')
+    def documents_archive(self, request):
+        """
+        Archive ZIP des documents des candidatures filtrées (mêmes filtres que
+        la liste), envoyée au fil de l'eau : un dossier par candidat.
+        """
+        candidates = self.filter_queryset(self.get_queryset()).order_by().values('pk')
+        rows = (
+            Document.objects
+            .filter(candidate__in=candidates, upload_state=Document.UploadState.STORED)
+            .exclude(file='')
+            .order_by('candidate_id', 'pk')
+            .values_list(
+                'pk', 'file', 'name', 'doc_type',
+                'candidate_id', 'candidate__user__last_name', 'candidate__user__first_name',
+            )
+        )
+        storage = Document._meta.get_field('file').storage
+
+        def entries():
+            for pk, path, name, doc_type, candidate_id, last_name, first_name in rows.iterator(chunk_size=500):
+                folder = get_valid_filename(f'{last_name}_{first_name}_{candidate_id}')
+                ext = posixpath.splitext(path)[1]
+                yield f'{folder}/{get_valid_filename(f"{doc_type}_{pk}_{name}")}{ext}', path
+
+        def fetch(path):
+            with storage.open(path, 'rb') as f:
+                return f.read()
+
+        response = StreamingHttpResponse(stream_zip(entries(), fetch), content_type='application/zip')
+        filename = f"documents_candidats_{timezone.now():%Y%m%d_%H%M}.zip"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Statistiques des candidatures."""
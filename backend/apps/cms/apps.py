@@ -5,3 +5,6 @@ class CmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.cms'
     verbose_name = 'Gestion de Contenu'
+
+    def ready(self):
+        import apps.cms.signals  # noqa: F401
@@ -0,0 +1,140 @@
+"""
+Document agrégé de la page d'accueil publique.
+
+Chaque fragment (actualités, partenaires, témoignages, FAQ, édition active
+et phases, paramètres publics, compteur d'inscrits) est mis en cache sous la
+version de son tag. L'ETag du document est dérivé de ces versions : il se
+calcule en un seul ``get_many``, sans BDD ni sérialisation.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+
+from apps.candidates.models import CandidateProfile
+from apps.exams.models import Edition, Phase
+from apps.exams.serializers import EditionSerializer, PhaseSerializer
+from apps.platform_settings.models import PlatformSettings
+from apps.platform_settings.serializers import PlatformSettingsPublicSerializer
+from apps.response_cache import get_tag_versions, tag_for_model, tag_key
+from .models import NewsArticle, FAQItem, Partner, Testimonial
+from .serializers import (
+    NewsArticleListSerializer, FAQItemSerializer, PartnerSerializer, TestimonialSerializer,
+)
+
+NEWS_LIMIT = 6
+FRAGMENT_TTL = 60 * 60
+COUNTS_TTL = 5 * 60  # le compteur d'inscrits n'a pas de tag : simple expiration
+
+COUNTS_KEY = 'public_home:candidate_counts'
+_FRAGMENT_PREFIX = 'public_home:fragment:'
+_DOCUMENT_PREFIX = 'public_home:document:'
+
+
+def _news(context):
+    qs = NewsArticle.objects.filter(status='published')[:NEWS_LIMIT]
+    return NewsArticleListSerializer(qs, many=True, context=context).data
+
+
+def _partners(context):
+    qs = Partner.objects.filter(is_active=True)
+    return PartnerSerializer(qs, many=True, context=context).data
+
+
+def _testimonials(context):
+    qs = Testimonial.objects.filter(is_active=True)
+    return TestimonialSerializer(qs, many=True, context=context).data
+
+
+def _faq(context):
+    qs = FAQItem.objects.filter(is_active=True)
+    return FAQItemSerializer(qs, many=True, context=context).data
+
+
+def _edition(context):
+    edition = Edition.objects.filter(is_active=True).first()
+    if edition is None:
+        return {'edition': None, 'phases': []}
+    data = EditionSerializer(edition, context=context).data
+    phases = Phase.objects.filter(edition=edition).select_related('edition').order_by('phase_number')
+    return {'edition': data, 'phases': PhaseSerializer(phases, many=True, context=context).data}
+
+
+# nom du fragment -> (modèles dont il dépend, constructeur)
+FRAGMENTS = {
+    'news': ((NewsArticle,), _news),
+    'partners': ((Partner,), _partners),
+    'testimonials': ((Testimonial,), _testimonials),
+    'faq': ((FAQItem,), _faq),
+    'edition': ((Edition, Phase), _edition),
+}
+TAGS = sorted({tag_for_model(model) for models, _ in FRAGMENTS.values() for model in models})
+
+
+def _candidate_counts():
+    counts = CandidateProfile.objects.aggregate(
+        total=Count('id'),
+        approved=Count('id', filter=Q(status='approved')),
+    )
+    cache.set(COUNTS_KEY, counts, COUNTS_TTL)
+    return counts
+
+
+def current_state():
+    """
+    État courant des validateurs : un seul ``get_many``.
+    Retourne ``(etag, versions, counts)``.
+    """
+    keys = [tag_key(tag) for tag in TAGS] + [PlatformSettings.VERSION_KEY, COUNTS_KEY]
+    values = cache.get_many(keys)
+
+    versions = {tag: values.get(tag_key(tag)) for tag in TAGS}
+    missing = [tag for tag, version in versions.items() if version is None]
+    if missing:
+        versions.update(get_tag_versions(missing))
+
+    versions['settings'] = values.get(PlatformSettings.VERSION_KEY)
+    counts = values.get(COUNTS_KEY)
+    if counts is None:
+        counts = _candidate_counts()
+
+    raw = json.dumps([versions, counts], sort_keys=True)
+    etag = f'"home-{hashlib.md5(raw.encode()).hexdigest()}"'
+    return etag, versions, counts
+
+
+def _fragment(name, versions, context):
+    models, build = FRAGMENTS[name]
+    signature = '.'.join(versions[tag_for_model(model)] for model in models)
+    key = f'{_FRAGMENT_PREFIX}{name}:{signature}'
+    data = cache.get(key)
+    if data is None:
+        data = build(context)
+        cache.set(key, data, FRAGMENT_TTL)
+    return data
+
+
+def render_document(etag, versions, counts, context):
+    """Document JSON (octets) correspondant à ``etag`` ; assemblé depuis les fragments si absent."""
+    key = f'{_DOCUMENT_PREFIX}{etag}'
+    content = cache.get(key)
+    if content is not None:
+        return content
+
+    edition = _fragment('edition', versions, context)
+    platform_settings = PlatformSettings.get_cached(version=versions['settings'])
+    document = {
+        'settings': PlatformSettingsPublicSerializer(platform_settings).data,
+        'edition': edition['edition'],
+        'phases': edition['phases'],
+        'news': _fragment('news', versions, context),
+        'partners': _fragment('partners', versions, context),
+        'testimonials': _fragment('testimonials', versions, context),
+        'faq': _fragment('faq', versions, context),
+        'candidates': counts,
+    }
+    content = json.dumps(document, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    cache.set(key, content, FRAGMENT_TTL)
+    return content
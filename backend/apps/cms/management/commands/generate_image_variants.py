@@ -0,0 +1,52 @@
+"""
+Génère (ou complète) les variantes WebP / JPEG de toutes les images
+publiques existantes, en parallèle dans un pool de processus, et enregistre
+leur manifeste sur chaque ligne (``<champ>_variants``).
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.cms.tasks import generate_for_instance
+from apps.images import IMAGE_FIELDS
+
+
+def _work(job):
+    # Chaque processus ouvre sa propre connexion BDD
+    try:
+        generate_for_instance(*job)
+        return job, None
+    except Exception as exc:  # on continue le lot, l'erreur est remontée au parent
+        return job, str(exc)
+
+
+class Command(BaseCommand):
+    help = "Génère les variantes d'images manquantes (idempotent)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Nombre de processus')
+
+    def handle(self, *args, **options):
+        jobs = []
+        for label, field_names in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            for field_name in field_names:
+                pks = model.objects.exclude(**{field_name: ''}).values_list('pk', flat=True)
+                jobs.extend((label, pk, field_name) for pk in pks)
+
+        self.stdout.write(f"{len(jobs)} image(s) à traiter avec {options['workers']} processus")
+        # Ne pas partager la connexion du parent avec les processus forkés
+        connections.close_all()
+
+        failures = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(_work, job) for job in jobs]
+            for future in as_completed(futures):
+                job, error = future.result()
+                if error:
+                    failures += 1
+                    self.stderr.write(f"  ✗ {job[0]} #{job[1]} ({job[2]}) : {error}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Terminé — {len(jobs) - failures} ok, {failures} échec(s)"))
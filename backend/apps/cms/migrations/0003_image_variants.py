@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-19 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0002_testimonial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='image_variants',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name="variantes de l'image"),
+        ),
+        migrations.AddField(
+            model_name='partner',
+            name='logo_variants',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='variantes du logo'),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='image_variants',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='variantes de la photo'),
+        ),
+    ]
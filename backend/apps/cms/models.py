@@ -37,6 +37,7 @@ class NewsArticle(models.Model):
     excerpt = models.CharField('extrait', max_length=500, blank=True)
     content = models.TextField('contenu')
     image = models.ImageField('image', upload_to='news/', blank=True)
+    image_variants = models.JSONField("variantes de l'image", null=True, blank=True, editable=False)
     status = models.CharField(
         'statut', max_length=20, choices=Status.choices, default=Status.DRAFT,
     )
@@ -106,6 +107,7 @@ class Partner(models.Model):
 
     name = models.CharField('nom', max_length=200)
     logo = models.ImageField('logo', upload_to='partners/')
+    logo_variants = models.JSONField('variantes du logo', null=True, blank=True, editable=False)
     website = models.URLField('site web', blank=True)
     tier = models.CharField(
         'niveau', max_length=10, choices=Tier.choices, default=Tier.BRONZE,
@@ -129,6 +131,7 @@ class Testimonial(models.Model):
     role = models.CharField('rôle/titre', max_length=300)
     quote = models.TextField('témoignage')
     image = models.ImageField('photo', upload_to='testimonials/', blank=True)
+    image_variants = models.JSONField('variantes de la photo', null=True, blank=True, editable=False)
     video_url = models.URLField('URL vidéo (YouTube/Vimeo)', blank=True, help_text='Lien vers une vidéo YouTube ou Vimeo (optionnel)')
     display_order = models.PositiveSmallIntegerField("ordre d'affichage", default=0)
     is_active = models.BooleanField('actif', default=True)
@@ -0,0 +1,8 @@
+"""URL patterns publics agrégés (vitrine)."""
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('home/', views.PublicHomeView.as_view(), name='public-home'),
+]
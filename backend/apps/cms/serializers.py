@@ -1,6 +1,7 @@
 """Serializers pour l'app cms (pages, articles, FAQ, médias, partenaires)."""
 from rest_framework import serializers
 
+from apps.images import SrcsetField
 from .models import Page, NewsArticle, FAQItem, Media, Partner, Testimonial
 
 
@@ -12,10 +13,12 @@ class PageSerializer(serializers.ModelSerializer):
 
 
 class NewsArticleSerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField(source='image')
+
     class Meta:
         model = NewsArticle
         fields = [
-            'id', 'title', 'excerpt', 'content', 'image',
+            'id', 'title', 'excerpt', 'content', 'image', 'image_srcset',
             'status', 'author', 'published_at', 'created_at',
         ]
         read_only_fields = ['id', 'created_at']
@@ -23,10 +26,11 @@ class NewsArticleSerializer(serializers.ModelSerializer):
 
 class NewsArticleListSerializer(serializers.ModelSerializer):
     """Version liste sans le contenu complet."""
+    image_srcset = SrcsetField(source='image')
 
     class Meta:
         model = NewsArticle
-        fields = ['id', 'title', 'excerpt', 'image', 'author', 'published_at', 'status']
+        fields = ['id', 'title', 'excerpt', 'image', 'image_srcset', 'author', 'published_at', 'status']
 
 
 class FAQItemSerializer(serializers.ModelSerializer):
@@ -49,13 +53,17 @@ class MediaSerializer(serializers.ModelSerializer):
 
 
 class PartnerSerializer(serializers.ModelSerializer):
+    logo_srcset = SrcsetField(source='logo')
+
     class Meta:
         model = Partner
-        fields = ['id', 'name', 'logo', 'website', 'tier', 'display_order', 'is_active']
+        fields = ['id', 'name', 'logo', 'logo_srcset', 'website', 'tier', 'display_order', 'is_active']
 
 
 class TestimonialSerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField(source='image')
+
     class Meta:
         model = Testimonial
-        fields = ['id', 'name', 'role', 'quote', 'image', 'video_url', 'display_order', 'is_active', 'created_at']
+        fields = ['id', 'name', 'role', 'quote', 'image', 'image_srcset', 'video_url', 'display_order', 'is_active', 'created_at']
         read_only_fields = ['id', 'created_at']
@@ -0,0 +1,11 @@
+"""Signals pour l'app cms — invalidation du cache des réponses publiques, variantes d'images."""
+from apps.images import register_image_fields
+from apps.response_cache import invalidate_on_change
+
+from .models import Page, NewsArticle, FAQItem, Partner, Testimonial
+
+invalidate_on_change(Page, NewsArticle, FAQItem, Partner, Testimonial)
+
+register_image_fields(NewsArticle, 'image')
+register_image_fields(Partner, 'logo')
+register_image_fields(Testimonial, 'image')
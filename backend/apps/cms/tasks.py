@@ -0,0 +1,31 @@
+"""Tâches Celery pour l'app cms (variantes d'images)."""
+import logging
+
+from celery import shared_task
+from django.apps import apps
+
+from apps.images import generate_variants, invalidate_responses, save_manifest
+
+logger = logging.getLogger(__name__)
+
+
+def generate_for_instance(model_label, pk, field_name):
+    """Génère les variantes du champ image d'une instance (idempotent)."""
+    instance = apps.get_model(model_label).objects.filter(pk=pk).first()
+    field_file = getattr(instance, field_name, None) if instance else None
+    if not field_file:
+        return None
+    manifest = generate_variants(field_file.storage, field_file.name)
+    if save_manifest(instance, field_name, manifest):
+        invalidate_responses(instance)
+    return manifest
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60, soft_time_limit=120, time_limit=150)
+def generate_image_variants(self, model_label, pk, field_name):
+    try:
+        return generate_for_instance(model_label, pk, field_name)
+    except OSError as exc:
+        # Fichier illisible ou stockage indisponible : on réessaie, le travail déjà fait est conservé
+        logger.warning('Variantes %s #%s (%s) : %s', model_label, pk, field_name, exc)
+        raise self.retry(exc=exc)
@@ -1,9 +1,15 @@
 """Views pour l'app cms (pages, articles, FAQ, médias, partenaires)."""
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
 from rest_framework import permissions, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from apps.conditional import ConditionalGetMixin
 from apps.permissions import IsAdmin, ReadOnly
+from apps.response_cache import CachedResponseMixin
+from . import home
 from .models import Page, NewsArticle, FAQItem, Media, Partner, Testimonial
 from .serializers import (
     PageSerializer, NewsArticleSerializer, NewsArticleListSerializer,
@@ -11,8 +17,9 @@ from .serializers import (
 )
 
 
-class PageViewSet(viewsets.ModelViewSet):
+class PageViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Page.objects.all()
+    last_modified_field = 'last_modified'
     serializer_class = PageSerializer
     lookup_field = 'slug'
 
@@ -27,7 +34,7 @@ class PageViewSet(viewsets.ModelViewSet):
         return Page.objects.filter(status='published')
 
 
-class NewsArticleViewSet(viewsets.ModelViewSet):
+class NewsArticleViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = NewsArticle.objects.all()
 
     def get_permissions(self):
@@ -46,7 +53,7 @@ class NewsArticleViewSet(viewsets.ModelViewSet):
         return NewsArticle.objects.filter(status='published')
 
 
-class FAQItemViewSet(viewsets.ModelViewSet):
+class FAQItemViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = FAQItem.objects.all()
     serializer_class = FAQItemSerializer
 
@@ -69,7 +76,7 @@ class MediaViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
 
 
-class PartnerViewSet(viewsets.ModelViewSet):
+class PartnerViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Partner.objects.all()
     serializer_class = PartnerSerializer
 
@@ -84,7 +91,7 @@ class PartnerViewSet(viewsets.ModelViewSet):
         return Partner.objects.filter(is_active=True)
 
 
-class TestimonialViewSet(viewsets.ModelViewSet):
+class TestimonialViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Testimonial.objects.all()
     serializer_class = TestimonialSerializer
 
@@ -97,3 +104,29 @@ class TestimonialViewSet(viewsets.ModelViewSet):
         if self.request.user.is_authenticated and self.request.user.role in ('admin', 'moderator'):
             return Testimonial.objects.all()
         return Testimonial.objects.filter(is_active=True)
+
+
+# ──────────────────────────────────────────────
+# PUBLIC — Page d'accueil agrégée
+# ──────────────────────────────────────────────
+class PublicHomeView(APIView):
+    """
+    Tout ce qu'affiche la page d'accueil en un seul document JSON.
+    Sans authentification ni throttling : l'ETag est calculé depuis le cache
+    et un visiteur qui revient reçoit un 304.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = []
+
+    def get(self, request):
+        etag, versions, counts = home.current_state()
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        content = home.render_document(etag, versions, counts, {'request': request})
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
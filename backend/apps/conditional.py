@@ -0,0 +1,123 @@
+"""
+Requêtes conditionnelles (ETag / Last-Modified) pour les vues DRF.
+
+Les validateurs sont calculés avant toute sérialisation, du moins coûteux au
+plus coûteux :
+
+- versions de tags du cache (``apps.response_cache``) : aucune requête BDD ;
+- ``last_modified_field`` : horodatage de la ligne pour un détail, ou
+  ``Max`` + ``Count`` du queryset filtré pour une liste (une requête) ;
+  complété par les ``conditional_tags`` déclarés (relations sans ``auto_now``).
+
+Une liste n'a pas de ``Last-Modified`` : supprimer une ligne, ou la faire
+sortir du filtre, ne change pas le ``Max``. Seul l'ETag (qui inclut le
+nombre de lignes) la valide.
+
+``If-None-Match`` / ``If-Modified-Since`` satisfaits : 304 sans corps.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from apps.response_cache import get_tag_versions, tag_for_model
+
+
+def make_etag(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+class ConditionalGetMixin:
+    """
+    À placer avant la vue générique : enveloppe ``list`` et ``retrieve``.
+
+    - ``last_modified_field`` : champ horodaté (``auto_now``) du modèle.
+    - ``conditional_tags`` : tags utilisés à défaut ; par défaut le tag du modèle
+      (à invalider via ``apps.response_cache.invalidate_on_change``). Avec
+      ``last_modified_field``, ceux déclarés s'ajoutent à l'horodatage.
+    """
+
+    last_modified_field = None
+    conditional_tags = None
+
+    def get_conditional_tags(self):
+        if self.conditional_tags is not None:
+            return self.conditional_tags
+        return (tag_for_model(self.get_queryset().model),)
+
+    def get_conditional_extra(self):
+        """Composante supplémentaire de l'ETag (données hors tags), ou ``None``."""
+        return None
+
+    def get_conditional_scope(self):
+        """Le contenu dépend du public (brouillons visibles des administrateurs)."""
+        user = self.request.user
+        if not user.is_authenticated:
+            return 'anonymous'
+        return 'staff' if user.role in ('admin', 'moderator') else 'user'
+
+    # ── Validateurs ───────────────────────────────────────────
+    def _tag_validators(self):
+        versions = get_tag_versions(self.get_conditional_tags())
+        signature = ','.join(f'{tag}={versions[tag]}' for tag in sorted(versions))
+        return signature, None
+
+    def _with_tags(self, signature, last_modified):
+        if signature is None or self.conditional_tags is None:
+            return signature, last_modified
+        tags, _ = self._tag_validators()
+        # Last-Modified ignore les relations : seul l'ETag fait foi
+        return f'{signature}|{tags}', None
+
+    def _list_validators(self):
+        if not self.last_modified_field:
+            return self._tag_validators()
+        stats = self.filter_queryset(self.get_queryset()).aggregate(
+            latest=Max(self.last_modified_field), total=Count('pk'),
+        )
+        latest = stats['latest']
+        return self._with_tags(f"{latest and latest.timestamp()}:{stats['total']}", None)
+
+    def _detail_validators(self):
+        if not self.last_modified_field:
+            return self._tag_validators()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg not in self.kwargs:
+            return None, None
+        latest = (
+            self.get_queryset()
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values_list(self.last_modified_field, flat=True)
+            .first()
+        )
+        if latest is None:
+            return None, None  # 404 géré par la vue
+        return self._with_tags(str(latest.timestamp()), int(latest.timestamp()))
+
+    def _conditional(self, validators, handler, request, *args, **kwargs):
+        signature, last_modified = validators()
+        if signature is None:
+            return handler(request, *args, **kwargs)
+
+        etag = make_etag(
+            request.get_full_path(), self.get_conditional_scope(), signature, self.get_conditional_extra(),
+        )
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    # ── Actions ───────────────────────────────────────────────
+    def list(self, request, *args, **kwargs):
+        return self._conditional(self._list_validators, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(self._detail_validators, super().retrieve, request, *args, **kwargs)
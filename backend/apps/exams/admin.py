@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Edition, Phase, QuestionCategory, Question,
-    QuestionOption, Exam, ExamQuestion, ExamSession, ExamAnswer,
+    QuestionOption, Exam, ExamQuestion, ExamSession, ExamAnswer, Certificate,
 )
 
 
@@ -65,6 +65,14 @@ class ExamSessionAdmin(admin.ModelAdmin):
     readonly_fields = ('started_at', 'completed_at')
 
 
+@admin.register(Certificate)
+class CertificateAdmin(admin.ModelAdmin):
+    list_display = ('reference', 'session', 'kind', 'status', 'generated_at')
+    list_filter = ('kind', 'status', 'session__exam__phase')
+    search_fields = ('reference', 'session__candidate__user__email')
+    readonly_fields = ('generated_at', 'created_at')
+
+
 @admin.register(ExamAnswer)
 class ExamAnswerAdmin(admin.ModelAdmin):
     list_display = ('session', 'question', 'is_correct', 'is_flagged')
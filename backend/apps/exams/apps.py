@@ -5,3 +5,6 @@ class ExamsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.exams'
     verbose_name = 'Examens & QCM'
+
+    def ready(self):
+        import apps.exams.signals  # noqa: F401
@@ -0,0 +1,600 @@
+"""
+Livrets d'examen imprimables pour les centres sans connexion.
+
+Pour un ``Exam`` et N variantes (A, B, ...), trois documents par variante :
+
+- ``booklet`` : le livret, questions et options mélangées pour la variante ;
+- ``key`` : le corrigé de la variante ;
+- ``sheet`` : la feuille de réponses lisible par machine (repères d'angle,
+  grille de bulles, code variante et code candidat en bulles et en
+  code-barres). Pour une liste de candidats, des feuilles pré-remplies (une
+  par candidat, variantes attribuées à tour de rôle) sont rendues par lots.
+
+Le mélange est déterministe (graine = examen + variante) : régénérer une
+variante redonne le même ordre. La mise en page de chaque question (lignes
+coupées et comptées) est un fragment gardé dans le cache sous
+l'empreinte de son contenu : après une petite modification, seules les
+questions modifiées sont remesurées, et un document dont les entrées n'ont
+pas changé n'est pas rendu de nouveau.
+
+Les documents sont indépendants : la commande ``generate_booklets`` les rend
+dans un pool de processus, la tâche ``generate_exam_booklets`` les répartit
+entre les workers Celery.
+"""
+import hashlib
+import io
+import json
+import random
+import string
+import uuid
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.utils.text import slugify
+from reportlab.graphics.barcode import code128
+from reportlab.lib.colors import HexColor, black
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+
+from apps import pdf_fonts
+from apps.candidates.models import CandidateProfile
+from apps.platform_settings.models import PlatformSettings
+from config.supabase_storage import CandidateDocumentStorage
+from .models import Exam, ExamQuestion
+
+MAX_VARIANTS = 8
+SHEET_BATCH_SIZE = 100  # feuilles pré-remplies par fichier
+CODE_DIGITS = 6
+BOOKLETS_PREFIX = 'booklets/'
+FRAGMENT_TTL = 30 * 24 * 60 * 60
+JOB_TTL = 24 * 60 * 60
+EXAM_LOCK_TTL = 60 * 60  # filet si un worker disparaît en cours de génération
+FAILED_DOCUMENT = ''  # issue d'un document en échec
+# À incrémenter quand la mise en page change : invalide fragments et empreintes
+LAYOUT_VERSION = 2
+
+LETTERS = string.ascii_uppercase
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 50
+TEXT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+OPTION_INDENT = 22
+FONT, BOLD = pdf_fonts.REGULAR, pdf_fonts.BOLD
+FONT_SIZE = 11
+LEADING = 14
+QUESTION_GAP = 12
+BODY_TOP = PAGE_HEIGHT - MARGIN - 40  # sous l'en-tête
+BODY_BOTTOM = MARGIN + 10
+GREY = HexColor('#777777')
+
+KIND_TITLES = {
+    'booklet': "Livret d'examen",
+    'key': 'Corrigé',
+    'sheet': 'Feuille de réponses',
+}
+FILE_NAMES = {
+    'booklet': 'livret',
+    'key': 'corrige',
+    'sheet': 'feuille',
+}
+
+
+def variant_code(index):
+    return LETTERS[index]
+
+
+# ── Contenu ───────────────────────────────────
+def exam_content(exam_id):
+    """Examen et questions (ordre de l'examen) en données simples, transmissibles aux workers."""
+    exam = Exam.objects.select_related('phase__edition').get(pk=exam_id)
+    links = (
+        ExamQuestion.objects.filter(exam_id=exam_id)
+        .select_related('question')
+        .prefetch_related('question__options')
+        .order_by('order', 'pk')
+    )
+    questions = [
+        {
+            'id': link.question_id,
+            'text': link.question.text,
+            'points': link.question.points,
+            'options': [[option.text, option.is_correct] for option in link.question.options.all()],
+        }
+        for link in links
+    ]
+    return {
+        'exam_id': exam.pk,
+        'title': exam.title,
+        'phase': exam.phase.title,
+        'year': exam.phase.edition.year,
+        'duration': exam.duration_minutes,
+        'randomize': exam.randomize_questions,
+        'site_name': PlatformSettings.get_cached().site_name,
+        'questions': questions,
+    }
+
+
+def candidate_entries(region=None):
+    """``[(code, nom)]`` des candidats validés (d'une région), par ordre alphabétique."""
+    qs = CandidateProfile.objects.filter(status=CandidateProfile.Status.APPROVED)
+    if region:
+        qs = qs.filter(region=region)
+    rows = qs.order_by('user__last_name', 'user__first_name', 'pk').values_list(
+        'pk', 'user__last_name', 'user__first_name',
+    )
+    return [(f'{pk:0{CODE_DIGITS}d}', f'{last_name.upper()} {first_name}') for pk, last_name, first_name in rows]
+
+
+def variant_plan(content, variant):
+    """Ordre d'une variante : ``[(index de la question, [index des options])]``."""
+    rng = random.Random(f"{content['exam_id']}:{variant}")
+    order = list(range(len(content['questions'])))
+    if content['randomize']:
+        rng.shuffle(order)
+    plan = []
+    for index in order:
+        options = list(range(len(content['questions'][index]['options'])))
+        rng.shuffle(options)
+        plan.append((index, options))
+    return plan
+
+
+# ── Fragments de mise en page ─────────────────
+def _fragment_key(question):
+    raw = json.dumps([LAYOUT_VERSION, question['text'], [text for text, _ in question['options']]])
+    return f'booklet_fragment:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+
+def _measure(question):
+    pdf_fonts.register_fonts()
+    stem = simpleSplit(question['text'], FONT, FONT_SIZE, TEXT_WIDTH)
+    options = [
+        simpleSplit(text, FONT, FONT_SIZE, TEXT_WIDTH - OPTION_INDENT) or ['']
+        for text, _ in question['options']
+    ]
+    lines = 1 + len(stem) + sum(len(lines) for lines in options)  # + ligne « Question n »
+    return {'stem': stem, 'options': options, 'lines': lines}
+
+
+def fragments(questions):
+    """Fragments des questions (même ordre) ; seuls ceux absents du cache sont mesurés."""
+    keys = [_fragment_key(question) for question in questions]
+    found = cache.get_many(keys)
+    missing = {}
+    layout = []
+    for key, question in zip(keys, questions):
+        fragment = found.get(key) or missing.get(key)
+        if fragment is None:
+            fragment = missing[key] = _measure(question)
+        layout.append(fragment)
+    if missing:
+        cache.set_many(missing, FRAGMENT_TTL)
+    return layout
+
+
+def paginate(plan, layout):
+    """
+    Découpe le plan en pages à partir des lignes mesurées : ``[[(numéro, item,
+    première ligne, fin)]]``. Une question tient sur une page quand c'est
+    possible ; plus haute qu'une page, elle continue sur les suivantes.
+    """
+    available = BODY_TOP - BODY_BOTTOM
+    pages, page, used = [], [], 0
+    for number, item in enumerate(plan, 1):
+        lines = layout[item[0]]['lines']
+        height = lines * LEADING + QUESTION_GAP
+        if page and used + height > available and height <= available:
+            pages.append(page)
+            page, used = [], 0
+        start = 0
+        while start < lines:
+            fit = int((available - used) // LEADING)
+            if fit < 1:
+                pages.append(page)
+                page, used = [], 0
+                continue
+            end = min(lines, start + fit)
+            page.append((number, item, start, end))
+            used += (end - start) * LEADING
+            start = end
+        used += QUESTION_GAP
+    if page:
+        pages.append(page)
+    return pages
+
+
+# ── Rendu ─────────────────────────────────────
+def _canvas(title):
+    pdf_fonts.register_fonts()
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4, invariant=1, initialFontName=FONT)
+    pdf.setTitle(title)
+    return buffer, pdf
+
+
+def _header(pdf, content, kind, variant, page, pages):
+    top = PAGE_HEIGHT - MARGIN
+    pdf.setFillColor(black)
+    pdf.setFont(BOLD, 12)
+    pdf.drawString(MARGIN, top, f"{content['title']} — {KIND_TITLES[kind]}")
+    pdf.drawRightString(PAGE_WIDTH - MARGIN, top, f'Variante {variant}')
+    pdf.setFont(FONT, 9)
+    pdf.drawString(
+        MARGIN, top - 14,
+        f"{content['site_name']} {content['year']} · {content['phase']} · {content['duration']} min",
+    )
+    pdf.drawRightString(PAGE_WIDTH - MARGIN, top - 14, f'Page {page}/{pages}')
+    pdf.line(MARGIN, top - 22, PAGE_WIDTH - MARGIN, top - 22)
+
+
+def _question_lines(number, question, fragment, option_order):
+    """Lignes d'une question dans l'ordre de la variante : ``[(police, [(x, texte)])]``."""
+    points = question['points']
+    lines = [(BOLD, [(MARGIN, f"Question {number} ({points} pt{'s' if points > 1 else ''})")])]
+    lines += [(FONT, [(MARGIN, line)]) for line in fragment['stem']]
+    for letter, option in zip(LETTERS, option_order):
+        for position, line in enumerate(fragment['options'][option]):
+            pieces = [(MARGIN + OPTION_INDENT, line)]
+            if position == 0:
+                pieces.insert(0, (MARGIN + 4, f'{letter}.'))
+            lines.append((FONT, pieces))
+    return lines
+
+
+def render_booklet(content, variant, layout):
+    plan = variant_plan(content, variant)
+    pages = paginate(plan, layout)
+    buffer, pdf = _canvas(f"{content['title']} — livret {variant}")
+    for page_number, page in enumerate(pages, 1):
+        _header(pdf, content, 'booklet', variant, page_number, len(pages))
+        y = BODY_TOP
+        for number, (index, option_order), start, end in page:
+            lines = _question_lines(number, content['questions'][index], layout[index], option_order)
+            for font, pieces in lines[start:end]:
+                pdf.setFont(font, FONT_SIZE)
+                for x, text in pieces:
+                    pdf.drawString(x, y, text)
+                y -= LEADING
+            if end == len(lines):
+                y -= QUESTION_GAP
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def answer_key(content, variant):
+    """``[(numéro, lettres correctes, points, id question)]`` pour la variante."""
+    rows = []
+    for number, (index, option_order) in enumerate(variant_plan(content, variant), 1):
+        question = content['questions'][index]
+        letters = ''.join(
+            letter for letter, option in zip(LETTERS, option_order) if question['options'][option][1]
+        )
+        rows.append((number, letters or '—', question['points'], question['id']))
+    return rows
+
+
+def render_key(content, variant):
+    rows = answer_key(content, variant)
+    per_page = int((BODY_TOP - BODY_BOTTOM - LEADING) // LEADING)
+    pages = [rows[i:i + per_page] for i in range(0, len(rows), per_page)] or [[]]
+    columns = (MARGIN, MARGIN + 60, MARGIN + 160, MARGIN + 230)
+    buffer, pdf = _canvas(f"{content['title']} — corrigé {variant}")
+    for page_number, page in enumerate(pages, 1):
+        _header(pdf, content, 'key', variant, page_number, len(pages))
+        y = BODY_TOP
+        pdf.setFont(BOLD, FONT_SIZE)
+        for x, label in zip(columns, ('N°', 'Réponse', 'Points', 'Question (id)')):
+            pdf.drawString(x, y, label)
+        pdf.setFont(FONT, FONT_SIZE)
+        for row in page:
+            y -= LEADING
+            for x, value in zip(columns, row):
+                pdf.drawString(x, y, str(value))
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+# ── Feuille de réponses ───────────────────────
+BUBBLE_RADIUS = 5
+BUBBLE_STEP = 16
+SHEET_COLUMNS = 4
+SHEET_ROWS = 25
+SHEET_ROW_STEP = 18
+MARK_SIZE = 14
+
+
+def _bubble(pdf, x, y, label, filled=False):
+    pdf.setFillColor(black)
+    pdf.circle(x, y, BUBBLE_RADIUS, stroke=1, fill=int(filled))
+    if not filled:
+        pdf.setFillColor(GREY)
+        pdf.setFont(FONT, 6)
+        pdf.drawCentredString(x, y - 2, label)
+        pdf.setFillColor(black)
+
+
+def _registration_marks(pdf):
+    # Repères pleins aux quatre coins pour le redressement à la lecture optique
+    low, high = MARGIN - 30, PAGE_WIDTH - MARGIN + 30 - MARK_SIZE
+    for x, y in ((low, low), (high, low), (low, PAGE_HEIGHT - low - MARK_SIZE), (high, PAGE_HEIGHT - low - MARK_SIZE)):
+        pdf.rect(x, y, MARK_SIZE, MARK_SIZE, stroke=0, fill=1)
+
+
+CODE_LEFT = MARGIN + 180
+INFO_LEFT = CODE_LEFT + 8 + CODE_DIGITS * BUBBLE_STEP + 20
+GRID_TOP = BODY_TOP - 36 - 9 * 14 - 30
+
+
+def _variant_bubble(index):
+    return MARGIN + 8 + index * BUBBLE_STEP, BODY_TOP - 16
+
+
+def _code_bubble(column, value):
+    return CODE_LEFT + 8 + column * BUBBLE_STEP, BODY_TOP - 36 - value * 14
+
+
+def _sheet_form(pdf, content, variant, plan, page, pages):
+    """Partie fixe d'une page (identique pour tous les candidats d'une variante), dessinée une fois."""
+    top = BODY_TOP
+    _header(pdf, content, 'sheet', variant, page + 1, pages)
+    _registration_marks(pdf)
+
+    pdf.setFont(BOLD, 10)
+    pdf.drawString(MARGIN, top, 'Variante')
+    for i in range(MAX_VARIANTS):
+        _bubble(pdf, *_variant_bubble(i), variant_code(i))
+
+    # Code candidat : une colonne de bulles 0-9 par chiffre, cases à écrire au-dessus
+    pdf.setFont(BOLD, 10)
+    pdf.drawString(CODE_LEFT, top, 'Code candidat')
+    for column in range(CODE_DIGITS):
+        x, _ = _code_bubble(column, 0)
+        pdf.rect(x - 7, top - 24, 14, 14, stroke=1, fill=0)
+        for value in range(10):
+            _bubble(pdf, *_code_bubble(column, value), str(value))
+
+    pdf.setFont(FONT, 8)
+    pdf.drawString(INFO_LEFT, top - 95, f"Examen {content['exam_id']} · variante {variant} · feuille {page + 1}/{pages}")
+    pdf.drawString(INFO_LEFT, top - 120, 'Noircir complètement une seule bulle par question,')
+    pdf.drawString(INFO_LEFT, top - 131, 'au stylo noir ou bleu. Ne pas plier la feuille.')
+
+    per_page = SHEET_COLUMNS * SHEET_ROWS
+    column_width = TEXT_WIDTH / SHEET_COLUMNS
+    first = page * per_page
+    for offset, (_, option_order) in enumerate(plan[first:first + per_page]):
+        column, row = divmod(offset, SHEET_ROWS)
+        x = MARGIN + column * column_width
+        y = GRID_TOP - row * SHEET_ROW_STEP
+        pdf.setFont(BOLD, 8)
+        pdf.drawRightString(x + 18, y - 3, str(first + offset + 1))
+        for i in range(len(option_order)):
+            _bubble(pdf, x + 30 + i * BUBBLE_STEP, y, LETTERS[i])
+
+
+def _sheet_identity(pdf, content, variant, code, name, page):
+    """Partie propre au candidat : bulles pré-remplies, nom et code-barres."""
+    top = BODY_TOP
+    _bubble(pdf, *_variant_bubble(LETTERS.index(variant)), variant, filled=True)
+    if code:
+        pdf.setFont(BOLD, 9)
+        for column, digit in enumerate(code):
+            x, _ = _code_bubble(column, 0)
+            pdf.drawCentredString(x, top - 20, digit)
+            _bubble(pdf, *_code_bubble(column, int(digit)), digit, filled=True)
+    pdf.setFont(FONT, 10)
+    pdf.drawString(INFO_LEFT, top, f"Nom : {name or '_' * 30}")
+    barcode = code128.Code128(
+        f"{content['exam_id']}-{variant}-{code or '0' * CODE_DIGITS}-{page + 1}",
+        barHeight=36, barWidth=0.9,
+    )
+    barcode.drawOn(pdf, INFO_LEFT - 10, top - 80)
+
+
+def render_sheets(content, entries):
+    """Feuilles de réponses : ``entries`` = ``[(variante, code candidat ou None, nom ou None)]``."""
+    buffer, pdf = _canvas(f"{content['title']} — feuilles de réponses")
+    per_page = SHEET_COLUMNS * SHEET_ROWS
+    forms = {}  # variante -> noms des formulaires PDF (un par page)
+    for variant, code, name in entries:
+        if variant not in forms:
+            plan = variant_plan(content, variant)
+            pages = max(1, -(-len(plan) // per_page))
+            forms[variant] = [f'sheet-{variant}-{page}' for page in range(pages)]
+            for page, form in enumerate(forms[variant]):
+                pdf.beginForm(form)
+                _sheet_form(pdf, content, variant, plan, page, pages)
+                pdf.endForm()
+        for page, form in enumerate(forms[variant]):
+            pdf.doForm(form)
+            _sheet_identity(pdf, content, variant, code, name, page)
+            pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+# ── Documents ─────────────────────────────────
+def sheet_group(region=None):
+    """Dossier des feuilles pré-remplies : une région n'écrase pas celles d'une autre."""
+    return slugify(region or '') or 'toutes'
+
+
+def document_specs(variants, candidates=(), region=None):
+    """Documents à produire (indépendants) : par variante puis feuilles pré-remplies par lots."""
+    specs = []
+    for index in range(variants):
+        variant = variant_code(index)
+        specs += [
+            {'kind': 'booklet', 'variant': variant},
+            {'kind': 'key', 'variant': variant},
+            {'kind': 'sheet', 'variant': variant, 'entries': [[variant, None, None]]},
+        ]
+    group = sheet_group(region)
+    entries = [[variant_code(i % variants), code, name] for i, (code, name) in enumerate(candidates)]
+    for part, start in enumerate(range(0, len(entries), SHEET_BATCH_SIZE), 1):
+        specs.append({
+            'kind': 'sheet', 'group': group, 'part': part,
+            'entries': entries[start:start + SHEET_BATCH_SIZE],
+        })
+    return specs
+
+
+def _part_name(exam_id, group, part):
+    return f"{BOOKLETS_PREFIX}exam-{exam_id}/feuilles-candidats/{group}/{part:03d}.pdf"
+
+
+def document_name(exam_id, spec):
+    if 'part' in spec:
+        return _part_name(exam_id, spec['group'], spec['part'])
+    return f"{BOOKLETS_PREFIX}exam-{exam_id}/{spec['variant']}-{FILE_NAMES[spec['kind']]}.pdf"
+
+
+def discard_stale_parts(exam_id, region, parts):
+    """Supprime les lots au-delà de ``parts`` laissés par une génération plus grande du même groupe."""
+    storage = CandidateDocumentStorage()
+    group = sheet_group(region)
+    part = parts + 1
+    while storage.exists(name := _part_name(exam_id, group, part)):
+        storage.delete(name)
+        cache.delete(f'booklet_digest:{name}')
+        part += 1
+
+
+def plan_documents(exam_id, variants, personalized=False, region=None):
+    """Contenu (fragments mesurés) et documents à produire ; retourne ``(contenu, specs)``."""
+    content = exam_content(exam_id)
+    fragments(content['questions'])
+    specs = document_specs(variants, candidate_entries(region) if personalized else (), region)
+    if personalized:
+        discard_stale_parts(exam_id, region, sum('part' in spec for spec in specs))
+    return content, specs
+
+
+def _inputs(content, spec):
+    """Ce dont dépend le document : s'il n'a pas changé, le fichier existant est gardé."""
+    header = [content[field] for field in ('title', 'phase', 'year', 'duration', 'site_name')]
+    if spec['kind'] == 'booklet':
+        plan = variant_plan(content, spec['variant'])
+        return [header, plan, [content['questions'][index] for index, _ in plan]]
+    if spec['kind'] == 'key':
+        return [header, answer_key(content, spec['variant'])]
+    variants = sorted({variant for variant, _, _ in spec['entries']})
+    shapes = {variant: [len(options) for _, options in variant_plan(content, variant)] for variant in variants}
+    return [header, spec['entries'], shapes]
+
+
+def _digest(content, spec):
+    raw = json.dumps([LAYOUT_VERSION, content['exam_id'], spec, _inputs(content, spec)], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def render_document(content, spec):
+    if spec['kind'] == 'booklet':
+        return render_booklet(content, spec['variant'], fragments(content['questions']))
+    if spec['kind'] == 'key':
+        return render_key(content, spec['variant'])
+    return render_sheets(content, spec['entries'])
+
+
+def build_document(content, spec):
+    """Rend et enregistre un document ; retourne ``(nom, rendu)``, ``rendu=False`` s'il était à jour."""
+    storage = CandidateDocumentStorage()
+    name = document_name(content['exam_id'], spec)
+    digest_key = f'booklet_digest:{name}'
+    digest = _digest(content, spec)
+    if cache.get(digest_key) == digest and storage.exists(name):
+        return name, False
+    # Nom déterministe : on remplace le fichier précédent
+    storage.save(name, ContentFile(render_document(content, spec)), deduplicate=False, overwrite=True)
+    cache.set(digest_key, digest, None)
+    return name, True
+
+
+# ── Génération en tâche de fond ───────────────
+def _job_key(job_id):
+    return f'booklets:{job_id}'
+
+
+def _exam_lock(exam_id):
+    return f'booklets:exam:{exam_id}'
+
+
+def claim_exam(exam_id, owner):
+    """Une seule génération à la fois par examen (mêmes fichiers) ; ``False`` si déjà en cours."""
+    return cache.add(_exam_lock(exam_id), owner, EXAM_LOCK_TTL)
+
+
+def release_exam(exam_id, owner):
+    if cache.get(_exam_lock(exam_id)) == owner:
+        cache.delete(_exam_lock(exam_id))
+
+
+def start_job(exam_id, variants, personalized=False, region=None):
+    """Lance la génération ; ``None`` si une autre est en cours pour cet examen."""
+    from .tasks import generate_exam_booklets
+
+    job_id = uuid.uuid4().hex
+    if not claim_exam(exam_id, job_id):
+        return None
+    cache.set(_job_key(job_id), {'status': 'pending', 'exam_id': exam_id}, JOB_TTL)
+    try:
+        generate_exam_booklets.delay(job_id, exam_id, variants, personalized, region)
+    except Exception:
+        release_exam(exam_id, job_id)
+        raise
+    return job_id
+
+
+def plan_job(job_id, exam_id, variants, personalized=False, region=None):
+    """Prépare le travail et enregistre son état ; retourne ``(contenu, specs)``."""
+    content, specs = plan_documents(exam_id, variants, personalized, region)
+    cache.set(_job_key(job_id), {'status': 'running', 'exam_id': exam_id, 'total': len(specs)}, JOB_TTL)
+    return content, specs
+
+
+def fail_job(job_id, exam_id, error):
+    cache.set(_job_key(job_id), {'status': 'failed', 'exam_id': exam_id, 'error': str(error)}, JOB_TTL)
+    release_exam(exam_id, job_id)
+
+
+def _outcomes(job_id, total):
+    """Issue de chaque document (nom, ``FAILED_DOCUMENT``, ou ``None`` tant qu'il n'est pas terminé)."""
+    keys = [f'{_job_key(job_id)}:doc:{index}' for index in range(total)]
+    found = cache.get_many(keys)
+    return [found.get(key) for key in keys]
+
+
+def record_document(job_id, index, name=None):
+    """Enregistre l'issue du document ``index`` (``name=None`` : échec) ; libère l'examen au dernier."""
+    # Une clé par index : un message relivré (acks_late) réécrit la même issue
+    # au lieu de compter le document deux fois
+    cache.set(f'{_job_key(job_id)}:doc:{index}', name or FAILED_DOCUMENT, JOB_TTL)
+    state = cache.get(_job_key(job_id))
+    if state and None not in _outcomes(job_id, state['total']):
+        release_exam(state['exam_id'], job_id)
+
+
+def job_status(job_id, exam_id):
+    """
+    ``{'status': pending|running|done|failed, ...}`` avec les URL signées une
+    fois terminé, ou ``None`` (inconnu, expiré ou d'un autre examen).
+    """
+    state = cache.get(_job_key(job_id))
+    if state is None or state.get('exam_id') != exam_id:
+        return None
+    if state['status'] != 'running':
+        return state
+    outcomes = [outcome for outcome in _outcomes(job_id, state['total']) if outcome is not None]
+    failed = outcomes.count(FAILED_DOCUMENT)
+    result = {'status': 'running', 'total': state['total'], 'done': len(outcomes) - failed, 'failed': failed}
+    if len(outcomes) < state['total']:
+        return result
+    # Seulement les documents produits par ce travail
+    storage = CandidateDocumentStorage()
+    result['status'] = 'failed' if failed else 'done'
+    result['files'] = [
+        {'name': name.split('/', 2)[-1], 'url': storage.signed_url(name)}
+        for name in outcomes if name != FAILED_DOCUMENT
+    ]
+    return result
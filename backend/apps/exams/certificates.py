@@ -0,0 +1,200 @@
+"""
+Attestations PDF de fin de phase (participation, qualification).
+
+1. ``prepare(phase_id)`` crée les lignes ``Certificate`` manquantes, en
+   ``pending`` : participation pour toute session terminée, qualification si
+   le pourcentage atteint le score de passage de l'examen.
+2. ``pending_batches(phase_id)`` découpe les attestations encore à faire
+   (``pending`` ou ``failed``) en lots ; chaque lot est traité par
+   ``generate_batch`` dans un processus (commande ``generate_certificates``)
+   ou un worker Celery (``generate_phase_certificates``).
+3. ``generate_batch`` lit les données du lot en une requête, rend les PDF
+   (reportlab), les envoie au stockage sous un nom déterministe puis
+   enregistre fichier et statut. Relancer reprend là où l'on s'est arrêté.
+"""
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from django.db.models import BooleanField, Count, ExpressionWrapper, F, Q
+from django.utils import timezone
+from reportlab.lib.colors import HexColor
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfgen import canvas
+
+from apps import pdf_fonts
+from apps.platform_settings.models import PlatformSettings
+from .models import Certificate, ExamSession
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+_CREATE_CHUNK = 2000
+
+PAGE_SIZE = landscape(A4)
+PRIMARY = HexColor('#1A535C')
+ACCENT = HexColor('#E8B923')
+
+TITLES = {
+    Certificate.Kind.PARTICIPATION: 'ATTESTATION DE PARTICIPATION',
+    Certificate.Kind.QUALIFICATION: 'ATTESTATION DE QUALIFICATION',
+}
+
+
+def certificate_reference(year, phase_number, kind, session_id):
+    return f'OAIB-{year}-P{phase_number}-{kind[0].upper()}-{session_id:06d}'
+
+
+def certificate_path(reference):
+    return f'certificates/{reference}.pdf'
+
+
+# ── Préparation ───────────────────────────────
+def prepare(phase_id):
+    """Crée les attestations manquantes de la phase ; retourne le nombre à générer."""
+    sessions = (
+        ExamSession.objects
+        .filter(
+            exam__phase_id=phase_id,
+            status__in=[ExamSession.Status.COMPLETED, ExamSession.Status.EVALUATED],
+        )
+        .annotate(qualified=ExpressionWrapper(
+            Q(percentage__gte=F('exam__passing_score')), output_field=BooleanField(),
+        ))
+        .values_list('pk', 'qualified', 'exam__phase__phase_number', 'exam__phase__edition__year')
+    )
+    batch = []
+    for session_id, qualified, phase_number, year in sessions.iterator(chunk_size=_CREATE_CHUNK):
+        kinds = [Certificate.Kind.PARTICIPATION]
+        if qualified:
+            kinds.append(Certificate.Kind.QUALIFICATION)
+        for kind in kinds:
+            batch.append(Certificate(
+                session_id=session_id, kind=kind,
+                reference=certificate_reference(year, phase_number, kind, session_id),
+            ))
+        if len(batch) >= _CREATE_CHUNK:
+            Certificate.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        Certificate.objects.bulk_create(batch, ignore_conflicts=True)
+    return _todo(phase_id).count()
+
+
+def _todo(phase_id):
+    return Certificate.objects.filter(
+        session__exam__phase_id=phase_id,
+        status__in=[Certificate.Status.PENDING, Certificate.Status.FAILED],
+    )
+
+
+def pending_batches(phase_id, batch_size=BATCH_SIZE):
+    ids = list(_todo(phase_id).order_by('pk').values_list('pk', flat=True))
+    return [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+
+
+def progress(phase_id):
+    counts = dict(
+        Certificate.objects.filter(session__exam__phase_id=phase_id)
+        .values_list('status').annotate(total=Count('pk')).order_by()
+    )
+    return {status: counts.get(status, 0) for status in Certificate.Status.values}
+
+
+# ── Rendu ─────────────────────────────────────
+def render(data, site_name):
+    """PDF (octets) d'une attestation à partir du gabarit ci-dessous."""
+    font, bold = pdf_fonts.register_fonts()
+    buffer = io.BytesIO()
+    width, height = PAGE_SIZE
+    pdf = canvas.Canvas(buffer, pagesize=PAGE_SIZE, invariant=1, initialFontName=font)
+    pdf.setTitle(f"{TITLES[data['kind']].capitalize()} — {data['reference']}")
+
+    # Cadre
+    pdf.setStrokeColor(PRIMARY)
+    pdf.setLineWidth(6)
+    pdf.rect(24, 24, width - 48, height - 48)
+    pdf.setStrokeColor(ACCENT)
+    pdf.setLineWidth(1.5)
+    pdf.rect(36, 36, width - 72, height - 72)
+
+    center = width / 2
+    pdf.setFillColor(PRIMARY)
+    pdf.setFont(bold, 15)
+    pdf.drawCentredString(center, height - 90, f"{site_name} — Édition {data['year']}")
+    pdf.setFont(bold, 32)
+    pdf.drawCentredString(center, height - 150, TITLES[data['kind']])
+
+    pdf.setFillColor(HexColor('#333333'))
+    pdf.setFont(font, 15)
+    pdf.drawCentredString(center, height - 205, 'est décernée à')
+    pdf.setFont(bold, 28)
+    pdf.drawCentredString(center, height - 250, f"{data['first_name']} {data['last_name'].upper()}")
+    if data['school']:
+        pdf.setFont(font, 13)
+        pdf.drawCentredString(center, height - 275, data['school'])
+
+    pdf.setFont(font, 14)
+    phase = f"la phase {data['phase_number']} « {data['phase_title']} »"
+    if data['kind'] == Certificate.Kind.QUALIFICATION:
+        lines = [
+            f"pour sa qualification à l'issue de {phase},",
+            f"avec un score de {data['percentage']:.2f} %" + (f" (rang {data['rank']})." if data['rank'] else '.'),
+        ]
+    else:
+        lines = [f"pour sa participation à {phase}", f"({data['exam_title']})."]
+    for i, line in enumerate(lines):
+        pdf.drawCentredString(center, height - 320 - i * 22, line)
+
+    pdf.setFont(font, 10)
+    pdf.drawString(60, 60, f"Délivrée le {timezone.localdate():%d/%m/%Y}")
+    pdf.drawRightString(width - 60, 60, f"Référence : {data['reference']}")
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+# ── Génération d'un lot ───────────────────────
+_BATCH_FIELDS = {
+    'pk': 'pk',
+    'kind': 'kind',
+    'reference': 'reference',
+    'first_name': 'session__candidate__user__first_name',
+    'last_name': 'session__candidate__user__last_name',
+    'school': 'session__candidate__school',
+    'percentage': 'session__percentage',
+    'rank': 'session__rank',
+    'exam_title': 'session__exam__title',
+    'phase_number': 'session__exam__phase__phase_number',
+    'phase_title': 'session__exam__phase__title',
+    'year': 'session__exam__phase__edition__year',
+}
+
+
+def generate_batch(certificate_ids):
+    """Rend et envoie les attestations du lot encore à faire ; retourne ``(ok, échecs)``."""
+    rows = (
+        Certificate.objects
+        .filter(pk__in=certificate_ids, status__in=[Certificate.Status.PENDING, Certificate.Status.FAILED])
+        .values_list(*_BATCH_FIELDS.values())
+    )
+    site_name = PlatformSettings.get_cached().site_name
+    storage = Certificate._meta.get_field('file').storage
+    done, failed = [], []
+    for row in rows:
+        data = dict(zip(_BATCH_FIELDS, row))
+        try:
+            pdf = render(data, site_name)
+            name = storage.save(certificate_path(data['reference']), ContentFile(pdf), overwrite=True)
+            done.append(Certificate(pk=data['pk'], file=name, status=Certificate.Status.GENERATED,
+                                    generated_at=timezone.now()))
+        except Exception as exc:
+            logger.warning('Attestation %s : %s', data['reference'], exc)
+            failed.append(data['pk'])
+
+    if done:
+        Certificate.objects.bulk_update(done, ['file', 'status', 'generated_at'])
+    if failed:
+        Certificate.objects.filter(pk__in=failed).update(status=Certificate.Status.FAILED)
+    return len(done), len(failed)
@@ -0,0 +1,84 @@
+"""
+Génère les livrets imprimables d'un examen (livret, corrigé et feuille de
+réponses par variante, feuilles pré-remplies par lots) en parallèle dans un
+pool de processus, ou via les workers Celery avec ``--celery``. Les documents
+dont le contenu n'a pas changé ne sont pas rendus de nouveau.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.exams.booklets import (
+    MAX_VARIANTS, build_document, claim_exam, plan_documents, release_exam, start_job,
+)
+from apps.exams.models import Exam
+
+
+def _work(content, spec):
+    try:
+        return build_document(content, spec), None
+    except Exception as exc:  # un document en échec : on continue les autres
+        return (None, False), str(exc)
+
+
+class Command(BaseCommand):
+    help = "Génère les livrets d'examen imprimables (variantes, corrigés, feuilles de réponses)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam', type=int, help="ID de l'examen")
+        parser.add_argument('--variants', type=int, default=2, help=f'Nombre de variantes (max {MAX_VARIANTS})')
+        parser.add_argument('--personalized', action='store_true',
+                            help='Feuilles pré-remplies pour les candidats validés')
+        parser.add_argument('--region', help='Limiter les feuilles pré-remplies à une région')
+        parser.add_argument('--workers', type=int, default=4, help='Nombre de processus')
+        parser.add_argument('--celery', action='store_true', help='Répartir les documents entre les workers Celery')
+
+    def handle(self, *args, **options):
+        variants = options['variants']
+        if not 1 <= variants <= MAX_VARIANTS:
+            raise CommandError(f'--variants doit être compris entre 1 et {MAX_VARIANTS}.')
+        if not Exam.objects.filter(pk=options['exam']).exists():
+            raise CommandError(f"Examen {options['exam']} introuvable.")
+
+        if options['celery']:
+            job_id = start_job(options['exam'], variants, options['personalized'], options['region'])
+            if job_id is None:
+                raise CommandError('Une génération des livrets est déjà en cours pour cet examen.')
+            self.stdout.write(self.style.SUCCESS(f'✅ Génération envoyée aux workers (job {job_id})'))
+            return
+
+        owner = f'command:{os.getpid()}'
+        if not claim_exam(options['exam'], owner):
+            raise CommandError('Une génération des livrets est déjà en cours pour cet examen.')
+        try:
+            self._generate(options, variants)
+        finally:
+            release_exam(options['exam'], owner)
+
+    def _generate(self, options, variants):
+        # Mesure des fragments une fois dans le parent : les processus héritent du cache
+        content, specs = plan_documents(options['exam'], variants, options['personalized'], options['region'])
+        self.stdout.write(f"{len(content['questions'])} question(s), {len(specs)} document(s) à produire")
+
+        # Ne pas partager la connexion du parent avec les processus forkés
+        connections.close_all()
+
+        rendered = unchanged = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(_work, content, spec) for spec in specs]
+            for future in as_completed(futures):
+                (name, was_rendered), error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f'  ✗ document en échec : {error}')
+                elif was_rendered:
+                    rendered += 1
+                else:
+                    unchanged += 1
+                self.stdout.write(f'  {rendered + unchanged + failed}/{len(specs)}', ending='\r')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Terminé — {rendered} rendu(s), {unchanged} inchangé(s), {failed} échec(s)'
+        ))
@@ -0,0 +1,57 @@
+"""
+Génère les attestations PDF d'une phase, en parallèle dans un pool de
+processus (ou via les workers Celery avec ``--celery``). Reprend les
+attestations restées ``pending`` ou ``failed`` si on la relance.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.exams.certificates import BATCH_SIZE, generate_batch, pending_batches, prepare
+from apps.exams.tasks import generate_certificate_batch
+
+
+def _work(certificate_ids):
+    # Chaque processus ouvre sa propre connexion BDD et son client de stockage
+    try:
+        return generate_batch(certificate_ids), None
+    except Exception as exc:  # lot entier en échec : on continue les autres
+        return (0, len(certificate_ids)), str(exc)
+
+
+class Command(BaseCommand):
+    help = "Génère les attestations (participation, qualification) d'une phase"
+
+    def add_arguments(self, parser):
+        parser.add_argument('phase', type=int, help='ID de la phase')
+        parser.add_argument('--workers', type=int, default=4, help='Nombre de processus')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Attestations par lot')
+        parser.add_argument('--celery', action='store_true', help='Répartir les lots entre les workers Celery')
+
+    def handle(self, *args, **options):
+        todo = prepare(options['phase'])
+        batches = pending_batches(options['phase'], options['batch_size'])
+        self.stdout.write(f"{todo} attestation(s) à générer en {len(batches)} lot(s)")
+
+        if options['celery']:
+            for certificate_ids in batches:
+                generate_certificate_batch.delay(certificate_ids)
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(batches)} lot(s) envoyé(s) aux workers"))
+            return
+
+        # Ne pas partager la connexion du parent avec les processus forkés
+        connections.close_all()
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(_work, certificate_ids) for certificate_ids in batches]
+            for future in as_completed(futures):
+                (ok, ko), error = future.result()
+                done += ok
+                failed += ko
+                if error:
+                    self.stderr.write(f"  ✗ lot en échec : {error}")
+                self.stdout.write(f"  {done + failed}/{todo}", ending='\r')
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Terminé — {done} ok, {failed} échec(s)"))
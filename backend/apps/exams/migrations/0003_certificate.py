@@ -0,0 +1,34 @@
+# Generated by Django 5.2.11 on 2026-10-19 17:44
+
+import config.supabase_storage
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0002_alter_phase_edition_alter_questioncategory_slug'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Certificate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('participation', 'Participation'), ('qualification', 'Qualification')], max_length=20, verbose_name='type')),
+                ('reference', models.CharField(max_length=40, unique=True, verbose_name='reference')),
+                ('file', models.FileField(blank=True, storage=config.supabase_storage.CandidateDocumentStorage, upload_to='certificates/', verbose_name='fichier')),
+                ('status', models.CharField(choices=[('pending', 'A generer'), ('generated', 'Genere'), ('failed', 'Echec')], default='pending', max_length=20, verbose_name='statut')),
+                ('generated_at', models.DateTimeField(blank=True, null=True, verbose_name='genere le')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='cree le')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='certificates', to='exams.examsession', verbose_name="session d'examen")),
+            ],
+            options={
+                'verbose_name': 'attestation',
+                'verbose_name_plural': 'attestations',
+                'ordering': ['reference'],
+                'unique_together': {('session', 'kind')},
+            },
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
 
+from config.supabase_storage import CandidateDocumentStorage
+
 
 class Edition(models.Model):
     """Une edition annuelle des Olympiades (ex: 2026)."""
@@ -286,3 +288,40 @@ class ExamAnswer(models.Model):
     def __str__(self):
         mark = 'V' if self.is_correct else 'X'
         return f"{mark} Session #{self.session_id} - Q#{self.question_id}"
+
+
+class Certificate(models.Model):
+    """Attestation PDF d'une session d'examen (participation ou qualification)."""
+
+    class Kind(models.TextChoices):
+        PARTICIPATION = 'participation', 'Participation'
+        QUALIFICATION = 'qualification', 'Qualification'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'A generer'
+        GENERATED = 'generated', 'Genere'
+        FAILED = 'failed', 'Echec'
+
+    session = models.ForeignKey(
+        ExamSession, on_delete=models.CASCADE,
+        related_name='certificates', verbose_name="session d'examen",
+    )
+    kind = models.CharField('type', max_length=20, choices=Kind.choices)
+    reference = models.CharField('reference', max_length=40, unique=True)
+    file = models.FileField(
+        'fichier', storage=CandidateDocumentStorage, upload_to='certificates/', blank=True,
+    )
+    status = models.CharField(
+        'statut', max_length=20, choices=Status.choices, default=Status.PENDING,
+    )
+    generated_at = models.DateTimeField('genere le', null=True, blank=True)
+    created_at = models.DateTimeField('cree le', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'attestation'
+        verbose_name_plural = 'attestations'
+        ordering = ['reference']
+        unique_together = ['session', 'kind']
+
+    def __str__(self):
+        return f"{self.reference} ({self.get_kind_display()})"
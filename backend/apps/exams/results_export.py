@@ -0,0 +1,110 @@
+"""
+Export des résultats d'examen (CSV / XLSX) : une ligne par session terminée,
+une colonne par catégorie de questions, lue dans ``category_scores``.
+
+Les lignes viennent d'une seule requête : candidat, examen et phase par
+jointure, classement calculé en SQL (``RANK()`` par examen) tant que ``rank``
+n'est pas renseigné. Les gros exports sont générés par Celery
+(``export_exam_results``) et déposés dans le bucket privé ; l'état du travail
+est gardé dans le cache, le fichier est supprimé quand il expire (voir
+``apps.exports``).
+"""
+import uuid
+
+from django.db.models import F, Window
+from django.db.models.functions import Coalesce, Rank
+
+from apps.exports import (
+    Column, choice_label, create_export_job, export_file, export_filename, export_job_status, fail_export_job,
+    local_datetime, store_export,
+)
+from .models import ExamSession, QuestionCategory
+
+# Au-delà, l'export est toujours généré en tâche de fond
+ASYNC_THRESHOLD = 5000
+
+
+def results_queryset(exam_id=None, phase_id=None):
+    qs = ExamSession.objects.filter(
+        status__in=[ExamSession.Status.COMPLETED, ExamSession.Status.EVALUATED],
+    )
+    if exam_id:
+        qs = qs.filter(exam_id=exam_id)
+    if phase_id:
+        qs = qs.filter(exam__phase_id=phase_id)
+    position = Window(
+        Rank(),
+        partition_by=F('exam_id'),
+        order_by=[F('percentage').desc(), F('time_spent_seconds').asc()],
+    )
+    return qs.annotate(position=Coalesce('rank', position)).order_by('exam_id', 'position', 'pk')
+
+
+def category_score(category):
+    """Score (%) d'une catégorie : nombre, ou ``{'score', 'max_score'}``, clé nom ou slug."""
+    keys = (category.name, category.slug)
+
+    def format(scores):
+        if not isinstance(scores, dict):
+            return None
+        value = next((scores[key] for key in keys if key in scores), None)
+        if isinstance(value, dict):
+            max_score = value.get('max_score')
+            return round(100 * value.get('score', 0) / max_score, 2) if max_score else None
+        return value
+
+    return format
+
+
+def results_columns():
+    columns = [
+        Column('Rang', 'position'),
+        Column('Nom', 'candidate__user__last_name'),
+        Column('Prénom', 'candidate__user__first_name'),
+        Column('Email', 'candidate__user__email'),
+        Column('Établissement', 'candidate__school'),
+        Column('Région', 'candidate__region'),
+        Column('Examen', 'exam__title'),
+        Column('Phase', 'exam__phase__title'),
+        Column('Score', 'score'),
+        Column('Score max', 'max_score'),
+        Column('Pourcentage', 'percentage'),
+        Column('Temps passé (s)', 'time_spent_seconds'),
+        Column("Changements d'onglet", 'tab_switch_count'),
+        Column('Statut', 'status', choice_label(ExamSession.Status.choices)),
+        Column('Terminé le', 'completed_at', local_datetime),
+    ]
+    for category in QuestionCategory.objects.only('name', 'slug'):
+        columns.append(Column(f'{category.name} (%)', 'category_scores', category_score(category)))
+    return columns
+
+
+def export_basename(exam_id=None, phase_id=None):
+    return f'resultats_examen_{exam_id}' if exam_id else f'resultats_phase_{phase_id}'
+
+
+# ── Export en tâche de fond ───────────────────
+EXPORT_KIND = 'results'
+
+
+def start_job(exam_id, phase_id, file_format):
+    from .tasks import export_exam_results
+
+    job_id = uuid.uuid4().hex
+    create_export_job(EXPORT_KIND, job_id)
+    export_exam_results.delay(job_id, exam_id, phase_id, file_format)
+    return job_id
+
+
+def run_job(job_id, exam_id, phase_id, file_format):
+    filename = export_filename(export_basename(exam_id, phase_id), file_format)
+    output = export_file(results_queryset(exam_id, phase_id), results_columns(), file_format, 'Résultats')
+    return store_export(EXPORT_KIND, job_id, output, filename)
+
+
+def fail_job(job_id, error):
+    fail_export_job(EXPORT_KIND, job_id, error)
+
+
+def job_status(job_id):
+    return export_job_status(EXPORT_KIND, job_id)
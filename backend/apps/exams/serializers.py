@@ -1,9 +1,15 @@
 """Serializers pour l'app exams (éditions, phases, QCM, sessions)."""
+import time
+
+from django.core.cache import cache
+from django.db.models import Count
 from rest_framework import serializers
 
+from apps.candidates.models import CandidateProfile
+from .booklets import MAX_VARIANTS
 from .models import (
     Edition, Phase, QuestionCategory, Question, QuestionOption,
-    Exam, ExamQuestion, ExamSession, ExamAnswer,
+    Exam, ExamQuestion, ExamSession, ExamAnswer, Certificate,
 )
 
 
@@ -136,9 +142,26 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
 # ──────────────────────────────────────────────
 # EXAMS
 # ──────────────────────────────────────────────
+SESSIONS_COUNTS_KEY = 'exams:sessions_counts'
+SESSIONS_COUNTS_TTL = 60
+
+
+def sessions_counts():
+    """
+    ``{'stamp': ..., 'counts': {exam_id: n}}`` : agrégat en cache, recalculé au
+    plus une fois par minute plutôt qu'à chaque sauvegarde de session.
+    """
+    data = cache.get(SESSIONS_COUNTS_KEY)
+    if data is None:
+        counts = dict(ExamSession.objects.values_list('exam_id').annotate(total=Count('pk')).order_by())
+        data = {'stamp': int(time.time()), 'counts': counts}
+        cache.set(SESSIONS_COUNTS_KEY, data, SESSIONS_COUNTS_TTL)
+    return data
+
+
 class ExamSerializer(serializers.ModelSerializer):
     phase_title = serializers.CharField(source='phase.title', read_only=True)
-    sessions_count = serializers.IntegerField(source='sessions.count', read_only=True)
+    sessions_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Exam
@@ -151,6 +174,9 @@ class ExamSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
 
+    def get_sessions_count(self, obj):
+        return sessions_counts()['counts'].get(obj.pk, 0)
+
 
 class ExamDetailSerializer(ExamSerializer):
     """Détail d'un examen avec les questions (vue admin)."""
@@ -215,3 +241,47 @@ class SubmitAnswerSerializer(serializers.Serializer):
     question_id = serializers.IntegerField()
     option_id = serializers.IntegerField(required=False, allow_null=True)
     is_flagged = serializers.BooleanField(default=False)
+
+
+class CertificateSerializer(serializers.ModelSerializer):
+    exam_title = serializers.CharField(source='session.exam.title', read_only=True)
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Certificate
+        fields = ['id', 'kind', 'reference', 'exam_title', 'generated_at', 'url']
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        """URL signée (en cache) une fois le PDF généré"""
+        if obj.file and obj.status == Certificate.Status.GENERATED:
+            return obj.file.url
+        return None
+
+
+class ResultsExportSerializer(serializers.Serializer):
+    """Paramètres de l'export des résultats (query string)."""
+    exam = serializers.IntegerField(required=False, min_value=1)
+    phase = serializers.IntegerField(required=False, min_value=1)
+    file_format = serializers.ChoiceField(choices=['csv', 'xlsx'], default='csv')
+    # Le mot-clé « async » est réservé en Python : source explicite
+    run_async = serializers.BooleanField(required=False, default=False)
+
+    def to_internal_value(self, data):
+        data = data.copy()
+        if 'async' in data:
+            data['run_async'] = data['async']
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        if not attrs.get('exam') and not attrs.get('phase'):
+            raise serializers.ValidationError('Préciser exam ou phase.')
+        return attrs
+
+
+class BookletsSerializer(serializers.Serializer):
+    """Paramètres de génération des livrets imprimables d'un examen."""
+    variants = serializers.IntegerField(min_value=1, max_value=MAX_VARIANTS, default=2)
+    # Feuilles de réponses pré-remplies pour les candidats validés (d'une région)
+    personalized = serializers.BooleanField(required=False, default=False)
+    region = serializers.ChoiceField(choices=CandidateProfile.Region.choices, required=False)
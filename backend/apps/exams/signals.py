@@ -0,0 +1,8 @@
+"""Signals pour l'app exams — invalidation du cache des réponses publiques."""
+from apps.response_cache import invalidate_on_change
+
+from .models import Edition, Phase, Exam, ExamQuestion, Question, QuestionCategory, QuestionOption
+
+# Pas ExamSession : chaque départ / réponse / fin d'examen invaliderait les
+# ETag de tous les candidats (voir ``sessions_counts``).
+invalidate_on_change(Edition, Phase, Exam, ExamQuestion, Question, QuestionCategory, QuestionOption)
@@ -0,0 +1,64 @@
+"""Tâches Celery pour l'app exams (exports de résultats, attestations, livrets)."""
+import logging
+
+from celery import shared_task
+
+from .booklets import build_document, fail_job as fail_booklets_job, plan_job, record_document
+from .certificates import generate_batch, pending_batches, prepare
+from .results_export import fail_job, run_job
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=60, soft_time_limit=1800, time_limit=1900)
+def export_exam_results(self, job_id, exam_id, phase_id, file_format):
+    try:
+        return run_job(job_id, exam_id, phase_id, file_format)
+    except Exception as exc:  # inclut SoftTimeLimitExceeded
+        if self.request.retries >= self.max_retries:
+            logger.error('Export résultats %s abandonné : %s', job_id, exc)
+            fail_job(job_id, exc)
+            raise
+        raise self.retry(exc=exc)
+
+
+@shared_task(soft_time_limit=600, time_limit=660)
+def generate_certificate_batch(certificate_ids):
+    return generate_batch(certificate_ids)
+
+
+@shared_task(soft_time_limit=300, time_limit=360)
+def generate_phase_certificates(phase_id):
+    """Prépare les attestations de la phase puis répartit les lots entre les workers."""
+    prepare(phase_id)
+    batches = pending_batches(phase_id)
+    for certificate_ids in batches:
+        generate_certificate_batch.delay(certificate_ids)
+    return len(batches)
+
+
+@shared_task(soft_time_limit=300, time_limit=360)
+def generate_exam_booklets(job_id, exam_id, variants, personalized=False, region=None):
+    """Prépare les livrets d'un examen puis répartit les documents entre les workers."""
+    try:
+        content, specs = plan_job(job_id, exam_id, variants, personalized, region)
+    except Exception as exc:
+        fail_booklets_job(job_id, exam_id, exc)
+        raise
+    for index, spec in enumerate(specs):
+        render_booklet_document.delay(job_id, index, content, spec)
+    return len(specs)
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=30, soft_time_limit=600, time_limit=660)
+def render_booklet_document(self, job_id, index, content, spec):
+    try:
+        name, _ = build_document(content, spec)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            logger.error('Livret %s abandonné : %s', spec, exc)
+            record_document(job_id, index)
+            raise
+        raise self.retry(exc=exc)
+    record_document(job_id, index, name)
+    return name
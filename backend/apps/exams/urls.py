@@ -18,6 +18,7 @@ urlpatterns = [
     path('session/<int:session_id>/answer/', views.SubmitAnswerView.as_view(), name='submit-answer'),
     path('session/<int:session_id>/finish/', views.FinishExamView.as_view(), name='finish-exam'),
     path('my-sessions/', views.MyExamSessionsView.as_view(), name='my-sessions'),
+    path('my-certificates/', views.MyCertificatesView.as_view(), name='my-certificates'),
 
     # Router
     path('', include(router.urls)),
@@ -14,10 +14,14 @@ from rest_framework.response import Response
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 
+from apps.accounts.authentication import StatelessJWTAuthentication
+from apps.candidates.models import CandidateProfile
+from apps.conditional import ConditionalGetMixin
+from apps.exports import export_response
 from apps.permissions import IsAdmin, IsStudent, ReadOnly
 from .models import (
     Edition, Phase, QuestionCategory, Question, QuestionOption,
-    Exam, ExamQuestion, ExamSession, ExamAnswer,
+    Exam, ExamQuestion, ExamSession, ExamAnswer, Certificate,
 )
 from .serializers import (
     EditionSerializer, PhaseSerializer,
@@ -25,15 +29,20 @@ from .serializers import (
     ExamSerializer, ExamDetailSerializer,
     ExamQuestionPublicSerializer,
     ExamSessionSerializer, ExamAnswerSerializer, SubmitAnswerSerializer,
+    ResultsExportSerializer, CertificateSerializer, BookletsSerializer,
+    sessions_counts,
 )
+from . import booklets, certificates, results_export
+from .tasks import generate_phase_certificates
 
 
 # ──────────────────────────────────────────────
 # EDITIONS & PHASES (lecture publique, écriture admin)
 # ──────────────────────────────────────────────
-class EditionViewSet(viewsets.ModelViewSet):
+class EditionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Edition.objects.all()
     serializer_class = EditionSerializer
+    conditional_tags = ('exams.edition', 'exams.phase')  # phases_count
 
     def get_permissions(self):
         if self.action in ('list', 'retrieve'):
@@ -49,9 +58,10 @@ class EditionViewSet(viewsets.ModelViewSet):
         return Response(EditionSerializer(edition).data)
 
 
-class PhaseViewSet(viewsets.ModelViewSet):
+class PhaseViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Phase.objects.select_related('edition').all()
     serializer_class = PhaseSerializer
+    conditional_tags = ('exams.phase', 'exams.edition')  # edition_title
     filterset_fields = ['edition', 'status']
 
     def get_permissions(self):
@@ -59,6 +69,18 @@ class PhaseViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [IsAdmin()]
 
+    @action(detail=True, methods=['get', 'post'])
+    def certificates(self, request, pk=None):
+        """
+        GET : avancement des attestations de la phase.
+        POST : lance (ou reprend) leur génération par les workers Celery.
+        """
+        phase = self.get_object()
+        if request.method == 'POST':
+            generate_phase_certificates.delay(phase.pk)
+            return Response(certificates.progress(phase.pk), status=status.HTTP_202_ACCEPTED)
+        return Response(certificates.progress(phase.pk))
+
 
 # ──────────────────────────────────────────────
 # QUESTIONS (admin uniquement)
@@ -69,9 +91,11 @@ class QuestionCategoryViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdmin]
 
 
-class QuestionViewSet(viewsets.ModelViewSet):
+class QuestionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Question.objects.select_related('category').prefetch_related('options').all()
     permission_classes = [IsAdmin]
+    last_modified_field = 'updated_at'
+    conditional_tags = ('exams.questionoption', 'exams.questioncategory')  # options, category_name
     filterset_fields = ['category', 'difficulty', 'is_active']
     search_fields = ['text']
     ordering_fields = ['created_at', 'difficulty', 'usage_count']
@@ -272,8 +296,14 @@ class QuestionViewSet(viewsets.ModelViewSet):
 # ──────────────────────────────────────────────
 # EXAMENS (admin: CRUD, étudiant: voir les siens)
 # ──────────────────────────────────────────────
-class ExamViewSet(viewsets.ModelViewSet):
+class ExamViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Exam.objects.select_related('phase').all()
+    authentication_classes = [StatelessJWTAuthentication]
+    # phase_title ; questions du détail admin
+    conditional_tags = (
+        'exams.exam', 'exams.phase', 'exams.examquestion',
+        'exams.question', 'exams.questionoption', 'exams.questioncategory',
+    )
     filterset_fields = ['phase', 'status']
     ordering_fields = ['start_datetime', 'created_at']
 
@@ -282,17 +312,52 @@ class ExamViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated()]
         return [IsAdmin()]
 
+    def get_conditional_extra(self):
+        # sessions_count (agrégat en cache) : seul l'ETag des administrateurs en dépend
+        if self.get_conditional_scope() == 'staff':
+            return sessions_counts()['stamp']
+        return None
+
     def get_serializer_class(self):
         if self.action == 'retrieve' and self.request.user.role in ('admin', 'moderator'):
             return ExamDetailSerializer
         return ExamSerializer
 
+    @action(detail=True, methods=['post'], serializer_class=BookletsSerializer)
+    def booklets(self, request, pk=None):
+        """
+        Livrets imprimables (livret, corrigé, feuille de réponses par variante)
+        pour les centres hors ligne. Générés par Celery : 202 + ``job_id``.
+        """
+        exam = self.get_object()
+        params = BookletsSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        job_id = booklets.start_job(
+            exam.pk, params.validated_data['variants'],
+            params.validated_data['personalized'], params.validated_data.get('region'),
+        )
+        if job_id is None:
+            return Response({'detail': 'Une génération des livrets est déjà en cours pour cet examen.'},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({'job_id': job_id, 'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path=r'booklets/(?P<job_id>[0-9a-f]{32})')
+    def booklets_status(self, request, pk=None, job_id=None):
+        """Avancement de la génération (URL signées des PDF une fois terminée)."""
+        state = booklets.job_status(job_id, self.get_object().pk)
+        if state is None:
+            return Response({'detail': 'Génération inconnue ou expirée.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(state)
+
 
 # ──────────────────────────────────────────────
 # SESSION D'EXAMEN (candidat)
+# Endpoints chauds : authentification sans requête utilisateur,
+# request.user est un OAIBTokenUser (id / role / email issus du jeton).
 # ──────────────────────────────────────────────
 class StartExamView(generics.CreateAPIView):
     """Le candidat démarre un examen."""
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsStudent]
 
     def create(self, request, exam_id=None):
@@ -304,7 +369,7 @@ class StartExamView(generics.CreateAPIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        profile = request.user.candidate_profile
+        profile = CandidateProfile.objects.get(user_id=request.user.id)
         session, created = ExamSession.objects.get_or_create(
             candidate=profile,
             exam=exam,
@@ -336,6 +401,7 @@ class StartExamView(generics.CreateAPIView):
 class SubmitAnswerView(generics.GenericAPIView):
     """Le candidat soumet une réponse."""
     serializer_class = SubmitAnswerSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsStudent]
 
     def post(self, request, session_id=None):
@@ -345,7 +411,7 @@ class SubmitAnswerView(generics.GenericAPIView):
         try:
             session = ExamSession.objects.get(
                 pk=session_id,
-                candidate__user=request.user,
+                candidate__user_id=request.user.id,
                 status=ExamSession.Status.IN_PROGRESS,
             )
         except ExamSession.DoesNotExist:
@@ -377,13 +443,14 @@ class SubmitAnswerView(generics.GenericAPIView):
 
 class FinishExamView(generics.GenericAPIView):
     """Le candidat termine un examen."""
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsStudent]
 
     def post(self, request, session_id=None):
         try:
             session = ExamSession.objects.get(
                 pk=session_id,
-                candidate__user=request.user,
+                candidate__user_id=request.user.id,
                 status=ExamSession.Status.IN_PROGRESS,
             )
         except ExamSession.DoesNotExist:
@@ -416,12 +483,33 @@ class FinishExamView(generics.GenericAPIView):
 class MyExamSessionsView(generics.ListAPIView):
     """Le candidat voit toutes ses sessions."""
     serializer_class = ExamSessionSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsStudent]
 
     def get_queryset(self):
         return ExamSession.objects.filter(
-            candidate__user=self.request.user,
-        ).select_related('exam')
+            candidate__user_id=self.request.user.id,
+        ).select_related('exam', 'candidate__user')
+
+
+class MyCertificatesView(generics.ListAPIView):
+    """Le candidat voit ses attestations."""
+    serializer_class = CertificateSerializer
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated, IsStudent]
+    pagination_class = None
+
+    def get_queryset(self):
+        return Certificate.objects.filter(
+            session__candidate__user_id=self.request.user.id,
+            status=Certificate.Status.GENERATED,
+        ).select_related('session__exam')
+
+    def list(self, request, *args, **kwargs):
+        items = list(self.get_queryset())
+        # Une seule signature groupée pour toutes les attestations
+        Certificate._meta.get_field('file').storage.prime_signed_urls([c.file.name for c in items])
+        return Response(self.get_serializer(items, many=True).data)
 
 
 # ──────────────────────────────────────────────
@@ -435,6 +523,37 @@ class ExamSessionAdminViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['exam', 'status', 'candidate']
     ordering_fields = ['percentage', 'started_at', 'score']
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Résultats d'un examen (``?exam=``) ou d'une phase (``?phase=``) en CSV ou
+        XLSX (``?file_format=``). Avec ``?async=1``, ou au-delà de
+        ``ASYNC_THRESHOLD`` sessions : généré par Celery, réponse 202 + ``job_id``.
+        """
+        params = ResultsExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        exam_id = params.validated_data.get('exam')
+        phase_id = params.validated_data.get('phase')
+        file_format = params.validated_data['file_format']
+
+        queryset = results_export.results_queryset(exam_id, phase_id)
+        if params.validated_data['run_async'] or queryset.count() > results_export.ASYNC_THRESHOLD:
+            job_id = results_export.start_job(exam_id, phase_id, file_format)
+            return Response({'job_id': job_id, 'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+
+        return export_response(
+            queryset, results_export.results_columns(), file_format,
+            results_export.export_basename(exam_id, phase_id), 'Résultats',
+        )
+
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<job_id>[0-9a-f]{32})')
+    def export_status(self, request, job_id=None):
+        """État d'un export en tâche de fond (URL signée une fois prêt)."""
+        state = results_export.job_status(job_id)
+        if state is None:
+            return Response({'detail': 'Export inconnu ou expiré.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(state)
+
     @action(detail=False, methods=['get'])
     def exam_stats(self, request):
         """Statistiques par examen."""
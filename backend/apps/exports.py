@@ -0,0 +1,209 @@
+"""
+Exports tabulaires (CSV, XLSX) en mémoire constante.
+
+Les lignes sont lues par ``values_list(...).iterator(chunk_size=...)`` (curseur
+côté serveur sur PostgreSQL), sans instancier de modèles :
+
+- CSV : envoyé au client au fil de la lecture (``StreamingHttpResponse``) ;
+- XLSX : classeur openpyxl « write-only », lignes écrites au fur et à mesure
+  dans un fichier temporaire, envoyé une fois le classeur fermé. Le classeur
+  n'est complet qu'à la fin : au-delà d'un seuil, les vues le font générer par
+  Celery (voir « Exports en tâche de fond »).
+
+Le format est choisi par ``?file_format=csv|xlsx`` (``format`` est réservé par DRF).
+Injection de formules : en CSV, les textes qui commencent comme une formule
+sont préfixés d'une apostrophe (pas les numéros ``+229…`` ni les nombres
+signés) ; en XLSX, ils sont écrits en texte (``quotePrefix``), sans préfixe.
+"""
+import csv
+import re
+import tempfile
+
+from django.core.cache import cache
+from django.core.files import File
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from rest_framework import serializers
+
+from apps.storage.models import ExpiringFile
+from config.supabase_storage import CandidateDocumentStorage
+
+CHUNK_SIZE = 2000
+CSV_BATCH_ROWS = 500  # lignes regroupées par bloc envoyé
+FORMATS = ('csv', 'xlsx')
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+FORMULA_PREFIXES = ('=', '@', '\t', '\r')
+# « + » / « - » suivis seulement de chiffres et de ponctuation : téléphone
+# E.164, nombre signé ; un tableur n'y trouve aucune fonction à exécuter
+SIGNED_NUMBER = re.compile(r'[+-][\d\s.,()/+-]*')
+EXPORT_JOB_TTL = 24 * 60 * 60
+EXPORTS_PREFIX = 'exports/'
+
+
+class Column:
+    """
+    Colonne d'export : en-tête, champ pour ``values_list`` et mise en forme
+    optionnelle. Plusieurs colonnes peuvent lire le même champ (JSON éclaté).
+    """
+
+    def __init__(self, header, field, format=None):
+        self.header = header
+        self.field = field
+        self.format = format
+
+
+def choice_label(choices):
+    labels = dict(choices)
+    return lambda value: labels.get(value, value)
+
+
+def local_datetime(value):
+    # Excel ne gère pas les fuseaux horaires : heure locale, sans tzinfo
+    return timezone.localtime(value).replace(tzinfo=None, microsecond=0) if value else None
+
+
+def requested_format(request, default='csv'):
+    file_format = request.query_params.get('file_format', default).lower()
+    if file_format not in FORMATS:
+        raise serializers.ValidationError({'file_format': f"Formats acceptés : {', '.join(FORMATS)}."})
+    return file_format
+
+
+def looks_like_formula(value):
+    if not isinstance(value, str):
+        return False
+    if value.startswith(FORMULA_PREFIXES):
+        return True
+    return value.startswith(('+', '-')) and not SIGNED_NUMBER.fullmatch(value)
+
+
+def safe_cell(value):
+    """CSV : neutralise une chaîne interprétable comme formule par un tableur."""
+    return f"'{value}" if looks_like_formula(value) else value
+
+
+def iter_rows(queryset, columns, chunk_size=CHUNK_SIZE):
+    fields = list(dict.fromkeys(column.field for column in columns))
+    getters = [(fields.index(column.field), column.format) for column in columns]
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        yield [format(row[i]) if format else row[i] for i, format in getters]
+
+
+class _Echo:
+    """Pseudo-fichier : ``csv.writer`` retourne la ligne au lieu de l'écrire."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_stream(columns, rows):
+    writer = csv.writer(_Echo(), delimiter=';')  # séparateur attendu par Excel en français
+    batch = ['\ufeff' + writer.writerow([column.header for column in columns])]  # BOM : accents dans Excel
+    for row in rows:
+        batch.append(writer.writerow([safe_cell(value) for value in row]))
+        if len(batch) >= CSV_BATCH_ROWS:
+            yield ''.join(batch)
+            batch.clear()
+    yield ''.join(batch)
+
+
+def _xlsx_text(sheet, value):
+    # openpyxl écrirait « =… » comme une formule : cellule texte, marquée comme
+    # saisie avec apostrophe (la valeur reste intacte)
+    cell = WriteOnlyCell(sheet, value=value)
+    cell.data_type = 's'
+    cell.quotePrefix = True
+    return cell
+
+
+def _xlsx_file(columns, rows, sheet_title):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    header_font = Font(bold=True, color='FFFFFF')
+    header_fill = PatternFill(start_color='1A535C', end_color='1A535C', fill_type='solid')
+    header = []
+    for column in columns:
+        cell = WriteOnlyCell(sheet, value=column.header)
+        cell.font = header_font
+        cell.fill = header_fill
+        header.append(cell)
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_xlsx_text(sheet, value) if looks_like_formula(value) else value for value in row])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def export_filename(basename, file_format):
+    return f'{basename}_{timezone.localtime():%Y%m%d_%H%M}.{file_format}'
+
+
+def export_file(queryset, columns, file_format, sheet_title='Export'):
+    """Export écrit dans un fichier temporaire (tâches Celery), positionné au début."""
+    rows = iter_rows(queryset, columns)
+    if file_format == 'xlsx':
+        return _xlsx_file(columns, rows, sheet_title)
+    output = tempfile.TemporaryFile()
+    for block in _csv_stream(columns, rows):
+        output.write(block.encode('utf-8'))
+    output.seek(0)
+    return output
+
+
+def export_response(queryset, columns, file_format, basename, sheet_title='Export'):
+    """Réponse de téléchargement ``{basename}_{date}.{csv|xlsx}``."""
+    filename = export_filename(basename, file_format)
+    rows = iter_rows(queryset, columns)
+    if file_format == 'xlsx':
+        return FileResponse(
+            _xlsx_file(columns, rows, sheet_title),
+            as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE,
+        )
+    response = StreamingHttpResponse(_csv_stream(columns, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# ── Exports en tâche de fond ──────────────────
+# Fichier déposé dans le bucket privé sous ``exports/<kind>/<job_id>/`` et
+# supprimé par ``purge_expired_files`` quand l'état du travail expire.
+def export_job_key(kind, job_id):
+    return f'{kind}_export:{job_id}'
+
+
+def create_export_job(kind, job_id):
+    cache.set(export_job_key(kind, job_id), {'status': 'pending'}, EXPORT_JOB_TTL)
+
+
+def store_export(kind, job_id, output, filename):
+    """Dépose le fichier de l'export et marque le travail terminé ; retourne le chemin."""
+    storage = CandidateDocumentStorage()
+    name = f'{EXPORTS_PREFIX}{kind}/{job_id}/{filename}'
+    # Avant l'envoi : le fichier est suivi même si le worker s'arrête
+    ExpiringFile.register(storage, name, EXPORT_JOB_TTL)
+    with output:
+        name = storage.save(name, File(output), deduplicate=False)
+    cache.set(export_job_key(kind, job_id), {'status': 'done', 'name': name, 'filename': filename}, EXPORT_JOB_TTL)
+    return name
+
+
+def fail_export_job(kind, job_id, error):
+    cache.set(export_job_key(kind, job_id), {'status': 'failed', 'error': str(error)}, EXPORT_JOB_TTL)
+
+
+def export_job_status(kind, job_id):
+    """``{'status': pending|done|failed, ...}`` avec l'URL signée une fois prêt, ou ``None``."""
+    state = cache.get(export_job_key(kind, job_id))
+    if state is None or state['status'] != 'done':
+        return state
+    return {
+        'status': 'done',
+        'filename': state['filename'],
+        'url': CandidateDocumentStorage().signed_url(state['name']),
+    }
@@ -0,0 +1,182 @@
+"""
+Variantes redimensionnées des images publiques (actualités, logos,
+témoignages, avatars).
+
+Pour chaque original, des variantes WebP et JPEG sont générées aux largeurs
+de ``VARIANT_WIDTHS`` (sans agrandissement), sans métadonnées EXIF, et
+stockées à côté de l'original sous un nom déterministe :
+``news/photo.jpg`` -> ``news/photo__w640.webp``. La génération est donc
+idempotente. La liste des variantes disponibles (manifeste) est enregistrée
+sur la ligne, dans le champ JSON ``<champ>_variants`` voisin du champ image :
+``{'name': fichier source, 'variants': {ext: [largeurs]}}``. Elle alimente le
+champ ``srcset`` des serializers et ne vaut que pour le fichier ``name``.
+Quand une image remplacée reçoit son nouveau manifeste, les variantes de
+l'ancienne sont supprimées du stockage.
+"""
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from apps.response_cache import invalidate_tags, tag_for_model
+from config.supabase_storage import SupabaseStorage
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+# Champs image suivis : label du modèle -> noms des champs (voir register_image_fields)
+IMAGE_FIELDS = {}
+# label du modèle -> tags de réponses à invalider quand les variantes sont prêtes
+_RESPONSE_TAGS = {}
+
+
+def variant_name(name, width, ext):
+    root, _ = os.path.splitext(name)
+    return f'{root}__w{width}.{ext}'
+
+
+def manifest_field(field_name):
+    return f'{field_name}_variants'
+
+
+def get_manifest(instance, field_name):
+    """``{ext: [largeurs]}`` des variantes du fichier courant, ou ``None``."""
+    field_file = getattr(instance, field_name)
+    stored = getattr(instance, manifest_field(field_name))
+    if not field_file or not stored or stored.get('name') != field_file.name:
+        return None
+    return stored['variants']
+
+
+def _encode(image, fmt, options):
+    buffer = io.BytesIO()
+    # Aucune info EXIF n'est transmise à save() : elles sont supprimées
+    image.save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+def _save_variant(storage, name, content):
+    # Nom déterministe (calculé par build_srcset) : pas de déduplication
+    if isinstance(storage, SupabaseStorage):
+        return storage.save(name, content, deduplicate=False)
+    return storage.save(name, content)
+
+
+def generate_variants(storage, name):
+    """Génère les variantes manquantes de ``name`` ; retourne le manifeste ``{ext: [largeurs]}``."""
+    with storage.open(name, 'rb') as original:
+        source = Image.open(original)
+        source.load()
+    source = ImageOps.exif_transpose(source)
+
+    widths = [w for w in VARIANT_WIDTHS if w < source.width] or [source.width]
+    manifest = {}
+    for ext, fmt, options in VARIANT_FORMATS:
+        for width in widths:
+            target = variant_name(name, width, ext)
+            if not storage.exists(target):
+                height = round(source.height * width / source.width)
+                resized = source.resize((width, height), Image.LANCZOS)
+                if fmt == 'JPEG' and resized.mode not in ('RGB', 'L'):
+                    resized = resized.convert('RGB')
+                _save_variant(storage, target, ContentFile(_encode(resized, fmt, options)))
+            manifest.setdefault(ext, []).append(width)
+    return manifest
+
+
+def delete_variants(storage, stored):
+    """Supprime les fichiers d'un manifeste ``{'name', 'variants'}``."""
+    for ext, widths in stored['variants'].items():
+        for width in widths:
+            storage.delete(variant_name(stored['name'], width, ext))
+
+
+def save_manifest(instance, field_name, manifest):
+    """
+    Enregistre le manifeste, sauf si l'image a été remplacée entre-temps, puis
+    supprime les variantes de l'image précédente.
+    """
+    field_file = getattr(instance, field_name)
+    stored = {'name': field_file.name, 'variants': manifest}
+    rows = instance.__class__.objects.filter(pk=instance.pk, **{field_name: field_file.name})
+    with transaction.atomic():
+        row = rows.select_for_update().values(manifest_field(field_name)).first()
+        if row is None:
+            return False
+        # update() : pas de post_save, donc pas de nouvelle génération
+        rows.update(**{manifest_field(field_name): stored})
+    setattr(instance, manifest_field(field_name), stored)
+    previous = row[manifest_field(field_name)]
+    if previous and previous.get('name') != field_file.name:
+        delete_variants(field_file.storage, previous)
+    return True
+
+
+def invalidate_responses(instance):
+    """Les réponses en cache ne contiennent pas encore le ``srcset`` : les invalider."""
+    tags = [tag_for_model(instance.__class__)]
+    extra = _RESPONSE_TAGS.get(instance._meta.label_lower)
+    if extra is not None:
+        tags.extend(extra(instance))
+    invalidate_tags(*tags)
+
+
+def build_srcset(field_file):
+    """``{'webp': 'url 320w, ...', 'jpg': ...}`` ou ``None`` tant que rien n'est généré."""
+    if not field_file:
+        return None
+    manifest = get_manifest(field_file.instance, field_file.field.name)
+    if not manifest:
+        return None
+    storage = field_file.storage
+    return {
+        ext: ', '.join(f'{storage.url(variant_name(field_file.name, w, ext))} {w}w' for w in widths)
+        for ext, widths in manifest.items()
+    }
+
+
+class SrcsetField(serializers.Field):
+    """Champ en lecture seule exposant les variantes d'un champ image."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return build_srcset(value)
+
+
+# ── Déclenchement à l'upload ──────────────────────────────────
+def _schedule(sender, instance, **kwargs):
+    from apps.cms.tasks import generate_image_variants
+
+    label = sender._meta.label_lower
+    for field_name in IMAGE_FIELDS.get(label, ()):
+        # Comparaison avec le manifeste de la ligne : ni cache ni requête
+        if getattr(instance, field_name) and get_manifest(instance, field_name) is None:
+            transaction.on_commit(
+                lambda pk=instance.pk, field_name=field_name:
+                    generate_image_variants.delay(label, pk, field_name)
+            )
+
+
+def register_image_fields(model, *field_names, response_tags=None):
+    """
+    Génère les variantes de ces champs après chaque ``save()`` qui change l'image.
+    Chaque champ doit avoir son champ JSON ``<champ>_variants``.
+    ``response_tags(instance)`` : tags supplémentaires à invalider (``srcset`` exposé ailleurs).
+    """
+    for field_name in field_names:
+        model._meta.get_field(manifest_field(field_name))
+    label = model._meta.label_lower
+    IMAGE_FIELDS[label] = field_names
+    if response_tags is not None:
+        _RESPONSE_TAGS[label] = response_tags
+    post_save.connect(_schedule, sender=model, dispatch_uid=f'image_variants:{label}')
@@ -0,0 +1,80 @@
+"""
+Métriques applicatives partagées entre workers web et Celery.
+
+Les compteurs sont stockés dans le cache (Redis en production) pour être
+agrégés entre processus. Chaque métrique s'enregistre à l'import du module
+qui la déclare ; ``snapshot()`` lit toutes les valeurs en un seul ``get_many``.
+"""
+from django.core.cache import cache
+
+REGISTRY = {}
+_PREFIX = 'metrics:'
+
+
+def _incr(key, amount):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, amount)
+    except ValueError:  # clé évincée entre add et incr
+        cache.set(key, amount, None)
+
+
+class Counter:
+    """Compteur monotone."""
+
+    def __init__(self, name, description=''):
+        self.name = name
+        self.description = description
+        self.key = f'{_PREFIX}{name}'
+        REGISTRY[name] = self
+
+    def inc(self, amount=1):
+        if amount:
+            _incr(self.key, amount)
+
+    def keys(self):
+        return [self.key]
+
+    def collect(self, values):
+        return values.get(self.key, 0)
+
+
+class Histogram:
+    """
+    Distribution de durées (secondes) par tranches. Chaque observation
+    incrémente sa tranche et la somme (en millisecondes) : deux écritures.
+    """
+
+    DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self, name, description='', buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_keys = [f'{_PREFIX}{name}:le:{bound}' for bound in self.buckets]
+        self.bucket_keys.append(f'{_PREFIX}{name}:le:inf')
+        self.sum_key = f'{_PREFIX}{name}:sum_ms'
+        REGISTRY[name] = self
+
+    def observe(self, seconds):
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        _incr(self.bucket_keys[index], 1)
+        _incr(self.sum_key, round(seconds * 1000))
+
+    def keys(self):
+        return [*self.bucket_keys, self.sum_key]
+
+    def collect(self, values):
+        """Tranches cumulées (comme Prometheus), nombre et somme des observations."""
+        cumulative, total = {}, 0
+        for bound, key in zip((*self.buckets, 'inf'), self.bucket_keys):
+            total += values.get(key, 0)
+            cumulative[str(bound)] = total
+        return {'count': total, 'sum_ms': values.get(self.sum_key, 0), 'buckets': cumulative}
+
+
+def snapshot():
+    """Valeurs courantes de toutes les métriques déclarées."""
+    keys = [key for metric in REGISTRY.values() for key in metric.keys()]
+    values = cache.get_many(keys)
+    return {name: metric.collect(values) for name, metric in sorted(REGISTRY.items())}
@@ -0,0 +1,26 @@
+"""
+Polices des PDF générés avec reportlab.
+
+Les polices Type 1 intégrées (Helvetica…) ne couvrent que WinAnsi : exposants,
+symboles mathématiques ou lettres hors Europe de l'Ouest s'impriment en carrés
+noirs. DejaVu Sans (``settings.PDF_FONT_DIR``) couvre l'Unicode courant ; elle
+est enregistrée une fois par processus et incorporée (sous-ensemble) au PDF.
+"""
+import os
+
+from django.conf import settings
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+REGULAR = 'DejaVuSans'
+BOLD = 'DejaVuSans-Bold'
+_FILES = {REGULAR: 'DejaVuSans.ttf', BOLD: 'DejaVuSans-Bold.ttf'}
+
+
+def register_fonts():
+    """Enregistre les polices auprès de reportlab (sans effet si déjà fait) ; retourne ``(normale, grasse)``."""
+    registered = pdfmetrics.getRegisteredFontNames()
+    for name, filename in _FILES.items():
+        if name not in registered:
+            pdfmetrics.registerFont(TTFont(name, os.path.join(settings.PDF_FONT_DIR, filename)))
+    return REGULAR, BOLD
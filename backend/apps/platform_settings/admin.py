@@ -4,7 +4,7 @@ from .models import PlatformSettings
 
 @admin.register(PlatformSettings)
 class PlatformSettingsAdmin(admin.ModelAdmin):
-    list_display = ('site_name', 'registration_open', 'maintenance_mode', 'updated_at')
+    list_display = ('site_name', 'registration_open', 'registration_surge_mode', 'maintenance_mode', 'degraded_mode', 'updated_at')
 
     def has_add_permission(self, request):
         return not PlatformSettings.objects.exists()
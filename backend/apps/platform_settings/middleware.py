@@ -0,0 +1,134 @@
+"""
+Mode maintenance et mode dégradé, pilotés par ``PlatformSettings``.
+
+- ``maintenance_mode`` : l'API passe en lecture seule. Les écritures des
+  non-administrateurs reçoivent un 503 avec ``Retry-After``. Le rôle est lu
+  dans le jeton JWT (aucune requête BDD).
+- ``degraded_mode`` : les GET anonymes des endpoints publics (accueil, CMS,
+  ressources, paramètres publics) sont servis depuis la dernière copie
+  mise en cache, sans atteindre la vue ni la BDD.
+
+Les copies sont enregistrées en fonctionnement normal, au plus une fois par
+``STALE_RESPONSE_REFRESH`` secondes et par URL dans chaque processus. Comme
+pour le cache de réponses, la clé ne retient que les paramètres lus par la
+vue ; une requête portant un autre paramètre n'a pas de copie.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.urls import Resolver404, resolve
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.response_cache import normalized_query, query_params_for
+from .models import PlatformSettings
+
+API_PREFIX = '/api/'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Toujours autorisés : un administrateur doit pouvoir se connecter pour lever la maintenance
+WRITE_EXEMPT_PATHS = (
+    '/api/v1/auth/login/',
+    '/api/v1/auth/token/refresh/',
+)
+
+PUBLIC_PREFIXES = (
+    '/api/v1/public/home/',
+    '/api/v1/cms/',
+    '/api/v1/resources/',
+    '/api/v1/settings/public/',
+)
+
+_STALE_PREFIX = 'stale_response:'
+_MAX_TRACKED = 2000
+
+# Dernier enregistrement d'une copie par URL (mémoire du processus)
+_last_stored = {}
+
+
+def _is_admin_token(request):
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    parts = header.split()
+    if len(parts) != 2 or parts[0] != 'Bearer':
+        return False
+    try:
+        token = AccessToken(parts[1])
+    except TokenError:
+        return False
+    return token.get('role') in ('admin', 'moderator')
+
+
+def _stale_key(request):
+    """Clé de la copie (chemin + paramètres de la vue, triés) ; ``None`` si la requête n'en a pas."""
+    try:
+        func = resolve(request.path_info).func
+    except Resolver404:
+        return None
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    query = normalized_query(request, query_params_for(view_class))
+    if query is None:
+        return None
+    return f'{_STALE_PREFIX}{request.path}?{query}'
+
+
+def _is_public_anonymous_get(request):
+    return (
+        request.method == 'GET'
+        and 'HTTP_AUTHORIZATION' not in request.META
+        and request.path.startswith(PUBLIC_PREFIXES)
+    )
+
+
+class MaintenanceModeMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith(API_PREFIX):
+            return self.get_response(request)
+
+        platform_settings = PlatformSettings.get_cached()
+
+        if (
+            platform_settings.maintenance_mode
+            and request.method not in SAFE_METHODS
+            and request.path not in WRITE_EXEMPT_PATHS
+            and not _is_admin_token(request)
+        ):
+            response = JsonResponse(
+                {'detail': 'La plateforme est en maintenance. Réessayez dans quelques minutes.',
+                 'code': 'maintenance'},
+                status=503,
+            )
+            response['Retry-After'] = str(settings.MAINTENANCE_RETRY_AFTER)
+            return response
+
+        key = _stale_key(request) if _is_public_anonymous_get(request) else None
+        if key is None:
+            return self.get_response(request)
+
+        if platform_settings.degraded_mode:
+            stale = cache.get(key)
+            if stale is not None:
+                content, content_type = stale
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Cache'] = 'STALE'
+                return response
+
+        response = self.get_response(request)
+        self._store(key, response)
+        return response
+
+    def _store(self, key, response):
+        if response.status_code != 200 or response.streaming:
+            return
+        now = time.monotonic()
+        if now - _last_stored.get(key, float('-inf')) < settings.STALE_RESPONSE_REFRESH:
+            return
+        if len(_last_stored) >= _MAX_TRACKED:
+            _last_stored.clear()
+        _last_stored[key] = now
+        cache.set(key, (response.content, response.get('Content-Type')), settings.STALE_RESPONSE_TTL)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('platform_settings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='platformsettings',
+            name='registration_surge_mode',
+            field=models.BooleanField(default=False, help_text="Inscriptions admises par seau à jetons et traitées en file d'attente (réponse 202).", verbose_name='mode affluence (inscriptions)'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('platform_settings', '0002_registration_surge_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='platformsettings',
+            name='degraded_mode',
+            field=models.BooleanField(default=False, help_text='Les GET publics anonymes sont servis depuis la dernière copie en cache, sans toucher la BDD.', verbose_name='mode dégradé'),
+        ),
+        migrations.AlterField(
+            model_name='platformsettings',
+            name='maintenance_mode',
+            field=models.BooleanField(default=False, help_text='Lecture seule : les écritures hors administrateurs sont refusées (503).', verbose_name='mode maintenance'),
+        ),
+    ]
@@ -1,9 +1,18 @@
-from django.db import models
+import uuid
+
+from django.core.cache import cache
+from django.db import models, transaction
+
+# Copie du singleton en memoire du processus : (version, instance)
+_process_copy = (None, None)
 
 
 class PlatformSettings(models.Model):
     """Parametres globaux de la plateforme (singleton)."""
 
+    # Version partagee entre workers, changee a chaque save()
+    VERSION_KEY = 'platform_settings:version'
+
     # General
     site_name = models.CharField(
         'nom du site', max_length=200,
@@ -15,7 +24,18 @@ class PlatformSettings(models.Model):
 
     # Registration
     registration_open = models.BooleanField('inscriptions ouvertes', default=True)
-    maintenance_mode = models.BooleanField('mode maintenance', default=False)
+    registration_surge_mode = models.BooleanField(
+        'mode affluence (inscriptions)', default=False,
+        help_text="Inscriptions admises par seau à jetons et traitées en file d'attente (réponse 202).",
+    )
+    maintenance_mode = models.BooleanField(
+        'mode maintenance', default=False,
+        help_text="Lecture seule : les écritures hors administrateurs sont refusées (503).",
+    )
+    degraded_mode = models.BooleanField(
+        'mode dégradé', default=False,
+        help_text="Les GET publics anonymes sont servis depuis la dernière copie en cache, sans toucher la BDD.",
+    )
 
     # File upload
     max_file_size_mb = models.PositiveSmallIntegerField(
@@ -45,8 +65,41 @@ class PlatformSettings(models.Model):
     def save(self, *args, **kwargs):
         self.pk = 1
         super().save(*args, **kwargs)
+        # Apres commit : un worker ne doit pas recharger l'ancienne ligne sous la nouvelle version
+        transaction.on_commit(self.bump_cache_version)
+
+    @classmethod
+    def bump_cache_version(cls):
+        cache.set(cls.VERSION_KEY, uuid.uuid4().hex, None)
 
     @classmethod
     def get_settings(cls):
         obj, _ = cls.objects.get_or_create(pk=1)
         return obj
+
+    @classmethod
+    def get_cached(cls, version=None):
+        """
+        Singleton garde en memoire du processus.
+
+        Coute une lecture de cache (la cle de version) ; la BDD n'est relue
+        que lorsque la version a change. ``version`` permet a l'appelant de
+        passer une version deja lue (ex. dans un ``get_many`` groupe).
+        """
+        global _process_copy
+        if version is None:
+            version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            # Cache vide (redemarrage Redis) : publier une version, ou reprendre celle d'un autre worker
+            version = uuid.uuid4().hex
+            if not cache.add(cls.VERSION_KEY, version, None):
+                version = cache.get(cls.VERSION_KEY, version)
+
+        local_version, obj = _process_copy
+        if obj is None or local_version != version:
+            obj = cls.get_settings()
+            _process_copy = (version, obj)
+        return obj
+
+    def get_security_setting(self, name, default=None):
+        return (self.security_settings or {}).get(name, default)
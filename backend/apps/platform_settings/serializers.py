@@ -10,7 +10,7 @@ class PlatformSettingsSerializer(serializers.ModelSerializer):
         fields = [
             'site_name', 'site_description',
             'contact_email', 'support_email',
-            'registration_open', 'maintenance_mode',
+            'registration_open', 'registration_surge_mode', 'maintenance_mode', 'degraded_mode',
             'max_file_size_mb', 'allowed_file_types',
             'security_settings', 'updated_at',
         ]
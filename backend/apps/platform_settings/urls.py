@@ -6,4 +6,5 @@ from . import views
 urlpatterns = [
     path('public/', views.PlatformSettingsPublicView.as_view(), name='settings-public'),
     path('admin/', views.PlatformSettingsAdminView.as_view(), name='settings-admin'),
+    path('metrics/', views.MetricsView.as_view(), name='settings-metrics'),
 ]
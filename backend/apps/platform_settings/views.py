@@ -1,19 +1,40 @@
 """Views pour l'app platform_settings."""
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 
+from apps import metrics
 from apps.permissions import IsAdmin
 from .models import PlatformSettings
 from .serializers import PlatformSettingsSerializer, PlatformSettingsPublicSerializer
 
 
 class PlatformSettingsPublicView(generics.RetrieveAPIView):
-    """Paramètres publics de la plateforme (accessible à tous)."""
+    """
+    Paramètres publics de la plateforme (accessible à tous).
+    Servis depuis la copie en mémoire du processus, avec ETag / Last-Modified.
+    """
     serializer_class = PlatformSettingsPublicSerializer
     permission_classes = [permissions.AllowAny]
 
     def get_object(self):
-        return PlatformSettings.get_settings()
+        return PlatformSettings.get_cached()
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = quote_etag(f'settings-{instance.updated_at.timestamp()}')
+        last_modified = int(instance.updated_at.timestamp())
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        response = Response(self.get_serializer(instance).data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'no-cache'
+        return response
 
 
 class PlatformSettingsAdminView(generics.RetrieveUpdateAPIView):
@@ -23,3 +44,11 @@ class PlatformSettingsAdminView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         return PlatformSettings.get_settings()
+
+
+class MetricsView(generics.GenericAPIView):
+    """Compteurs applicatifs (purges, écritures évitées, latences stockage...)."""
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
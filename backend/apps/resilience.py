@@ -0,0 +1,119 @@
+"""
+Appels vers des services distants (stockage Supabase) protégés contre les
+pannes et les lenteurs :
+
+- délai maximal par opération : ``call(timeout=...)`` le publie dans un
+  ``ContextVar`` que le client HTTP applique à chaque requête émise pendant
+  l'appel (voir ``current_timeout``) ;
+- nouvelles tentatives bornées, espacées par un backoff exponentiel avec
+  jitter complet (les workers ne réessaient pas tous au même instant) ;
+- disjoncteur : après plusieurs échecs consécutifs, les appels échouent
+  immédiatement pendant ``reset_timeout`` secondes au lieu de bloquer un
+  worker, puis un seul appel d'essai décide de la réouverture.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from apps.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+_timeout = contextvars.ContextVar('resilience_timeout', default=None)
+
+
+def current_timeout():
+    """Délai (secondes) de l'opération en cours, ou ``None``."""
+    return _timeout.get()
+
+
+class CircuitOpenError(Exception):
+    """Appel refusé sans contacter le service : le disjoncteur est ouvert."""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur propre au processus (fermé, ouvert, semi-ouvert).
+    ``failure_threshold`` échecs consécutifs l'ouvrent pour ``reset_timeout`` s.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.rejected = Counter(f'{name}.rejected', 'Appels refusés, disjoncteur ouvert')
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waiting = time.monotonic() - self._opened_at < self.reset_timeout
+            if waiting or self._probing:
+                self.rejected.inc()
+                raise CircuitOpenError(f'{self.name} indisponible (disjoncteur ouvert)')
+            self._probing = True  # semi-ouvert : cet appel sert d'essai
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info('Disjoncteur %s refermé', self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning('Disjoncteur %s ouvert après %s échecs', self.name, self._failures)
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+def call(breaker, func, timeout=None, retries=0, histogram=None, is_failure=None,
+         base_delay=0.2, max_delay=2.0):
+    """
+    Exécute ``func()`` sous la protection de ``breaker``.
+
+    ``is_failure(exc)`` : l'erreur traduit-elle une panne du service (réseau,
+    5xx) ? Les autres erreurs (404, validation) sont propagées sans nouvel
+    essai et ne comptent pas contre le disjoncteur.
+    """
+    attempt = 0
+    while True:
+        breaker.before_call()
+        token = _timeout.set(timeout)
+        start = time.perf_counter()
+        try:
+            result = func()
+        except Exception as exc:
+            if histogram is not None:
+                histogram.observe(time.perf_counter() - start)
+            if is_failure is not None and not is_failure(exc):
+                breaker.record_success()  # le service a répondu
+                raise
+            breaker.record_failure()
+            if attempt >= retries or breaker.is_open:
+                raise
+            attempt += 1
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            logger.info('%s : nouvel essai %s/%s dans %.2fs (%s)', breaker.name, attempt, retries, delay, exc)
+            time.sleep(delay)
+        else:
+            if histogram is not None:
+                histogram.observe(time.perf_counter() - start)
+            breaker.record_success()
+            return result
+        finally:
+            _timeout.reset(token)
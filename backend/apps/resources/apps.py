@@ -5,3 +5,6 @@ class ResourcesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.resources'
     verbose_name = 'Ressources'
+
+    def ready(self):
+        import apps.resources.signals  # noqa: F401
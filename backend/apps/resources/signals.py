@@ -0,0 +1,6 @@
+"""Signals pour l'app resources — invalidation du cache des réponses publiques."""
+from apps.response_cache import invalidate_on_change
+
+from .models import Resource
+
+invalidate_on_change(Resource)
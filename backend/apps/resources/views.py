@@ -1,12 +1,14 @@
 """Views pour l'app resources."""
 from rest_framework import permissions, viewsets
 
+from apps.conditional import ConditionalGetMixin
 from apps.permissions import IsAdmin
+from apps.response_cache import CachedResponseMixin
 from .models import Resource
 from .serializers import ResourceSerializer, ResourceListSerializer
 
 
-class ResourceViewSet(viewsets.ModelViewSet):
+class ResourceViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Resource.objects.all()
     filterset_fields = ['resource_type', 'category', 'phase', 'is_active']
     search_fields = ['title', 'description']
@@ -0,0 +1,160 @@
+"""
+Cache de réponses pour les GET anonymes des endpoints publics.
+
+Chaque réponse est stockée sous une clé construite à partir du chemin, des
+paramètres que la vue lit réellement (filtres, recherche, tri, page ; triés)
+et de la version courante de ses tags (un tag par modèle, ex.
+``cms.page``). Un ``post_save`` / ``post_delete`` remplace la version du tag :
+toutes les réponses qui en dépendent deviennent introuvables d'un coup et
+expirent d'elles-mêmes.
+
+Un hit renvoie les octets stockés depuis ``dispatch`` : ni authentification,
+ni throttling, ni sérialisation DRF, ni BDD (304 si l'ETag stocké correspond).
+Toute requête portant un en-tête ``Authorization`` (administrateurs,
+brouillons) ou un paramètre inconnu de la vue contourne le cache : une query
+string arbitraire (``?x=1``, ``?x=2``…) ne crée pas d'entrée.
+"""
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import urlencode
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.settings import api_settings
+
+RESPONSE_TTL = 10 * 60
+_TAG_PREFIX = 'response_cache:tag:'
+
+
+def tag_for_model(model):
+    return model._meta.label_lower
+
+
+def tag_key(tag):
+    """Clé de cache de la version d'un tag."""
+    return f'{_TAG_PREFIX}{tag}'
+
+
+def get_tag_versions(tags):
+    """Versions courantes des tags (un seul ``get_many``) ; publie celles qui manquent."""
+    keys = {tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    versions = {keys[key]: value for key, value in found.items()}
+    for key, tag in keys.items():
+        if tag not in versions:
+            version = uuid.uuid4().hex[:12]
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            versions[tag] = version
+    return versions
+
+
+def invalidate_tags(*tags):
+    """Invalide toutes les réponses portant l'un des tags (après commit)."""
+    def bump():
+        cache.set_many({tag_key(tag): uuid.uuid4().hex[:12] for tag in tags}, None)
+    transaction.on_commit(bump)
+
+
+def invalidate_on_change(*models):
+    """Branche ``post_save`` / ``post_delete`` des modèles sur l'invalidation de leur tag."""
+    for model in models:
+        def handler(sender, **kwargs):
+            invalidate_tags(tag_for_model(sender))
+        post_save.connect(handler, sender=model, weak=False,
+                          dispatch_uid=f'response_cache:save:{tag_for_model(model)}')
+        post_delete.connect(handler, sender=model, weak=False,
+                            dispatch_uid=f'response_cache:delete:{tag_for_model(model)}')
+
+
+def query_params_for(view_class):
+    """Paramètres de requête lus par une vue DRF : filtres, recherche, tri, pagination."""
+    params = set()
+    filterset_fields = getattr(view_class, 'filterset_fields', None) or ()
+    if isinstance(filterset_fields, dict):
+        for field, lookups in filterset_fields.items():
+            params.update(field if lookup == 'exact' else f'{field}__{lookup}' for lookup in lookups)
+    else:
+        params.update(filterset_fields)
+    filterset_class = getattr(view_class, 'filterset_class', None)
+    if filterset_class is not None:
+        params.update(filterset_class.base_filters)
+    backends = getattr(view_class, 'filter_backends', ())
+    if SearchFilter in backends and getattr(view_class, 'search_fields', None):
+        params.add(api_settings.SEARCH_PARAM)
+    if OrderingFilter in backends:
+        params.add(api_settings.ORDERING_PARAM)
+    paginator = getattr(view_class, 'pagination_class', None)
+    if paginator is not None:
+        for attr in ('page_query_param', 'page_size_query_param'):
+            if getattr(paginator, attr, None):
+                params.add(getattr(paginator, attr))
+    return params
+
+
+def normalized_query(request, allowed):
+    """Query string triée ; ``None`` si la requête porte un paramètre hors de ``allowed``."""
+    if not set(request.GET) <= allowed:
+        return None
+    return urlencode([(key, request.GET.getlist(key)) for key in sorted(request.GET)], doseq=True)
+
+
+class CachedResponseMixin:
+    """
+    Met en cache les GET anonymes d'une vue DRF.
+
+    ``cache_tags`` vaut par défaut le tag du modèle du ``queryset``.
+    """
+
+    cache_tags = None
+    cache_timeout = RESPONSE_TTL
+
+    def get_cache_tags(self):
+        if self.cache_tags is not None:
+            return self.cache_tags
+        return (tag_for_model(self.queryset.model),)
+
+    def _response_cache_key(self, request, query):
+        versions = get_tag_versions(self.get_cache_tags())
+        signature = ':'.join(f'{tag}={versions[tag]}' for tag in sorted(versions))
+        raw = f'{request.path}?{query}|{signature}'
+        return f'response_cache:page:{hashlib.md5(raw.encode()).hexdigest()}'
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or 'HTTP_AUTHORIZATION' in request.META:
+            return super().dispatch(request, *args, **kwargs)
+        query = normalized_query(request, query_params_for(type(self)))
+        if query is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        key = self._response_cache_key(request, query)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type, etag = cached
+            if etag:
+                not_modified = get_conditional_response(request, etag=etag)
+                if not_modified is not None:
+                    return not_modified
+            response = HttpResponse(content, content_type=content_type)
+            if etag:
+                response['ETag'] = etag
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = self.cache_timeout
+
+            def store(rendered):
+                cache.set(key, (rendered.content, rendered['Content-Type'], rendered.get('ETag')), timeout)
+
+            if hasattr(response, 'add_post_render_callback'):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+            response['X-Cache'] = 'MISS'
+        return response
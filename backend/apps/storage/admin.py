@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import ExpiringFile, StoredBlob
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'bucket', 'size_bytes', 'refcount', 'created_at')
+    list_filter = ('bucket',)
+    search_fields = ('name', 'sha256')
+    readonly_fields = ('bucket', 'sha256', 'name', 'size_bytes', 'refcount', 'created_at')
+
+
+@admin.register(ExpiringFile)
+class ExpiringFileAdmin(admin.ModelAdmin):
+    list_display = ('name', 'bucket', 'expires_at', 'created_at')
+    list_filter = ('bucket',)
+    search_fields = ('name',)
+    readonly_fields = ('bucket', 'name', 'expires_at', 'created_at')
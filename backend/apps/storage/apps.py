@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class StorageConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.storage'
+    verbose_name = 'Stockage'
+
+    def ready(self):
+        import apps.storage.signals  # noqa: F401
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.11 on 2026-10-19 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(max_length=63, verbose_name='bucket')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('name', models.CharField(max_length=500, verbose_name='chemin')),
+                ('size_bytes', models.PositiveBigIntegerField(default=0, verbose_name='taille (octets)')),
+                ('refcount', models.PositiveIntegerField(default=1, verbose_name='references')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='cree le')),
+            ],
+            options={
+                'verbose_name': 'objet stocke',
+                'verbose_name_plural': 'objets stockes',
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'sha256'), name='storedblob_unique_content'), models.UniqueConstraint(fields=('bucket', 'name'), name='storedblob_unique_name')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.11 on 2026-10-19 18:04
+
+import posixpath
+
+from django.db import migrations, models
+
+
+def fill_folder(apps, schema_editor):
+    StoredBlob = apps.get_model('storage', 'StoredBlob')
+    for blob in StoredBlob.objects.only('pk', 'name').iterator():
+        StoredBlob.objects.filter(pk=blob.pk).update(folder=posixpath.dirname(blob.name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='storedblob',
+            name='storedblob_unique_content',
+        ),
+        migrations.AddField(
+            model_name='storedblob',
+            name='folder',
+            field=models.CharField(blank=True, max_length=500, verbose_name='dossier'),
+        ),
+        migrations.RunPython(fill_folder, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='storedblob',
+            constraint=models.UniqueConstraint(fields=('bucket', 'folder', 'sha256'), name='storedblob_unique_content'),
+        ),
+    ]
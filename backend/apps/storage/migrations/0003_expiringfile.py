@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-19 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0002_storedblob_folder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpiringFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(max_length=63, verbose_name='bucket')),
+                ('name', models.CharField(max_length=500, verbose_name='chemin')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name="date d'expiration")),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='cree le')),
+            ],
+            options={
+                'verbose_name': 'fichier temporaire',
+                'verbose_name_plural': 'fichiers temporaires',
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'name'), name='expiringfile_unique_name')],
+            },
+        ),
+    ]
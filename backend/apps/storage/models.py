@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+class StoredBlob(models.Model):
+    """
+    Objet du stockage identifié par son contenu (SHA-256).
+
+    Un même contenu envoyé plusieurs fois dans un même dossier d'un bucket
+    réutilise l'objet existant : ``refcount`` compte les fichiers qui pointent
+    dessus, l'objet n'est supprimé du stockage qu'au dernier ``release``. Le
+    dossier borne le partage : les documents d'un candidat (``{candidate_id}/…``)
+    ne pointent jamais vers le dossier d'un autre.
+    """
+
+    bucket = models.CharField('bucket', max_length=63)
+    folder = models.CharField('dossier', max_length=500, blank=True)
+    sha256 = models.CharField('SHA-256', max_length=64)
+    name = models.CharField('chemin', max_length=500)
+    size_bytes = models.PositiveBigIntegerField('taille (octets)', default=0)
+    refcount = models.PositiveIntegerField('references', default=1)
+    created_at = models.DateTimeField('cree le', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'objet stocke'
+        verbose_name_plural = 'objets stockes'
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'folder', 'sha256'], name='storedblob_unique_content'),
+            models.UniqueConstraint(fields=['bucket', 'name'], name='storedblob_unique_name'),
+        ]
+
+    def __str__(self):
+        return f"{self.bucket}/{self.name} (x{self.refcount})"
+
+    @classmethod
+    def acquire(cls, bucket, folder, sha256):
+        """Chemin de l'objet du dossier ayant ce contenu (référence ajoutée), ou ``None``."""
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(bucket=bucket, folder=folder, sha256=sha256).first()
+            if blob is None:
+                return None
+            cls.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+            return blob.name
+
+    @classmethod
+    def release(cls, bucket, name):
+        """
+        Retire une référence. Retourne ``True`` si l'objet doit être supprimé
+        du stockage (dernière référence, ou fichier non suivi).
+        """
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(bucket=bucket, name=name).first()
+            if blob is None:
+                return True
+            if blob.refcount > 1:
+                cls.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                return False
+            blob.delete()
+            return True
+
+
+class ExpiringFile(models.Model):
+    """
+    Fichier généré (export…) déposé dans un bucket pour une durée limitée.
+    Enregistré avant l'envoi ; ``purge_expired_files`` le supprime du stockage
+    une fois ``expires_at`` passé, même si l'état du travail a quitté le cache.
+    """
+
+    bucket = models.CharField('bucket', max_length=63)
+    name = models.CharField('chemin', max_length=500)
+    expires_at = models.DateTimeField("date d'expiration", db_index=True)
+    created_at = models.DateTimeField('cree le', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'fichier temporaire'
+        verbose_name_plural = 'fichiers temporaires'
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'name'], name='expiringfile_unique_name'),
+        ]
+
+    def __str__(self):
+        return f"{self.bucket}/{self.name} (→ {self.expires_at:%d/%m %H:%M})"
+
+    @classmethod
+    def register(cls, storage, name, ttl):
+        """Planifie la suppression de ``name`` dans ``ttl`` secondes."""
+        cls.objects.update_or_create(
+            bucket=storage.bucket_name, name=name,
+            defaults={'expires_at': timezone.now() + timedelta(seconds=ttl)},
+        )
@@ -0,0 +1,21 @@
+"""
+Libération des fichiers des documents candidats (seul modèle sur un stockage
+dédupliqué) à la suppression de leur ligne. ``storage.delete`` ne retire
+l'objet qu'à la dernière référence (voir ``StoredBlob.release``).
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+def _release_file(field_file):
+    if field_file:
+        storage, name = field_file.storage, field_file.name
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_delete, sender='candidates.Document')
+def release_document_file(sender, instance, **kwargs):
+    # Un document encore en file d'attente n'a pas d'objet : push_spooled_document nettoie
+    if instance.upload_state == instance.UploadState.STORED:
+        _release_file(instance.file)
@@ -0,0 +1,21 @@
+"""Tâches Celery pour l'app storage (fichiers temporaires)."""
+from celery import shared_task
+from django.utils import timezone
+
+from config.supabase_storage import SupabaseStorage
+from .models import ExpiringFile
+
+
+@shared_task(soft_time_limit=600, time_limit=660)
+def purge_expired_files(batch_size=500):
+    """Supprime du stockage les fichiers temporaires expirés (planifiée par Celery beat)."""
+    expired = ExpiringFile.objects.filter(expires_at__lt=timezone.now())
+    total = 0
+    while True:
+        batch = list(expired.order_by().values_list('pk', 'bucket', 'name')[:batch_size])
+        if not batch:
+            return total
+        for _, bucket, name in batch:
+            SupabaseStorage(bucket).delete(name)  # objet absent : sans effet
+        ExpiringFile.objects.filter(pk__in=[pk for pk, _, _ in batch]).delete()
+        total += len(batch)
@@ -6,6 +6,8 @@ from pathlib import Path
 from datetime import timedelta
 from decouple import Config, RepositoryEnv, Csv
 import dj_database_url
+from celery.schedules import crontab
+from kombu import Queue
 
 # ──────────────────────────────────────────────
 # PATHS
@@ -75,6 +77,7 @@ LOCAL_APPS = [
     'apps.platform_settings',
     'apps.resources',
     'apps.notifications',
+    'apps.storage',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -88,6 +91,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'apps.platform_settings.middleware.MaintenanceModeMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -166,6 +170,10 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 MAX_UPLOAD_SIZE = config('MAX_UPLOAD_SIZE', default=5242880, cast=int)  # 5 Mo
 
+# Polices TrueType des PDF générés (livrets, attestations) : DejaVu Sans,
+# livrée avec le projet car les hébergeurs n'ont pas forcément de polices système
+PDF_FONT_DIR = config('PDF_FONT_DIR', default=str(BASE_DIR / 'fonts'))
+
 # ──────────────────────────────────────────────
 # SUPABASE STORAGE (Images CMS + Documents candidats)
 # ──────────────────────────────────────────────
@@ -173,8 +181,29 @@ SUPABASE_URL = config('SUPABASE_URL', default='')
 SUPABASE_KEY = config('SUPABASE_KEY', default='')
 SUPABASE_SERVICE_ROLE_KEY = config('SUPABASE_SERVICE_ROLE_KEY', default='')
 
-# Utiliser Supabase Storage par défaut pour les fichiers uploadés
-DEFAULT_FILE_STORAGE = 'config.supabase_storage.CMSMediaStorage'
+# 'supabase' ou 'local' (dossier LOCAL_STORAGE_ROOT, mêmes buckets : tests, hors ligne)
+STORAGE_BACKEND = config('STORAGE_BACKEND', default='supabase')
+LOCAL_STORAGE_URL_PREFIX = 'buckets/'
+LOCAL_STORAGE_ROOT = MEDIA_ROOT / LOCAL_STORAGE_URL_PREFIX
+
+# Un contenu déjà stocké (même SHA-256, même bucket) n'est pas renvoyé :
+# le fichier pointe sur l'objet existant (apps.storage.StoredBlob)
+STORAGE_DEDUPE = config('STORAGE_DEDUPE', default=True, cast=bool)
+
+# Documents candidats mis en file d'attente sur disque puis envoyés par Celery :
+# la requête ne dépend plus de la latence du stockage distant. Le dossier doit
+# être partagé entre le serveur web et les workers (volume commun).
+DOCUMENT_UPLOAD_SPOOL = config('DOCUMENT_UPLOAD_SPOOL', default=False, cast=bool)
+DOCUMENT_SPOOL_DIR = config('DOCUMENT_SPOOL_DIR', default=str(BASE_DIR / 'spool'))
+
+# DEFAULT_FILE_STORAGE / STATICFILES_STORAGE ne sont plus lus depuis Django 5.1 :
+# STORAGES reprend les backends effectivement utilisés jusqu'ici. Les fichiers
+# existants (avatars, images CMS, médias, ressources) sont sous MEDIA_ROOT ;
+# passer 'default' sur CMSMediaStorage demande d'abord de les copier dans le bucket.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
 
 # ──────────────────────────────────────────────
 # DEFAULT PK
@@ -186,7 +215,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ──────────────────────────────────────────────
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.OAIBJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -226,12 +255,13 @@ SIMPLE_JWT = {
     ),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': False,  # remplacé par apps.accounts.login_tracking (écriture groupée)
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.serializers.OAIBTokenRefreshSerializer',
 }
 
 # ──────────────────────────────────────────────
@@ -266,6 +296,85 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Files dédiées : les emails OTP / reset ne doivent jamais attendre
+# derrière un export ou un calcul de classement.
+#   celery -A config worker -Q critical -c 4
+#   celery -A config worker -Q default,bulk -c 2
+CELERY_TASK_QUEUES = (
+    Queue('critical', routing_key='critical'),
+    Queue('default', routing_key='default'),
+    Queue('bulk', routing_key='bulk'),
+)
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_DEFAULT_ROUTING_KEY = 'default'
+CELERY_TASK_ROUTES = {
+    'apps.accounts.tasks.send_otp_email': {'queue': 'critical', 'priority': 0},
+    'apps.accounts.tasks.process_registration': {'queue': 'default', 'priority': 2},
+    'apps.accounts.tasks.purge_expired_otps': {'queue': 'bulk'},
+    'apps.accounts.tasks.purge_expired_tokens': {'queue': 'bulk'},
+    'apps.accounts.tasks.flush_last_logins': {'queue': 'default'},
+    'apps.cms.tasks.generate_image_variants': {'queue': 'bulk'},
+    'apps.candidates.tasks.push_spooled_document': {'queue': 'default', 'priority': 3},
+    'apps.candidates.tasks.requeue_spooled_documents': {'queue': 'bulk'},
+    'apps.candidates.tasks.purge_upload_intents': {'queue': 'bulk'},
+    'apps.candidates.tasks.export_candidates': {'queue': 'bulk'},
+    'apps.exams.tasks.export_exam_results': {'queue': 'bulk'},
+    'apps.exams.tasks.generate_phase_certificates': {'queue': 'bulk'},
+    'apps.exams.tasks.generate_certificate_batch': {'queue': 'bulk'},
+    'apps.exams.tasks.generate_exam_booklets': {'queue': 'bulk'},
+    'apps.exams.tasks.render_booklet_document': {'queue': 'bulk'},
+    'apps.storage.tasks.purge_expired_files': {'queue': 'bulk'},
+}
+# Priorités au sein d'une même file (Redis : 0 = plus prioritaire)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+# Un worker ne réserve qu'une tâche à la fois : une tâche longue ne bloque
+# pas les messages déjà prélevés derrière elle.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+# Chaque tâche déclare son soft_time_limit ; ces valeurs ne servent qu'aux
+# tâches qui n'en précisent pas. Pas de rate_limit par défaut : appliqué par
+# worker, il plafonnerait le débit des files sans rien protéger. Seules les
+# tâches qui appellent un service externe (SMTP) en déclarent un.
+CELERY_TASK_SOFT_TIME_LIMIT = 300
+CELERY_TASK_TIME_LIMIT = 360
+# Résultats opt-in : seules les tâches déclarées ignore_result=False
+# écrivent dans le backend django-db.
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_RESULT_EXPIRES = timedelta(days=1)
+
+# Tâches périodiques (synchronisées dans django_celery_beat au démarrage de beat)
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-otps': {
+        'task': 'apps.accounts.tasks.purge_expired_otps',
+        'schedule': crontab(minute=15),  # toutes les heures
+    },
+    'purge-expired-tokens': {
+        'task': 'apps.accounts.tasks.purge_expired_tokens',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'requeue-spooled-documents': {
+        'task': 'apps.candidates.tasks.requeue_spooled_documents',
+        'schedule': crontab(minute='*/10'),
+    },
+    'purge-upload-intents': {
+        'task': 'apps.candidates.tasks.purge_upload_intents',
+        'schedule': crontab(minute=45),
+    },
+    'purge-expired-files': {
+        'task': 'apps.storage.tasks.purge_expired_files',
+        'schedule': crontab(minute=50),  # exports expirés
+    },
+    'flush-last-logins': {
+        'task': 'apps.accounts.tasks.flush_last_logins',
+        'schedule': 60.0,
+    },
+}
+
 # En développement : exécuter les tâches Celery de manière synchrone
 # (pas besoin de Redis ni d'un worker Celery)
 if DEBUG:
@@ -327,5 +436,13 @@ PHONENUMBER_DB_FORMAT = 'E164'
 SITE_NAME = config('SITE_NAME', default='Olympiades IA Bénin')
 SITE_URL = config('SITE_URL', default='http://localhost:5173')
 OTP_EXPIRY_MINUTES = 10
+OTP_RETENTION_HOURS = 24  # conservation des OTP / inscriptions expirés avant purge
+# Mode affluence (PlatformSettings.registration_surge_mode) : seau à jetons d'admission
+REGISTRATION_GATE_RATE = config('REGISTRATION_GATE_RATE', default=20, cast=float)  # inscriptions / seconde
+REGISTRATION_GATE_BURST = config('REGISTRATION_GATE_BURST', default=100, cast=int)
+# Mode maintenance / dégradé (PlatformSettings) : voir apps.platform_settings.middleware
+MAINTENANCE_RETRY_AFTER = 300  # secondes annoncées dans Retry-After
+STALE_RESPONSE_TTL = 24 * 60 * 60  # durée de vie des copies servies en mode dégradé
+STALE_RESPONSE_REFRESH = 60  # rafraîchissement max d'une copie, par processus
 QCM_SESSION_TIMEOUT_MINUTES = 30
 ALLOWED_DOCUMENT_EXTENSIONS = ['pdf', 'jpg', 'jpeg', 'png']
@@ -1,31 +1,435 @@
 """
 Storage backend pour Supabase - Gère images CMS et documents candidats
 """
-from supabase import create_client, Client
-from django.conf import settings
-from django.core.files.storage import Storage
+import base64
+import hashlib
+import logging
 import mimetypes
+import os
+import posixpath
+import threading
 import uuid
 from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import Storage
+from django.db import IntegrityError, transaction
+from supabase import Client, ClientOptions, create_client
+
+from apps.metrics import Histogram
+from apps.resilience import CircuitBreaker, call, current_timeout
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────
+# CLIENTS PARTAGÉS (un par processus)
+# ──────────────────────────────────────────────
+# Clé : (url, clé API, pid). Le pid évite de réutiliser, après un fork
+# (gunicorn, Celery prefork), les connexions HTTP ouvertes par le parent.
+_clients = {}
+_clients_lock = threading.Lock()
+
+HTTP_TIMEOUT = httpx.Timeout(20.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30)
+
+# Métadonnées (taille) des fichiers connus : évite un appel réseau par exists() / size()
+METADATA_TTL = 5 * 60
+
+# Upload en flux : lecture par blocs, protocole TUS (reprenable) au-delà du seuil.
+# Supabase impose des blocs TUS de 6 Mo exactement (sauf le dernier).
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+RESUMABLE_THRESHOLD = 6 * 1024 * 1024
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+TUS_CHUNK_RETRIES = 3
+
+# URLs signées : réutilisées jusqu'à SIGNED_URL_MARGIN secondes avant leur expiration
+SIGNED_URL_EXPIRY = 60 * 60
+SIGNED_URL_MARGIN = 5 * 60
+
+# Résilience des appels au stockage : (délai max en s, nouvelles tentatives)
+# par opération. Le délai s'applique à chaque phase HTTP (connexion, lecture,
+# écriture d'un bloc) : un upload long mais actif n'est pas interrompu.
+OPERATION_POLICIES = {
+    'save': (30.0, 1),
+    'open': (30.0, 2),
+    'url': (5.0, 2),
+    'exists': (5.0, 2),
+    'size': (5.0, 2),
+    'delete': (10.0, 2),
+    'read_head': (5.0, 1),
+}
+storage_breaker = CircuitBreaker('storage.supabase', failure_threshold=5, reset_timeout=30)
+_latency = {
+    operation: Histogram(f'storage.{operation}.seconds', f'Durée des appels {operation} au stockage')
+    for operation in OPERATION_POLICIES
+}
+
+
+def _service_key():
+    # Utiliser la clé service_role pour bypass RLS, fallback sur anon key
+    return getattr(settings, 'SUPABASE_SERVICE_ROLE_KEY', '') or settings.SUPABASE_KEY
+
+
+def get_client() -> Client:
+    """Client Supabase du processus, créé au premier usage."""
+    key = (settings.SUPABASE_URL, _service_key(), os.getpid())
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                # Entrées héritées d'un parent forké : abandonnées sans close()
+                # (fermer ces sockets couperait aussi celles du parent)
+                for stale in [k for k in _clients if k[2] != key[2]]:
+                    del _clients[stale]
+                http_client = httpx.Client(
+                    timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS,
+                    event_hooks={'request': [_apply_operation_timeout]},
+                )
+                client = create_client(key[0], key[1], options=ClientOptions(httpx_client=http_client))
+                _clients[key] = client
+    return client
+
+
+def _apply_operation_timeout(request):
+    """Hook httpx : délai de l'opération en cours (voir apps.resilience.call)."""
+    timeout = current_timeout()
+    if timeout is not None:
+        request.extensions['timeout'] = httpx.Timeout(timeout, connect=min(timeout, HTTP_TIMEOUT.connect)).as_dict()
+
+
+def _is_transient(exc):
+    """Panne du service (réseau, délai dépassé, 5xx) par opposition à une erreur de la requête."""
+    if isinstance(exc, FileNotFoundError):
+        return False
+    if isinstance(exc, (httpx.TransportError, OSError)):  # OSError : backend local
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    status = getattr(exc, 'status', None)  # storage3.exceptions.StorageApiError
+    try:
+        return int(status) >= 500
+    except (TypeError, ValueError):
+        return False
+
+
+def _auth_headers():
+    key = _service_key()
+    return {'Authorization': f'Bearer {key}', 'apikey': key}
+
+
+class _DigestingReader:
+    """Itère les blocs d'un fichier en calculant taille et SHA-256 au passage."""
+
+    def __init__(self, content, chunk_size=UPLOAD_CHUNK_SIZE):
+        self.content = content
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+    def __iter__(self):
+        for chunk in self.content.chunks(self.chunk_size):
+            self.sha256.update(chunk)
+            self.size += len(chunk)
+            yield chunk
+
+    def fixed_blocks(self, block_size):
+        """Regroupe les blocs lus en blocs de ``block_size`` octets (le dernier peut être plus court)."""
+        buffer = bytearray()
+        for chunk in self:
+            buffer.extend(chunk)
+            while len(buffer) >= block_size:
+                yield bytes(buffer[:block_size])
+                del buffer[:block_size]
+        if buffer:
+            yield bytes(buffer)
+
+
+def _content_digest(content):
+    """SHA-256 et taille d'un fichier local, lus par blocs avant tout envoi."""
+    digest, size = hashlib.sha256(), 0
+    for chunk in content.chunks(UPLOAD_CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _stream_upload(bucket_name, name, reader, content_type, total_size):
+    """Envoie ``reader`` à Supabase sans charger le fichier entier en mémoire."""
+    client = get_client()
+    http = client.options.httpx_client
+    storage_url = str(client.storage_url)
+
+    if total_size < RESUMABLE_THRESHOLD:
+        response = http.post(
+            f'{storage_url}object/{bucket_name}/{quote(name)}',
+            content=iter(reader),
+            headers={
+                **_auth_headers(),
+                'Content-Type': content_type,
+                'Content-Length': str(total_size),
+                'x-upsert': 'true',
+            },
+        )
+        response.raise_for_status()
+        return
+
+    # TUS : création de l'upload, puis blocs PATCH repris en cas d'erreur réseau
+    metadata = {'bucketName': bucket_name, 'objectName': name, 'contentType': content_type}
+    tus_headers = {**_auth_headers(), 'Tus-Resumable': '1.0.0'}
+    response = http.post(
+        f'{storage_url}upload/resumable',
+        headers={
+            **tus_headers,
+            'Upload-Length': str(total_size),
+            'Upload-Metadata': ','.join(
+                f'{k} {base64.b64encode(v.encode()).decode()}' for k, v in metadata.items()
+            ),
+            'x-upsert': 'true',
+        },
+    )
+    response.raise_for_status()
+    location = response.headers['Location']
+
+    offset = 0
+    for block in reader.fixed_blocks(TUS_CHUNK_SIZE):
+        for attempt in range(TUS_CHUNK_RETRIES):
+            try:
+                response = http.patch(location, content=block, headers={
+                    **tus_headers,
+                    'Upload-Offset': str(offset),
+                    'Content-Type': 'application/offset+octet-stream',
+                })
+                response.raise_for_status()
+                break
+            except httpx.TransportError:
+                if attempt == TUS_CHUNK_RETRIES - 1:
+                    raise
+                # Le serveur a peut-être reçu le bloc : repartir de son offset
+                head = http.head(location, headers=tus_headers)
+                if int(head.headers.get('Upload-Offset', offset)) == offset + len(block):
+                    break
+        offset += len(block)
+
+
+def get_bucket(bucket_name):
+    """API fichiers d'un bucket : Supabase, ou dossier local si ``STORAGE_BACKEND = 'local'``."""
+    if getattr(settings, 'STORAGE_BACKEND', 'supabase') == 'local':
+        return LocalBucket(bucket_name)
+    return get_client().storage.from_(bucket_name)
+
+
+class LocalBucket:
+    """
+    Bucket sur le système de fichiers, même interface que l'API Supabase
+    utilisée ici (tests, développement hors ligne).
+    """
+
+    def __init__(self, bucket_name):
+        self.id = bucket_name
+        self.root = Path(settings.LOCAL_STORAGE_ROOT) / bucket_name
+
+    def _path(self, path):
+        full = (self.root / path).resolve()
+        if self.root.resolve() not in full.parents:
+            raise ValueError(f'Chemin hors du bucket : {path}')
+        return full
+
+    def upload(self, path, file, file_options=None):
+        full = self._path(path)
+        full.parent.mkdir(parents=True, exist_ok=True)
+        data = file if isinstance(file, bytes) else file.read()
+        full.write_bytes(data)
+        return {'path': path}
+
+    def upload_stream(self, path, chunks):
+        full = self._path(path)
+        full.parent.mkdir(parents=True, exist_ok=True)
+        with open(full, 'wb') as destination:
+            for chunk in chunks:
+                destination.write(chunk)
+        return {'path': path}
+
+    def download(self, path):
+        return self._path(path).read_bytes()
+
+    def remove(self, paths):
+        removed = []
+        for path in paths:
+            full = self._path(path)
+            if full.exists():
+                full.unlink()
+                removed.append({'name': path})
+        return removed
+
+    def list(self, path=None, options=None):
+        folder = self._path(path) if path else self.root
+        search = (options or {}).get('search', '')
+        if not folder.is_dir():
+            return []
+        return [
+            {'name': entry.name, 'metadata': {
+                'size': entry.stat().st_size,
+                'mimetype': mimetypes.guess_type(entry.name)[0],
+            }}
+            for entry in sorted(folder.iterdir())
+            if entry.is_file() and search in entry.name
+        ]
+
+    def exists(self, path):
+        return self._path(path).is_file()
+
+    def get_public_url(self, path, options=None):
+        return f"{settings.MEDIA_URL}{settings.LOCAL_STORAGE_URL_PREFIX}{self.id}/{path}"
+
+    def create_signed_url(self, path, expires_in, options=None):
+        url = self.get_public_url(path)
+        return {'signedURL': url, 'signedUrl': url}
+
+    def create_signed_urls(self, paths, expires_in, options=None):
+        return [
+            {'path': path, 'error': None, **self.create_signed_url(path, expires_in)}
+            for path in paths
+        ]
+
+    # Upload signé : l'URL n'est pas servie en local, les tests passent par upload_to_signed_url
+    def create_signed_upload_url(self, path, options=None):
+        token = uuid.uuid4().hex
+        url = f"{self.get_public_url(path)}?token={token}"
+        return {'signed_url': url, 'signedUrl': url, 'token': token, 'path': path}
+
+    def upload_to_signed_url(self, path, token, file, file_options=None):
+        return self.upload(path, file)
+
+    def read_head(self, path, length):
+        with open(self._path(path), 'rb') as f:
+            return f.read(length)
 
 
 class SupabaseStorage(Storage):
     """Storage générique pour Supabase"""
 
     def __init__(self, bucket_name='cms-media'):
-        # Utiliser la clé service_role pour bypass RLS, fallback sur anon key
-        service_key = getattr(settings, 'SUPABASE_SERVICE_ROLE_KEY', '') or settings.SUPABASE_KEY
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            service_key
-        )
         self.bucket_name = bucket_name
 
-    def _save(self, name, content):
-        """Upload un fichier vers Supabase"""
-        # Lire le contenu
-        file_data = content.read()
+    @property
+    def bucket(self):
+        return get_bucket(self.bucket_name)
+
+    def _remote(self, operation, func):
+        """Appel distant avec délai, nouvelles tentatives, disjoncteur et mesure de durée."""
+        timeout, retries = OPERATION_POLICIES[operation]
+        return call(
+            storage_breaker, func, timeout=timeout, retries=retries,
+            histogram=_latency[operation], is_failure=_is_transient,
+        )
+
+    # ── Métadonnées ───────────────────────────────
+    def _metadata_key(self, name):
+        return f'storage_meta:{self.bucket_name}:{name}'
+
+    def _metadata(self, name, operation='exists'):
+        """
+        ``{'size': ...}`` du fichier, ou ``None`` s'il n'existe pas.
+        Cache d'abord, puis un ``list`` limité au dossier du fichier et filtré
+        sur son nom (coût indépendant de la taille du bucket). Les absences ne
+        sont pas mises en cache : un upload d'un autre worker doit être vu.
+        """
+        meta = cache.get(self._metadata_key(name))
+        if meta is not None:
+            return meta
+        dirname, basename = posixpath.split(name)
+        files = self._remote(operation, lambda: self.bucket.list(dirname or None, {'search': basename, 'limit': 100}))
+        entry = next((f for f in files if f.get('name') == basename), None)
+        if entry is None:
+            return None
+        metadata = entry.get('metadata') or {}
+        meta = {'size': metadata.get('size', 0), 'mimetype': metadata.get('mimetype')}
+        cache.set(self._metadata_key(name), meta, METADATA_TTL)
+        return meta
+
+    # ── URLs signées ──────────────────────────────
+    def _signed_key(self, name):
+        return f'storage_signed:{self.bucket_name}:{name}'
+
+    def signed_url(self, name):
+        """URL signée, depuis le cache tant qu'elle reste valide assez longtemps."""
+        url = cache.get(self._signed_key(name))
+        if url is None:
+            response = self._remote('url', lambda: self.bucket.create_signed_url(path=name, expires_in=SIGNED_URL_EXPIRY))
+            url = response.get('signedURL', '')
+            if url:
+                cache.set(self._signed_key(name), url, SIGNED_URL_EXPIRY - SIGNED_URL_MARGIN)
+        return url
+
+    def prime_signed_urls(self, names):
+        """Signe en un seul appel les fichiers d'une page qui ne sont pas encore en cache."""
+        names = list(dict.fromkeys(n for n in names if n))
+        if not names:
+            return {}
+        keys = {self._signed_key(name): name for name in names}
+        urls = {keys[key]: url for key, url in cache.get_many(keys).items()}
+        missing = [name for name in names if name not in urls]
+        if missing:
+            fresh = {}
+            signed = self._remote('url', lambda: self.bucket.create_signed_urls(missing, SIGNED_URL_EXPIRY))
+            for item in signed:
+                if item.get('signedURL') and not item.get('error'):
+                    fresh[item['path']] = item['signedURL']
+            cache.set_many(
+                {self._signed_key(name): url for name, url in fresh.items()},
+                SIGNED_URL_EXPIRY - SIGNED_URL_MARGIN,
+            )
+            urls.update(fresh)
+        return urls
+
+    # ── Déduplication par contenu ─────────────────
+    def save(self, name, content, max_length=None, deduplicate=True, overwrite=False):
+        """
+        Avec ``STORAGE_DEDUPE``, un contenu déjà présent dans le même dossier du
+        bucket n'est pas renvoyé : le chemin de l'objet existant est retourné
+        (voir ``StoredBlob``).
+        ``deduplicate=False`` pour les fichiers dont le nom doit être conservé.
+        ``overwrite=True`` : nom déterministe, l'objet existant est remplacé
+        (sans appel ``exists()``, sans déduplication).
+        """
+        if overwrite:
+            return self._save(name, content)
+        if not (deduplicate and settings.STORAGE_DEDUPE):
+            return super().save(name, content, max_length)
+        from apps.storage.models import StoredBlob
 
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        sha256, size = _content_digest(content)
+        # Partage limité au dossier (propriétaire) : pas de chemin d'un autre candidat
+        folder = posixpath.dirname(self.generate_filename(name))
+        existing = StoredBlob.acquire(self.bucket_name, folder, sha256)
+        if existing is not None:
+            return existing
+
+        name = super().save(name, content, max_length)
+        try:
+            with transaction.atomic():
+                StoredBlob.objects.create(
+                    bucket=self.bucket_name, folder=folder, sha256=sha256, name=name, size_bytes=size,
+                )
+        except IntegrityError:
+            # Même contenu envoyé en parallèle : on garde l'objet déjà enregistré
+            existing = StoredBlob.acquire(self.bucket_name, folder, sha256)
+            if existing is not None:
+                self.delete(name)
+                return existing
+        return name
+
+    def _save(self, name, content):
+        """Upload un fichier vers Supabase, en flux (taille et SHA-256 calculés au passage)"""
         # Déterminer le content-type
         content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
 
@@ -34,20 +438,60 @@ class SupabaseStorage(Storage):
             ext = content_type.split('/')[-1]
             name = f"{uuid.uuid4()}.{ext}"
 
-        # Upload vers Supabase
+        def upload():
+            # Nouveau lecteur à chaque essai (relit le fichier depuis le début)
+            reader = _DigestingReader(content)
+            bucket = self.bucket
+            if isinstance(bucket, LocalBucket):
+                bucket.upload_stream(name, reader)
+            else:
+                _stream_upload(self.bucket_name, name, reader, content_type, content.size)
+            return reader
+
+        # Upload vers Supabase (écrase si le fichier existe)
         try:
-            self.supabase.storage.from_(self.bucket_name).upload(
-                path=name,
-                file=file_data,
-                file_options={
-                    "content-type": content_type,
-                    "upsert": "true"  # Remplacer si existe
-                }
-            )
-            return name
-        except Exception as e:
-            print(f"Erreur upload Supabase: {e}")
+            reader = self._remote('save', upload)
+        except Exception:
+            logger.exception('Upload de %s vers %s impossible', name, self.bucket_name)
             raise
+        cache.set(
+            self._metadata_key(name),
+            {'size': reader.size, 'sha256': reader.sha256.hexdigest()},
+            METADATA_TTL,
+        )
+        return name
+
+    # ── Upload direct (client -> Supabase) ────────
+    def create_upload_url(self, name):
+        """URL signée permettant au client d'envoyer ``name`` directement (valable 2 h)."""
+        return self._remote('url', lambda: self.bucket.create_signed_upload_url(name))
+
+    def read_head(self, name, length=16):
+        """Premiers octets du fichier (vérification du type réel), sans le télécharger."""
+        bucket = self.bucket
+        if isinstance(bucket, LocalBucket):
+            return bucket.read_head(name, length)
+        client = get_client()
+
+        def fetch():
+            response = client.options.httpx_client.get(
+                f'{client.storage_url}object/authenticated/{self.bucket_name}/{quote(name)}',
+                headers={**_auth_headers(), 'Range': f'bytes=0-{length - 1}'},
+            )
+            response.raise_for_status()
+            return response.content[:length]
+
+        return self._remote('read_head', fetch)
+
+    def refresh_metadata(self, name):
+        """Relit les métadonnées sur Supabase (fichier envoyé hors de ce storage)."""
+        cache.delete(self._metadata_key(name))
+        return self._metadata(name)
+
+    def _open(self, name, mode='rb'):
+        """Télécharge un fichier depuis Supabase"""
+        data = self._remote('open', lambda: self.bucket.download(name))
+        return ContentFile(data, name=name)
 
     def url(self, name):
         """Retourne l'URL publique (CMS) ou signée (candidats)"""
@@ -56,40 +500,42 @@ class SupabaseStorage(Storage):
 
         if self.bucket_name == 'cms-media':
             # URL publique pour le CMS
-            return f"{settings.SUPABASE_URL}/storage/v1/object/public/{self.bucket_name}/{name}"
+            return self.bucket.get_public_url(name)
         else:
-            # URL signée (expire dans 1h) pour les documents candidats
+            # URL signée (expire dans 1h, en cache) pour les documents candidats
             try:
-                response = self.supabase.storage.from_(self.bucket_name).create_signed_url(
-                    path=name,
-                    expires_in=3600  # 1 heure
-                )
-                return response.get('signedURL', '')
-            except:
+                return self.signed_url(name)
+            except Exception as e:
+                logger.warning('Signature de %s impossible : %s', name, e)
                 return ''
 
     def exists(self, name):
         """Vérifie si un fichier existe"""
         try:
-            files = self.supabase.storage.from_(self.bucket_name).list()
-            return any(f['name'] == name for f in files)
-        except:
+            return self._metadata(name, 'exists') is not None
+        except Exception as e:
+            logger.warning('Existence de %s inconnue : %s', name, e)
             return False
 
     def delete(self, name):
-        """Supprime un fichier"""
+        """Supprime un fichier (objet dédupliqué : seulement à la dernière référence)"""
+        from apps.storage.models import StoredBlob
+
+        if not StoredBlob.release(self.bucket_name, name):
+            return
+        cache.delete_many([self._metadata_key(name), self._signed_key(name)])
         try:
-            self.supabase.storage.from_(self.bucket_name).remove([name])
+            self._remote('delete', lambda: self.bucket.remove([name]))
         except Exception as e:
-            print(f"Erreur suppression Supabase: {e}")
+            logger.error('Suppression de %s dans %s impossible : %s', name, self.bucket_name, e)
 
     def size(self, name):
         """Retourne la taille du fichier"""
         try:
-            files = self.supabase.storage.from_(self.bucket_name).list()
-            file = next((f for f in files if f['name'] == name), None)
-            return file['metadata']['size'] if file and 'metadata' in file else 0
-        except:
+            meta = self._metadata(name, 'size')
+            return meta['size'] if meta else 0
+        except Exception as e:
+            logger.warning('Taille de %s inconnue : %s', name, e)
             return 0
 
 
@@ -101,6 +547,17 @@ class CMSMediaStorage(SupabaseStorage):
         super().__init__(bucket_name='cms-media')
 
 
+def candidate_document_path(candidate_id, filename):
+    """
+    Génère un chemin unique pour un candidat
+    Format: {candidate_id}/{timestamp}_{uuid}.{ext}
+    """
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    ext = filename.split('.')[-1] if '.' in filename else 'pdf'
+    unique_id = uuid.uuid4().hex[:8]
+    return f"{candidate_id}/{timestamp}_{unique_id}.{ext}"
+
+
 # Storage spécifique pour les documents candidats
 class CandidateDocumentStorage(SupabaseStorage):
     """Storage privé pour les documents des candidats"""
@@ -109,11 +566,4 @@ class CandidateDocumentStorage(SupabaseStorage):
         super().__init__(bucket_name='candidate-documents')
 
     def get_candidate_path(self, candidate_id, filename):
-        """
-        Génère un chemin unique pour un candidat
-        Format: {candidate_id}/{timestamp}_{uuid}.{ext}
-        """
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        ext = filename.split('.')[-1] if '.' in filename else 'pdf'
-        unique_id = uuid.uuid4().hex[:8]
-        return f"{candidate_id}/{timestamp}_{unique_id}.{ext}"
+        return candidate_document_path(candidate_id, filename)
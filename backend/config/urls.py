@@ -16,6 +16,7 @@ urlpatterns = [
     path('api/v1/settings/', include('apps.platform_settings.urls')),
     path('api/v1/resources/', include('apps.resources.urls')),
     path('api/v1/notifications/', include('apps.notifications.urls')),
+    path('api/v1/public/', include('apps.cms.public_urls')),
 
     # API documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),